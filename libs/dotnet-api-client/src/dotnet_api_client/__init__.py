@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 from dotnet_api_client.client import DotNetApiClient
+from dotnet_api_client.async_client import AsyncDotNetApiClient
 from dotnet_api_client.constants import FileStatus
 
 
-__all__ = ["DotNetApiClient", "FileStatus"]
+__all__ = ["AsyncDotNetApiClient", "DotNetApiClient", "FileStatus"]
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Any
+
+import httpx
+
+from dotnet_api_client.client import empty_cv_result, empty_jd_result
+from dotnet_api_client.batching import Coalescer
+from dotnet_api_client.constants import DotNetApiRoutes
+from dotnet_api_client.serializers import (
+    JSON_HEADERS,
+    dump_jd_result,
+    dump_cv_results,
+)
+
+
+if TYPE_CHECKING:
+    from types import TracebackType
+    from collections.abc import Sequence
+
+    from dotnet_api_client.dtos import CVUpdateResponseDto, JDUpdateResponseDto
+    from dotnet_api_client.constants import FileStatus
+
+
+class AsyncDotNetApiClient:
+    """Async `DotNetApiClient` on a pooled HTTP/2 connection.
+
+    Besides the per-call methods, `submit_cv_result` and `submit_file_status`
+    coalesce concurrent calls: CV results are sent as one `receiveCVResults` list
+    per batch, and only the latest status per file_id is sent.
+    """
+
+    def __init__(
+        self,
+        api_url: str,
+        *,
+        http2: bool = True,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        timeout: float = 30.0,
+        max_batch: int = 50,
+        max_delay: float = 0.5,
+    ) -> None:
+        self._client = httpx.AsyncClient(
+            base_url=api_url,
+            verify=False,  # noqa: S501
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            timeout=timeout,
+        )
+        self._cv_results: Coalescer[CVUpdateResponseDto] = Coalescer(
+            self.update_cv_results,
+            max_batch=max_batch,
+            max_delay=max_delay,
+        )
+        self._statuses: Coalescer[tuple[str, FileStatus]] = Coalescer(
+            self._send_statuses,
+            max_batch=max_batch,
+            max_delay=max_delay,
+            key=lambda update: update[0],
+        )
+
+    async def __aenter__(self) -> AsyncDotNetApiClient:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        await self.aclose()
+
+    # ----------------- Per-call API -----------------
+    async def update_file_status(self, file_id: str, status: FileStatus) -> None:
+        response = await self._client.post(
+            url=DotNetApiRoutes.FILES_UPDATE_STATUS,
+            params={
+                "fileId": file_id,
+                "status": status,
+            },
+        )
+
+        response.raise_for_status()
+
+    async def update_cv_result(
+        self,
+        file_id: str,
+        status: FileStatus,
+        result: CVUpdateResponseDto | None,
+    ) -> None:
+        if result is None:
+            result = empty_cv_result(file_id, status)
+
+        await self.update_cv_results([result])
+
+    async def update_cv_results(self, results: Sequence[CVUpdateResponseDto]) -> None:
+        """Send several CV results in one `receiveCVResults` call."""
+        response = await self._client.put(
+            url=DotNetApiRoutes.CVS_UPDATE_RESULTS,
+            content=dump_cv_results(results),
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+
+    async def update_jd_result(
+        self,
+        file_id: str,
+        status: FileStatus,
+        result: JDUpdateResponseDto | None,
+    ) -> None:
+        if result is None:
+            result = empty_jd_result(file_id, status)
+
+        response = await self._client.post(
+            url=DotNetApiRoutes.JDS_UPDATE_RESULTS,
+            content=dump_jd_result(result),
+            headers=JSON_HEADERS,
+        )
+
+        response.raise_for_status()
+
+    # ----------------- Coalesced API -----------------
+    async def submit_cv_result(
+        self,
+        file_id: str,
+        status: FileStatus,
+        result: CVUpdateResponseDto | None,
+    ) -> None:
+        """Queue a CV result; returns once the batch holding it was sent."""
+        if result is None:
+            result = empty_cv_result(file_id, status)
+
+        await self._cv_results.submit(result)
+
+    async def submit_file_status(self, file_id: str, status: FileStatus) -> None:
+        """Queue a status update; a newer status for the same file replaces it."""
+        await self._statuses.submit((file_id, status))
+
+    async def flush(self) -> None:
+        await asyncio.gather(self._statuses.flush(), self._cv_results.flush())
+
+    async def aclose(self) -> None:
+        """Send pending results and statuses, then close the connection pool."""
+        try:
+            await asyncio.gather(self._statuses.aclose(), self._cv_results.aclose())
+        finally:
+            await self._client.aclose()
+
+    async def _send_statuses(self, updates: list[tuple[str, FileStatus]]) -> None:
+        # The API takes one status per call; the calls share the pooled connection
+        results: list[Any] = await asyncio.gather(
+            *(self.update_file_status(file_id, status) for file_id, status in updates),
+            return_exceptions=True,
+        )
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            raise errors[0]
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Generic, TypeVar
+
+
+if TYPE_CHECKING:
+    from collections.abc import Hashable, Callable, Awaitable
+
+
+T = TypeVar("T")
+# key -> (item, futures of the callers waiting for it)
+_Batch = dict["Hashable", tuple[T, list["asyncio.Future[None]"]]]
+
+
+class Coalescer(Generic[T]):
+    """Buffer items submitted by concurrent tasks and send them in batches.
+
+    A batch is sent when it reaches `max_batch` items or `max_delay` seconds after
+    its first item, whichever comes first. `submit` returns once the batch holding
+    the item was sent, and raises if sending it failed.
+
+    With `key`, an item replaces any pending item with the same key (only the
+    latest is sent); callers of the replaced item are resolved with the batch.
+    Batches are then sent one at a time in the order they were formed, so an
+    older item never overwrites a newer one for the same key. Without `key`,
+    batches are sent concurrently.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[list[T]], Awaitable[None]],
+        *,
+        max_batch: int = 50,
+        max_delay: float = 0.5,
+        key: Callable[[T], Hashable] | None = None,
+    ) -> None:
+        self._send = send
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._key = key
+        self._pending: _Batch[T] = {}
+        self._counter = 0
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._last_send: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def submit(self, item: T) -> None:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[None] = loop.create_future()
+
+        if self._key is not None:
+            key = self._key(item)
+            _, futures = self._pending.pop(key, (item, []))
+        else:
+            key = self._counter
+            self._counter += 1
+            futures = []
+        futures.append(future)
+        self._pending[key] = (item, futures)
+
+        if len(self._pending) >= self.max_batch:
+            self._spawn_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._spawn_flush)
+
+        await future
+
+    async def flush(self) -> None:
+        """Send everything pending now."""
+        await self._spawn_flush()
+
+    async def aclose(self) -> None:
+        """Send what is pending and wait for in-flight batches."""
+        await self.flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _take(self) -> _Batch[T]:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, {}
+        return pending
+
+    async def _send_batch(
+        self, batch: _Batch[T], after: asyncio.Task[None] | None = None
+    ) -> None:
+        if after is not None:
+            await asyncio.wait({after})
+        if not batch:
+            return
+        items = [item for item, _ in batch.values()]
+        futures = [future for _, item_futures in batch.values() for future in item_futures]
+        try:
+            await self._send(items)
+        except Exception as e:  # noqa: BLE001
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for future in futures:
+                if not future.done():
+                    future.set_result(None)
+
+    def _spawn_flush(self) -> asyncio.Task[None]:
+        # The batch is taken now: items submitted meanwhile go to the next batch
+        batch = self._take()
+        # With `key`, each batch waits for the previous one to be sent
+        previous = self._last_send if self._key is not None else None
+        task = asyncio.get_running_loop().create_task(self._send_batch(batch, previous))
+        self._last_send = task
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
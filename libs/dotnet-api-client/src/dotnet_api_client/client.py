@@ -7,6 +7,11 @@ import httpx
 
 from dotnet_api_client.dtos import CVUpdateResponseDto, JDUpdateResponseDto
 from dotnet_api_client.constants import DotNetApiRoutes
+from dotnet_api_client.serializers import (
+    JSON_HEADERS,
+    dump_jd_result,
+    dump_cv_results,
+)
 
 
 if TYPE_CHECKING:
@@ -38,20 +43,12 @@ class DotNetApiClient:
         result: CVUpdateResponseDto | None,
     ) -> None:
         if result is None:
-            result = CVUpdateResponseDto(
-                cv_id=file_id,
-                status=status,
-                name="",
-                address="",
-                email="",
-                phone="",
-                additional_info="",
-                profile_image_path="",
-            )
+            result = empty_cv_result(file_id, status)
 
         response = self._client.put(
             url=DotNetApiRoutes.CVS_UPDATE_RESULTS,
-            json=[result.model_dump(by_alias=True, mode="json")],
+            content=dump_cv_results([result]),
+            headers=JSON_HEADERS,
         )
 
         response.raise_for_status()
@@ -63,28 +60,48 @@ class DotNetApiClient:
         result: JDUpdateResponseDto | None,
     ) -> None:
         if result is None:
-            result = JDUpdateResponseDto(
-                jd_id=file_id,
-                status=status,
-                product_id="",
-                department_id="",
-                position_id="",
-                s3_save_path="",
-                created_at=datetime.now(UTC),
-                updated_at=None,
-                jd_title="",
-                hard_skills=[],
-                soft_skills=[],
-                education=[],
-                experience=[],
-                projects=[],
-                languages=[],
-                domain=[],
-            )
+            result = empty_jd_result(file_id, status)
 
         response = self._client.post(
             url=DotNetApiRoutes.JDS_UPDATE_RESULTS,
-            json={**result.model_dump(mode="json")},
+            content=dump_jd_result(result),
+            headers=JSON_HEADERS,
         )
 
         response.raise_for_status()
+
+
+def empty_cv_result(file_id: str, status: FileStatus) -> CVUpdateResponseDto:
+    """Result sent when a CV could not be parsed (only id and status are set)."""
+    return CVUpdateResponseDto(
+        cv_id=file_id,
+        status=status,
+        name="",
+        address="",
+        email="",
+        phone="",
+        additional_info="",
+        profile_image_path="",
+    )
+
+
+def empty_jd_result(file_id: str, status: FileStatus) -> JDUpdateResponseDto:
+    """Result sent when a JD could not be parsed (only id and status are set)."""
+    return JDUpdateResponseDto(
+        jd_id=file_id,
+        status=status,
+        product_id="",
+        department_id="",
+        position_id="",
+        s3_save_path="",
+        created_at=datetime.now(UTC),
+        updated_at=None,
+        jd_title="",
+        hard_skills=[],
+        soft_skills=[],
+        education=[],
+        experience=[],
+        projects=[],
+        languages=[],
+        domain=[],
+    )
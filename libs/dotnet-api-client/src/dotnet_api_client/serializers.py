@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from pydantic import TypeAdapter
+
+from dotnet_api_client.dtos import CVUpdateResponseDto, JDUpdateResponseDto
+
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+
+# Built once: dump_json serializes straight to JSON bytes in pydantic-core,
+# without the intermediate dicts of model_dump + json.dumps
+_CV_RESULTS = TypeAdapter(list[CVUpdateResponseDto])
+_JD_RESULT = TypeAdapter(JDUpdateResponseDto)
+_JD_RESULTS = TypeAdapter(list[JDUpdateResponseDto])
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def dump_cv_results(results: Sequence[CVUpdateResponseDto]) -> bytes:
+    """`receiveCVResults` body: a JSON list, serialized with the API aliases."""
+    return _CV_RESULTS.dump_json(list(results), by_alias=True)
+
+
+def dump_jd_result(result: JDUpdateResponseDto) -> bytes:
+    """`receiveJDResults` body (field names, not aliases)."""
+    return _JD_RESULT.dump_json(result)
+
+
+def dump_jd_results(results: Sequence[JDUpdateResponseDto]) -> bytes:
+    """Several JD results as one JSON list, in a single call."""
+    return _JD_RESULTS.dump_json(list(results))
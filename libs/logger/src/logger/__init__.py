@@ -1,14 +1,29 @@
 from __future__ import annotations
 
 from logger.src.logger import contextualize_logger
+from logger.src.logger.async_sink import (
+    AsyncLogHandler,
+    BackgroundWriter,
+    setup_file_logging,
+)
 from logger.src.logger.get_logger import get_logger
-from logger.src.logger.middleware import logging_middleware
+from logger.src.logger.lazy import Lazy, LazyFields
+from logger.src.logger.middleware import lazy_logging_middleware, logging_middleware
+from logger.src.logger.rate_limit import RateLimitFilter, RateLimitProcessor
 from logger.src.logger.setup_logger import setup_logger
 
 
 __all__ = [
+    "AsyncLogHandler",
+    "BackgroundWriter",
+    "Lazy",
+    "LazyFields",
+    "RateLimitFilter",
+    "RateLimitProcessor",
     "contextualize_logger",
     "get_logger",
+    "lazy_logging_middleware",
     "logging_middleware",
+    "setup_file_logging",
     "setup_logger",
 ]
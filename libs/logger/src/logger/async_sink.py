@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import os
+import sys
+import queue
+import atexit
+import logging
+import threading
+from typing import IO, TYPE_CHECKING, Any, Literal
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from structlog.typing import EventDict, WrappedLogger
+
+
+OverflowPolicy = Literal["drop_newest", "drop_oldest", "block"]
+
+
+class BackgroundWriter:
+    """Render and write log entries on a background thread.
+
+    Entries wait in a bounded queue and are written in batches (one `write` and
+    `flush` per batch). When the queue is full, `overflow` decides what happens:
+    drop the new entry, drop the oldest queued entry, or block the caller.
+    Dropped entries are counted and reported in the log itself.
+    """
+
+    def __init__(
+        self,
+        stream: IO[bytes],
+        render: Callable[[Any], bytes],
+        *,
+        max_queue: int = 10_000,
+        batch_size: int = 512,
+        flush_interval: float = 0.5,
+        overflow: OverflowPolicy = "drop_newest",
+        dropped_entry: Callable[[int], Any] | None = None,
+    ) -> None:
+        self.stream = stream
+        self.render = render
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.dropped_entry = dropped_entry
+        self.dropped = 0
+
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=max_queue)
+        self._reported_dropped = 0
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, entry: Any) -> None:
+        if self._closed.is_set():
+            return
+        if self.overflow == "block":
+            self._queue.put(entry)
+            return
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            if self.overflow == "drop_oldest":
+                try:
+                    self._queue.get_nowait()
+                    self._queue.put_nowait(entry)
+                except (queue.Empty, queue.Full):
+                    pass
+            self.dropped += 1
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write what is still queued and stop the background thread."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not (self._closed.is_set() and self._queue.empty()):
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, batch: list[Any]) -> None:
+        dropped = self.dropped - self._reported_dropped
+        if dropped and self.dropped_entry is not None:
+            batch.append(self.dropped_entry(dropped))
+            self._reported_dropped += dropped
+
+        chunks = []
+        for entry in batch:
+            try:
+                chunks.append(self.render(entry))
+            except Exception as e:  # noqa: BLE001
+                chunks.append(f"log.render_error: {e!r} {entry!r}\n".encode())
+        try:
+            self.stream.write(b"".join(chunks))
+            self.stream.flush()
+        except (OSError, ValueError) as e:
+            print(f"log.write_error: {e!r}", file=sys.stderr)  # noqa: T201
+
+
+# ----------------- structlog -----------------
+def defer_rendering(
+    logger: WrappedLogger, method_name: str, event_dict: EventDict
+) -> tuple[tuple[EventDict], dict[str, Any]]:
+    """Last processor: hand the event dict to `AsyncLogger`, which renders it later."""
+    return (event_dict,), {}
+
+
+class AsyncLogger:
+    """structlog logger that queues event dicts on a `BackgroundWriter`."""
+
+    def __init__(self, writer: BackgroundWriter) -> None:
+        self._writer = writer
+
+    def msg(self, event_dict: EventDict) -> None:
+        self._writer.submit(event_dict)
+
+    log = debug = info = warn = warning = msg
+    fatal = failure = err = error = critical = exception = msg
+
+
+class AsyncLoggerFactory:
+    def __init__(self, writer: BackgroundWriter) -> None:
+        self.writer = writer
+        self._logger = AsyncLogger(writer)
+
+    def __call__(self, *args: Any) -> AsyncLogger:
+        return self._logger
+
+
+# ----------------- stdlib logging -----------------
+class AsyncLogHandler(logging.Handler):
+    """`logging.Handler` that formats and writes records on a background thread.
+
+    Records are queued as-is; messages should not be built from objects that are
+    mutated after the log call.
+    """
+
+    def __init__(
+        self,
+        stream: IO[bytes],
+        level: int = logging.NOTSET,
+        **writer_options: Any,
+    ) -> None:
+        super().__init__(level)
+        self.writer = BackgroundWriter(
+            stream,
+            self._render,
+            dropped_entry=self._dropped_record,
+            **writer_options,
+        )
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # The traceback must be captured now, the frames are gone later
+        if record.exc_info and not record.exc_text:
+            formatter = self.formatter or logging.Formatter()
+            record.exc_text = formatter.formatException(record.exc_info)
+            record.exc_info = None
+        self.writer.submit(record)
+
+    def close(self) -> None:
+        self.writer.close()
+        self.writer.stream.close()
+        super().close()
+
+    def _render(self, record: logging.LogRecord) -> bytes:
+        return (self.format(record) + "\n").encode("utf-8")
+
+    @staticmethod
+    def _dropped_record(count: int) -> logging.LogRecord:
+        return logging.makeLogRecord(
+            {
+                "name": __name__,
+                "levelno": logging.WARNING,
+                "levelname": "WARNING",
+                "msg": "log.dropped: %d log records were dropped (queue full)",
+                "args": (count,),
+            }
+        )
+
+
+_file_handlers: dict[str, AsyncLogHandler] = {}
+_file_handlers_lock = threading.Lock()
+
+
+def setup_file_logging(
+    filename: str,
+    *,
+    level: int = logging.INFO,
+    fmt: str = "%(asctime)s [%(levelname)s] %(message)s",
+    filters: list[logging.Filter] | None = None,
+    **writer_options: Any,
+) -> AsyncLogHandler:
+    """Send stdlib `logging` to `filename` through an `AsyncLogHandler`.
+
+    Drop-in replacement for `logging.basicConfig(filename=...)` that keeps file
+    I/O off the calling thread. It configures the root logger, so call it from the
+    application's entry point rather than at import time. Calling it again for the
+    same file returns the handler already installed instead of adding another one.
+    """
+    path = os.path.abspath(filename)
+    root = logging.getLogger()
+    with _file_handlers_lock:
+        handler = _file_handlers.get(path)
+        if handler is not None and handler in root.handlers:
+            return handler
+
+        handler = AsyncLogHandler(open(path, "ab"), **writer_options)  # noqa: SIM115
+        handler.setFormatter(logging.Formatter(fmt))
+        for log_filter in filters or []:
+            handler.addFilter(log_filter)
+
+        root.addHandler(handler)
+        root.setLevel(level)
+        _file_handlers[path] = handler
+    return handler
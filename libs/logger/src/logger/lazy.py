@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from structlog.typing import EventDict, WrappedLogger
+
+
+_UNSET = object()
+
+
+class Lazy:
+    """Context value computed only when an event using it is rendered.
+
+    The result is cached, so a request that logs several events pays once; a request
+    that logs nothing pays nothing.
+    """
+
+    __slots__ = ("_func", "_value")
+
+    def __init__(self, func: Callable[[], Any]) -> None:
+        self._func = func
+        self._value: Any = _UNSET
+
+    def get(self) -> Any:
+        if self._value is _UNSET:
+            self._value = self._func()
+        return self._value
+
+
+class LazyFields(Lazy):
+    """`Lazy` returning a dict; its key is replaced by the dict's fields."""
+
+    __slots__ = ()
+
+
+def resolve_lazy_fields(
+    logger: WrappedLogger, method_name: str, event_dict: EventDict
+) -> EventDict:
+    """structlog processor evaluating `Lazy` / `LazyFields` values in the event."""
+    lazy_keys = [key for key, value in event_dict.items() if isinstance(value, Lazy)]
+    for key in lazy_keys:
+        value = event_dict[key]
+        if isinstance(value, LazyFields):
+            del event_dict[key]
+            for field, field_value in value.get().items():
+                event_dict.setdefault(field, field_value)
+        else:
+            event_dict[key] = value.get()
+    return event_dict
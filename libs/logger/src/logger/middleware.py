@@ -6,6 +6,8 @@ from typing import TYPE_CHECKING
 
 import structlog
 
+from logger.src.logger.lazy import LazyFields
+
 
 if TYPE_CHECKING:
     from fastapi import Request, Response
@@ -41,3 +43,46 @@ async def logging_middleware(
     )
 
     return response
+
+
+async def lazy_logging_middleware(
+    request: Request,
+    call_next: RequestResponseEndpoint,
+) -> Response:
+    """Production variant of `logging_middleware`.
+
+    Binds `request_id` and one `LazyFields` value instead of eleven context
+    variables: the request fields are only built if the request actually logs
+    something (see `resolve_lazy_fields`). Cookies are not logged.
+    """
+    structlog.contextvars.clear_contextvars()
+
+    structlog.contextvars.bind_contextvars(
+        request_id=str(uuid.uuid4()),
+        request=LazyFields(lambda: _request_fields(request)),
+    )
+
+    start_time = time.perf_counter()
+    response: Response = await call_next(request)
+    process_time = time.perf_counter() - start_time
+    structlog.contextvars.bind_contextvars(
+        status_code=response.status_code,
+        process_time=process_time,
+    )
+
+    return response
+
+
+def _request_fields(request: Request) -> dict[str, object]:
+    client = request.client
+    return {
+        "url": str(request.url),
+        "path": request.url.path,
+        "scheme": request.url.scheme,
+        "query_params": str(request.query_params),
+        "path_params": str(request.path_params),
+        "http_method": request.method,
+        "http_version": request.scope["http_version"],
+        "client_host": client.host if client is not None else "",
+        "client_port": client.port if client is not None else "",
+    }
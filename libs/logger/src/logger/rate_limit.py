@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import time
+import logging
+import threading
+from typing import TYPE_CHECKING, Any
+
+import structlog
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from structlog.typing import EventDict, WrappedLogger
+
+
+class _Window:
+    """Count events per key in fixed windows of `interval` seconds."""
+
+    def __init__(self, max_events: int, interval: float) -> None:
+        self.max_events = max_events
+        self.interval = interval
+        # key -> (window start, events in window, events suppressed in window)
+        self._counts: dict[Any, tuple[float, int, int]] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, key: Any) -> tuple[bool, int]:
+        """Whether the event may pass, and how many were suppressed before it."""
+        now = time.monotonic()
+        with self._lock:
+            start, count, suppressed = self._counts.get(key, (now, 0, 0))
+            if now - start >= self.interval:
+                # New window: report what the previous window suppressed
+                self._counts[key] = (now, 1, 0)
+                return True, suppressed
+            if count < self.max_events:
+                self._counts[key] = (start, count + 1, 0)
+                return True, suppressed
+            self._counts[key] = (start, count, suppressed + 1)
+            return False, 0
+
+
+class RateLimitProcessor:
+    """structlog processor letting at most `max_events` per event name through
+    every `interval` seconds; the next event passed carries `suppressed=<n>`.
+
+    Only `levels` are limited (INFO and below by default), so warnings and errors
+    are never dropped.
+    """
+
+    def __init__(
+        self,
+        max_events: int = 10,
+        interval: float = 60.0,
+        *,
+        events: set[str] | None = None,
+        levels: frozenset[str] = frozenset({"debug", "info"}),
+    ) -> None:
+        self.events = events
+        self.levels = levels
+        self._window = _Window(max_events, interval)
+
+    def __call__(
+        self, logger: WrappedLogger, method_name: str, event_dict: EventDict
+    ) -> EventDict:
+        if method_name not in self.levels:
+            return event_dict
+        event = event_dict.get("event")
+        if self.events is not None and event not in self.events:
+            return event_dict
+
+        allowed, suppressed = self._window.allow(event)
+        if not allowed:
+            raise structlog.DropEvent
+        if suppressed:
+            event_dict["suppressed"] = suppressed
+        return event_dict
+
+
+class RateLimitFilter(logging.Filter):
+    """stdlib logging filter with the same policy as `RateLimitProcessor`.
+
+    Records are grouped by call site (`pathname:lineno`) by default, so messages
+    built with f-strings at the same line share one budget.
+
+    The suppressed count is added to a copy of the record (returned from `filter`),
+    so other handlers of the same record see the original message.
+    """
+
+    def __init__(
+        self,
+        max_events: int = 10,
+        interval: float = 60.0,
+        *,
+        level: int = logging.INFO,
+        key: Callable[[logging.LogRecord], Any] | None = None,
+    ) -> None:
+        super().__init__()
+        self.level = level
+        self.key = key or (lambda record: (record.pathname, record.lineno))
+        self._window = _Window(max_events, interval)
+
+    def filter(self, record: logging.LogRecord) -> bool | logging.LogRecord:
+        if record.levelno > self.level:
+            return True
+
+        allowed, suppressed = self._window.allow(self.key(record))
+        if allowed and suppressed:
+            record = logging.makeLogRecord(record.__dict__)
+            record.msg = f"{record.msg} (+{suppressed} similar records suppressed)"
+            return record
+        return allowed
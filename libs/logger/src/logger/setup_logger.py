@@ -1,24 +1,85 @@
 from __future__ import annotations
 
+import sys
 import logging
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 import orjson
 import structlog
 
+from logger.src.logger.async_sink import (
+    AsyncLoggerFactory,
+    BackgroundWriter,
+    defer_rendering,
+)
+from logger.src.logger.lazy import resolve_lazy_fields
+
 
 if TYPE_CHECKING:
-    from structlog.typing import Processor
+    from structlog.typing import Processor, EventDict
+
+    from logger.src.logger.async_sink import OverflowPolicy
 
 
-def setup_logger(*, json_logs: bool) -> None:
-    processors: list[Processor] = [
-        structlog.contextvars.merge_contextvars,
-        structlog.processors.add_log_level,
-        structlog.processors.TimeStamper(fmt="iso", utc=True),
-        structlog.processors.UnicodeDecoder(),
-        structlog.processors.StackInfoRenderer(),
-    ]
+def setup_logger(
+    *,
+    json_logs: bool,
+    async_logs: bool = False,
+    overflow: OverflowPolicy = "drop_newest",
+    rate_limit: Processor | None = None,
+    production: bool = False,
+) -> None:
+    """Configure structlog.
+
+    With `async_logs`, rendering and writing happen on a background thread (see
+    `BackgroundWriter`); `overflow` is what happens when its queue is full.
+    `rate_limit` (e.g. `RateLimitProcessor`) drops hot-path events early.
+
+    `production` selects the lean profile: loggers are cached on first use (call
+    `setup_logger` before the first log call, not before `get_logger`), timestamps
+    are epoch seconds and the byte decoding / stack info processors are skipped.
+    """
+    # Rate limiting first: dropped events cost as little as possible
+    processors: list[Processor] = [rate_limit] if rate_limit is not None else []
+    processors.extend(
+        [
+            structlog.contextvars.merge_contextvars,
+            resolve_lazy_fields,
+            structlog.processors.add_log_level,
+        ]
+    )
+    if production:
+        processors.append(structlog.processors.TimeStamper(fmt=None, utc=True))
+    else:
+        processors.extend(
+            [
+                structlog.processors.TimeStamper(fmt="iso", utc=True),
+                structlog.processors.UnicodeDecoder(),
+                structlog.processors.StackInfoRenderer(),
+            ]
+        )
+
+    if async_logs:
+        # Exceptions must be formatted while the traceback is still available
+        processors.extend([structlog.processors.format_exc_info, defer_rendering])
+        writer = BackgroundWriter(
+            sys.stdout.buffer,
+            _json_render if json_logs else _console_render(),
+            overflow=overflow,
+            dropped_entry=lambda count: {
+                "event": "log.dropped",
+                "level": "warning",
+                "count": count,
+            },
+        )
+        structlog.configure(
+            processors=processors,
+            logger_factory=AsyncLoggerFactory(writer),
+            wrapper_class=structlog.make_filtering_bound_logger(logging.INFO),
+            context_class=dict,
+            cache_logger_on_first_use=production,
+        )
+        return
 
     processors.extend(
         [
@@ -40,5 +101,18 @@ def setup_logger(*, json_logs: bool) -> None:
         logger_factory=logger_factory,
         wrapper_class=structlog.make_filtering_bound_logger(logging.INFO),
         context_class=dict,
-        cache_logger_on_first_use=False,
+        cache_logger_on_first_use=production,
     )
+
+
+def _json_render(event_dict: EventDict) -> bytes:
+    return orjson.dumps(event_dict, default=str) + b"\n"
+
+
+def _console_render() -> Any:
+    renderer = structlog.dev.ConsoleRenderer()
+
+    def _render(event_dict: EventDict) -> bytes:
+        return (renderer(None, "", event_dict) + "\n").encode("utf-8")
+
+    return _render
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-from ocr2text.entities import Line, Page, Word, Document
+from ocr2text.entities import Line, Page, Word, Document, PreprocessConfig
 from ocr2text.ocr2text import OCRProcessor
 
 
-__all__ = ["Document", "Line", "OCRProcessor", "Page", "Word"]
+__all__ = ["Document", "Line", "OCRProcessor", "Page", "PreprocessConfig", "Word"]
@@ -0,0 +1,329 @@
+from __future__ import annotations
+
+import os
+import sys
+import glob
+import json
+import time
+import hashlib
+import argparse
+import resource
+from typing import NamedTuple, TYPE_CHECKING
+from pathlib import Path
+from concurrent.futures import as_completed, ProcessPoolExecutor
+
+from ocr2text.entities import PreprocessConfig
+from ocr2text.ocr2text import OCRProcessor
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".gif", ".webp"}
+MANIFEST_FILE_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+# Save the manifest after this many completions or seconds, whichever comes first
+MANIFEST_SAVE_EVERY = 50
+MANIFEST_SAVE_INTERVAL = 10.0
+
+_processor: OCRProcessor | None = None
+
+
+class BatchTask(NamedTuple):
+    file_path: str
+    file_hash: str
+
+
+class BatchResult(NamedTuple):
+    file_path: str
+    file_hash: str
+    output_path: str
+    page_count: int
+    elapsed: float
+    peak_rss_kb: int
+    timings: dict[str, float]
+
+
+def _init_worker(preprocess_config: PreprocessConfig | None) -> None:
+    """Create one OCRProcessor per worker process."""
+    global _processor  # noqa: PLW0603
+    _processor = OCRProcessor(preprocess_config)
+
+
+def output_name(task: BatchTask) -> str:
+    """JSON file name of a task: input stem plus content hash, unique per input."""
+    return f"{Path(task.file_path).stem}-{task.file_hash[:16]}.json"
+
+
+def _process_file(task: BatchTask, output_folder: str) -> BatchResult:
+    """Run OCR on a single file inside a worker process and save it as JSON."""
+    processor = _processor or OCRProcessor()
+
+    start = time.perf_counter()
+    document = processor.extract_text_and_coordinates(task.file_path)
+    output_path = processor.save_to_json(document, output_folder, output_name(task))
+    elapsed = time.perf_counter() - start
+
+    return BatchResult(
+        file_path=task.file_path,
+        file_hash=task.file_hash,
+        output_path=str(output_path),
+        page_count=len(document.pages),
+        elapsed=elapsed,
+        peak_rss_kb=_peak_rss_kb(resource.RUSAGE_SELF),
+        timings=processor.last_timings,
+    )
+
+
+def _peak_rss_kb(who: int) -> int:
+    """Return the peak resident set size in KiB (`ru_maxrss` is bytes on macOS)."""
+    peak = resource.getrusage(who).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def collect_input_files(inputs: Iterable[str], *, recursive: bool = False) -> list[Path]:
+    """Expand directories and glob patterns into a sorted list of image files."""
+    files: set[Path] = set()
+
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            pattern = "**/*" if recursive else "*"
+            candidates = path.glob(pattern)
+        elif path.is_file():
+            candidates = iter([path])
+        else:
+            candidates = (Path(p) for p in glob.iglob(item, recursive=recursive))
+
+        files.update(
+            candidate.resolve()
+            for candidate in candidates
+            if candidate.is_file() and candidate.suffix.lower() in IMAGE_EXTENSIONS
+        )
+
+    return sorted(files)
+
+
+def load_manifest(manifest_path: Path) -> dict[str, dict[str, object]]:
+    """Load the file_hash -> output entries of a previous run."""
+    if not manifest_path.exists():
+        return {}
+
+    with manifest_path.open(encoding="utf-8") as manifest_file:
+        data = json.load(manifest_file)
+
+    return data.get("entries", {})
+
+
+def save_manifest(manifest_path: Path, entries: dict[str, dict[str, object]]) -> None:
+    """Write the manifest atomically so an interrupted run never corrupts it."""
+    tmp_path = manifest_path.with_suffix(".json.tmp")
+    with tmp_path.open("w", encoding="utf-8") as manifest_file:
+        json.dump(
+            {"version": MANIFEST_VERSION, "entries": entries},
+            manifest_file,
+            ensure_ascii=False,
+            indent=4,
+        )
+    tmp_path.replace(manifest_path)
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Linear-interpolated percentile of `values`, `q` in [0, 100]."""
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="ocr2text",
+        description="Run OCR over a directory or glob of images and save JSON results.",
+    )
+    parser.add_argument(
+        "inputs", nargs="+", help="Image files, directories or glob patterns."
+    )
+    parser.add_argument(
+        "-o", "--output", required=True, help="Folder for JSON results and manifest."
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes (default: CPU count).",
+    )
+    parser.add_argument(
+        "-r", "--recursive", action="store_true", help="Recurse into directories."
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Ignore the manifest and process every input again.",
+    )
+
+    preprocess = parser.add_argument_group("preprocessing")
+    preprocess.add_argument(
+        "--target-dpi", type=int, help="Downscale images above this resolution."
+    )
+    preprocess.add_argument(
+        "--max-side", type=int, help="Downscale images larger than this many pixels."
+    )
+    preprocess.add_argument(
+        "--binarize", choices=["otsu", "adaptive"], help="Binarization method."
+    )
+    preprocess.add_argument(
+        "--deskew", action="store_true", help="Detect and correct page rotation."
+    )
+    preprocess.add_argument(
+        "--crop-borders", action="store_true", help="Crop away empty borders."
+    )
+    return parser
+
+
+def run_batch(
+    files: Sequence[Path],
+    output_folder: str,
+    *,
+    workers: int,
+    force: bool = False,
+    preprocess_config: PreprocessConfig | None = None,
+) -> list[BatchResult]:
+    """Process `files` across a worker pool, skipping inputs already in the manifest."""
+    output_dir = Path(output_folder)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST_FILE_NAME
+    entries = {} if force else load_manifest(manifest_path)
+
+    tasks: list[BatchTask] = []
+    queued_hashes: set[str] = set()
+    skipped = 0
+    for file in files:
+        file_hash = hashlib.sha256(file.read_bytes()).hexdigest()
+        entry = entries.get(file_hash)
+        already_done = entry is not None and Path(str(entry["output"])).exists()
+        if already_done or file_hash in queued_hashes:
+            skipped += 1
+            continue
+        queued_hashes.add(file_hash)
+        tasks.append(BatchTask(file_path=str(file), file_hash=file_hash))
+
+    print(f"{len(files)} input(s), {skipped} already processed, {len(tasks)} to run")
+
+    results: list[BatchResult] = []
+    if not tasks:
+        return results
+
+    pending = 0
+    last_save = time.monotonic()
+    try:
+        with ProcessPoolExecutor(
+            max_workers=max(1, min(workers, len(tasks))),
+            initializer=_init_worker,
+            initargs=(preprocess_config,),
+        ) as executor:
+            futures = {
+                executor.submit(_process_file, task, output_folder): task
+                for task in tasks
+            }
+            for future in as_completed(futures):
+                task = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:  # noqa: BLE001
+                    print(f"FAILED {task.file_path}: {e}", file=sys.stderr)
+                    continue
+
+                results.append(result)
+                entries[result.file_hash] = {
+                    "input": result.file_path,
+                    "output": result.output_path,
+                    "page_count": result.page_count,
+                }
+                pending += 1
+                if (
+                    pending >= MANIFEST_SAVE_EVERY
+                    or time.monotonic() - last_save >= MANIFEST_SAVE_INTERVAL
+                ):
+                    save_manifest(manifest_path, entries)
+                    pending = 0
+                    last_save = time.monotonic()
+    finally:
+        # Also on interrupt: everything finished so far is skipped on resume
+        if pending:
+            save_manifest(manifest_path, entries)
+
+    return results
+
+
+def print_report(results: Sequence[BatchResult], wall_time: float) -> None:
+    """Print throughput, per-page latency percentiles and peak memory usage."""
+    pages = sum(result.page_count for result in results)
+    page_latencies = [
+        result.elapsed / result.page_count
+        for result in results
+        if result.page_count > 0
+    ]
+    worker_peak_kb = max((result.peak_rss_kb for result in results), default=0)
+
+    print(f"processed: {len(results)} file(s), {pages} page(s) in {wall_time:.2f}s")
+    print(f"throughput: {pages / wall_time if wall_time > 0 else 0.0:.2f} pages/sec")
+    print(
+        f"page latency: p50={percentile(page_latencies, 50) * 1000:.1f}ms "
+        f"p95={percentile(page_latencies, 95) * 1000:.1f}ms"
+    )
+    print(
+        f"peak RSS: main={_peak_rss_kb(resource.RUSAGE_SELF) / 1024:.1f}MiB "
+        f"worker={worker_peak_kb / 1024:.1f}MiB"
+    )
+
+    stage_totals: dict[str, float] = {}
+    for result in results:
+        for stage, seconds in result.timings.items():
+            stage_totals[stage] = stage_totals.get(stage, 0.0) + seconds
+    if stage_totals and pages:
+        breakdown = " ".join(
+            f"{stage}={seconds / pages * 1000:.1f}ms"
+            for stage, seconds in stage_totals.items()
+        )
+        print(f"stage time per page: {breakdown}")
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Entry point of the `ocr2text` batch command."""
+    args = _build_parser().parse_args(argv)
+
+    files = collect_input_files(args.inputs, recursive=args.recursive)
+    if not files:
+        print("No image files matched the given inputs.", file=sys.stderr)
+        return 1
+
+    preprocess_config = PreprocessConfig(
+        target_dpi=args.target_dpi,
+        max_side=args.max_side,
+        binarize=args.binarize,
+        deskew=args.deskew,
+        crop_borders=args.crop_borders,
+    )
+
+    start = time.perf_counter()
+    results = run_batch(
+        files,
+        args.output,
+        workers=args.workers,
+        force=args.force,
+        preprocess_config=preprocess_config,
+    )
+    print_report(results, time.perf_counter() - start)
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import NamedTuple
+from typing import Literal, NamedTuple
 
 from pydantic import BaseModel
 
@@ -46,6 +46,10 @@ class TesseractResults(BaseModel):
     top: list[float]
     width: list[float]
     height: list[float]
+    # Tesseract layout numbers, used to group words into lines when available
+    block_num: list[int] = []
+    par_num: list[int] = []
+    line_num: list[int] = []
 
 
 class Position(BaseModel):
@@ -63,3 +67,44 @@ class BoundingBox(BaseModel):
 class ProcessResults(BaseModel):
     bounding_boxes: list[BoundingBox]
     texts: list[str]
+    # (block_num, par_num, line_num) of every text, empty if Tesseract gave none
+    line_keys: list[tuple[int, int, int]] = []
+
+
+class PreprocessConfig(BaseModel):
+    """Image preprocessing applied before the image is sent to Tesseract.
+
+    Every stage is disabled by default, in which case the image is only
+    converted to grayscale.
+    """
+
+    # Downscale so the image is at most `target_dpi` (uses the DPI stored in the
+    # image, or `default_dpi` when there is none) and at most `max_side` pixels.
+    target_dpi: int | None = None
+    default_dpi: int = 300
+    max_side: int | None = None
+
+    binarize: Literal["otsu", "adaptive"] | None = None
+    adaptive_block_size: int = 31
+    adaptive_offset: float = 10.0
+
+    deskew: bool = False
+    max_skew_angle: float = 5.0
+    skew_angle_step: float = 0.25
+
+    crop_borders: bool = False
+    crop_margin: int = 10
+
+
+class ImageTransform(NamedTuple):
+    """Maps coordinates of a preprocessed image back to the original image."""
+
+    scale_x: float = 1.0
+    scale_y: float = 1.0
+    # Rotation (degrees, counter-clockwise) applied around the scaled image center
+    angle: float = 0.0
+    center_x: float = 0.0
+    center_y: float = 0.0
+    # Top-left corner of the crop box in the rotated image
+    offset_x: float = 0.0
+    offset_y: float = 0.0
@@ -1,26 +1,37 @@
 from __future__ import annotations
 
-import json
+import time
 import hashlib
 from typing import TYPE_CHECKING
 from pathlib import Path
-from operator import attrgetter
 
+import numpy as np
 import pytesseract
 from PIL import Image, ImageDraw
 
-from ocr2text.utils import process_tesseract_results
+from ocr2text.utils import (
+    group_lines,
+    iter_json_pages,
+    preprocess_image,
+    write_json_stream,
+    read_json_document,
+    map_boxes_to_original,
+    process_tesseract_results,
+)
 from ocr2text.entities import (
     Line,
     Page,
     Word,
     Document,
     WordData,
+    PreprocessConfig,
     TesseractResults,
 )
 
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
     from ocr2text.entities import BoundingBox
 
 
@@ -29,30 +40,71 @@ class OCRProcessor:
 
     This class handles text extraction from images along with positional
     information (bounding boxes) and builds structured document representations.
+    Images are preprocessed according to `preprocess_config` before OCR, and the
+    per-stage timings of the last call are kept in `last_timings`.
     """
 
+    def __init__(self, preprocess_config: PreprocessConfig | None = None) -> None:
+        self.preprocess_config = preprocess_config or PreprocessConfig()
+        self.last_timings: dict[str, float] = {}
+
     def extract_text_and_coordinates(self, file_path: str) -> Document:
         """Extract text and coordinates from an image file."""
-        image = Image.open(file_path).convert("L")  # Convert to grayscale
-
-        results = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+        start = time.perf_counter()
+        image = Image.open(file_path)
+        image.load()
+        timings = {"load": time.perf_counter() - start}
+
+        preprocessed = preprocess_image(image, self.preprocess_config)
+        timings.update(preprocessed.timings)
+
+        # Tell Tesseract the real resolution when the image has been downscaled
+        config = ""
+        if preprocessed.dpi is not None:
+            config = f"--dpi {preprocessed.dpi}"
+
+        start = time.perf_counter()
+        results = pytesseract.image_to_data(
+            preprocessed.image, config=config, output_type=pytesseract.Output.DICT
+        )
+        timings["ocr"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        left, top, width, height = map_boxes_to_original(
+            preprocessed.transform,
+            results["left"],
+            results["top"],
+            results["width"],
+            results["height"],
+        )
 
         tesseract_results = TesseractResults(
             level=results["level"],
             text=results["text"],
-            left=results["left"],
-            top=results["top"],
-            width=results["width"],
-            height=results["height"],
+            left=left,
+            top=top,
+            width=width,
+            height=height,
+            block_num=results.get("block_num", []),
+            par_num=results.get("par_num", []),
+            line_num=results.get("line_num", []),
         )
 
         output_process = process_tesseract_results(tesseract_results)
 
         file_hash = hashlib.sha256(Path(file_path).read_bytes()).hexdigest()
 
-        return self._build_document(
-            file_path, file_hash, output_process.bounding_boxes, output_process.texts
+        document = self._build_document(
+            file_path,
+            file_hash,
+            output_process.bounding_boxes,
+            output_process.texts,
+            line_keys=output_process.line_keys or None,
         )
+        timings["build"] = time.perf_counter() - start
+
+        self.last_timings = timings
+        return document
 
     def _build_document(
         self,
@@ -61,6 +113,7 @@ class OCRProcessor:
         bounding_boxes: list[BoundingBox],
         text_elements: list[str],
         page_count: int = 1,
+        line_keys: list[tuple[int, int, int]] | None = None,
     ) -> Document:
         """Create a Document object from extracted text and bounding boxes."""
         # Create words with their bounding boxes
@@ -75,12 +128,11 @@ class OCRProcessor:
             for bbox, text in zip(bounding_boxes, text_elements, strict=False)
         ]
 
-        # Sort words by y-coordinate for line grouping
-        words_data.sort(key=attrgetter("y1"))
-
         # Build pages
         pages = [
-            self._build_page(self.generate_id(f"page_{file_path}_{page_idx}"), words_data)
+            self._build_page(
+                self.generate_id(f"page_{file_path}_{page_idx}"), words_data, line_keys
+            )
             for page_idx in range(page_count)
         ]
 
@@ -91,38 +143,29 @@ class OCRProcessor:
             pages=pages,
         )
 
-    def _build_page(self, page_id: str, words_data: list[WordData]) -> Page:
-        """Build a Page object. Groups words into lines based on vertical."""
-        # Maximum vertical distance for words to be in the same line
-        line_alignment_threshold = 30
-
+    def _build_page(
+        self,
+        page_id: str,
+        words_data: list[WordData],
+        line_keys: list[tuple[int, int, int]] | None = None,
+    ) -> Page:
+        """Build a Page object. Groups words into lines (see `group_lines`)."""
         if not words_data:
             return Page(id=page_id, lines=[], line_count=0)
 
-        lines = []
-        line_id = 0
-        current_line_words: list[Word] = []
-
-        # Group words into lines based on y-coordinate proximity
-        current_y = words_data[0].y1
-        for word_data in words_data:
-            word = self._build_word(page_id, word_data)
-            if (
-                not current_line_words
-                or abs(word_data.y1 - current_y) < line_alignment_threshold
-            ):
-                current_line_words.append(word)
-            else:
-                current_line_words.sort(key=lambda word: word.bbox[0])
-                lines.append(self._build_line(page_id, line_id, current_line_words))
-                line_id += 1
-                current_line_words = [word]
-                current_y = word_data.y1
-
-        # Add the last line if there are remaining words
-        if current_line_words:
-            current_line_words.sort(key=lambda word: word.bbox[0])
-            lines.append(self._build_line(page_id, line_id, current_line_words))
+        boxes = np.array(
+            [(w.x1, w.y1, w.x2, w.y2) for w in words_data], dtype=np.float64
+        )
+        keys = np.array(line_keys, dtype=np.int64) if line_keys else None
+
+        lines = [
+            self._build_line(
+                page_id,
+                line_id,
+                [self._build_word(page_id, words_data[i]) for i in indices],
+            )
+            for line_id, indices in enumerate(group_lines(boxes, keys))
+        ]
 
         return Page(id=page_id, lines=lines, line_count=len(lines))
 
@@ -158,19 +201,23 @@ class OCRProcessor:
         return hashlib.sha256(input_str.encode()).hexdigest()
 
     @staticmethod
-    def save_to_json(document: Document, output_folder: str) -> Path:
-        """Save the document structure to a JSON file."""
+    def save_to_json(
+        document: Document, output_folder: str, output_name: str | None = None
+    ) -> Path:
+        """Save the document structure to a JSON file, one page at a time.
+
+        The file is named after the input stem unless `output_name` is given.
+        """
         # Extract file extension and create output filename
         file_name = Path(document.pdf_path).name
         file_stem = Path(file_name).stem
-        output_path = Path(output_folder) / f"{file_stem}.json"
+        output_path = Path(output_folder) / (output_name or f"{file_stem}.json")
 
         # Ensure output directory exists
         output_path.parent.mkdir(parents=True, exist_ok=True)
 
         # Write JSON data
-        with output_path.open("w", encoding="utf-8") as json_file:
-            json.dump(document.model_dump(), json_file, ensure_ascii=False, indent=4)
+        write_json_stream(document, output_path)
 
         return output_path
 
@@ -205,10 +252,18 @@ class OCRProcessor:
         return output_path
 
     @staticmethod
-    def parse_json_file_to_document(file_path: str) -> Document:
-        """Parse a previously saved JSON file back to a Document object."""
-        path = Path(file_path)
-        with path.open(encoding="utf-8") as json_file:
-            data = json.load(json_file)
+    def parse_json_file_to_document(
+        file_path: str, page_indices: Iterable[int] | None = None
+    ) -> Document:
+        """Parse a previously saved JSON file back to a Document object.
 
-        return Document.model_validate(data)
+        Pass `page_indices` to load only the selected pages.
+        """
+        return read_json_document(Path(file_path), page_indices)
+
+    @staticmethod
+    def iter_json_pages(
+        file_path: str, page_indices: Iterable[int] | None = None
+    ) -> Iterator[Page]:
+        """Lazily iterate the pages of a previously saved JSON file."""
+        return iter_json_pages(Path(file_path), page_indices)
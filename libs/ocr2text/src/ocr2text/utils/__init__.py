@@ -1,10 +1,28 @@
 from __future__ import annotations
 
+from ocr2text.utils.group_lines import group_lines
+from ocr2text.utils.json_stream import (
+    iter_json_pages,
+    read_json_header,
+    write_json_stream,
+    read_json_document,
+)
+from ocr2text.utils.preprocess_image import (
+    preprocess_image,
+    map_boxes_to_original,
+)
 from ocr2text.utils.process_tesseract_results import (
     process_tesseract_results,
 )
 
 
 __all__ = [
+    "group_lines",
+    "iter_json_pages",
+    "map_boxes_to_original",
+    "preprocess_image",
     "process_tesseract_results",
+    "read_json_document",
+    "read_json_header",
+    "write_json_stream",
 ]
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import numpy as np
+
+
+# Words whose vertical centers differ by more than this fraction of the median
+# word height start a new line
+LINE_GAP_RATIO = 0.5
+# Horizontal gaps wider than this multiple of the median word height split a line
+# into separate segments (e.g. columns)
+COLUMN_GAP_RATIO = 3.0
+
+
+def group_lines(
+    boxes: np.ndarray,
+    line_keys: np.ndarray | None = None,
+) -> list[np.ndarray]:
+    """Group word boxes into lines.
+
+    `boxes` has shape (n, 4) with `[x1, y1, x2, y2]` rows. When `line_keys` (shape
+    (n, 3) with Tesseract `block_num`, `par_num`, `line_num`) is given, words are
+    grouped by it and lines follow Tesseract's reading order. Otherwise a sorted
+    sweep with a threshold derived from the median word height is used.
+
+    Returns one array of word indices per line, each sorted left to right.
+    """
+    if len(boxes) == 0:
+        return []
+
+    if line_keys is not None and len(line_keys) == len(boxes):
+        return _group_by_keys(boxes, line_keys)
+
+    return _group_by_sweep(boxes)
+
+
+def _group_by_keys(boxes: np.ndarray, line_keys: np.ndarray) -> list[np.ndarray]:
+    order = np.lexsort((boxes[:, 0], line_keys[:, 2], line_keys[:, 1], line_keys[:, 0]))
+    sorted_keys = line_keys[order]
+
+    changed = np.any(sorted_keys[1:] != sorted_keys[:-1], axis=1)
+    return np.split(order, np.flatnonzero(changed) + 1)
+
+
+def _group_by_sweep(boxes: np.ndarray) -> list[np.ndarray]:
+    heights = boxes[:, 3] - boxes[:, 1]
+    median_height = float(np.median(heights)) if len(heights) else 0.0
+    median_height = max(median_height, 1.0)
+
+    # Assign line labels: split the y-sorted centers wherever the gap is too large
+    centers = (boxes[:, 1] + boxes[:, 3]) / 2
+    by_center = np.argsort(centers, kind="stable")
+    new_line = np.diff(centers[by_center]) > LINE_GAP_RATIO * median_height
+    labels = np.empty(len(boxes), dtype=np.int64)
+    labels[by_center] = np.concatenate(([0], np.cumsum(new_line)))
+
+    # Order words by line, then left to right, and split lines at wide gaps
+    order = np.lexsort((boxes[:, 0], labels))
+    sorted_labels = labels[order]
+    gaps = boxes[order[1:], 0] - boxes[order[:-1], 2]
+    breaks = (sorted_labels[1:] != sorted_labels[:-1]) | (
+        gaps > COLUMN_GAP_RATIO * median_height
+    )
+
+    return np.split(order, np.flatnonzero(breaks) + 1)
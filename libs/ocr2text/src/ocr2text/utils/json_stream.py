@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+import orjson
+
+from ocr2text.entities import Page, Document
+
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from collections.abc import Iterable, Iterator
+
+
+# Written files contain the document fields on the first line, then one page per
+# line, so they stay valid JSON but can be read back page by page:
+#
+#   {"id":"...","pdf_path":"...","file_hash":"...","pages":[
+#   {...page 0...},
+#   {...page 1...}
+#   ]}
+PAGES_START = b',"pages":['
+PAGES_END = b"]}"
+
+
+def write_json_stream(document: Document, output_path: Path) -> None:
+    """Write a document with orjson, serializing one page at a time."""
+    header = orjson.dumps(document.model_dump(exclude={"pages"}))
+
+    with output_path.open("wb") as json_file:
+        json_file.write(header[:-1] + PAGES_START)
+        for page_idx, page in enumerate(document.pages):
+            json_file.write(b"\n" if page_idx == 0 else b",\n")
+            json_file.write(orjson.dumps(page.model_dump()))
+        json_file.write(b"\n" + PAGES_END + b"\n")
+
+
+def read_json_header(file_path: Path) -> dict[str, Any]:
+    """Read the document fields (everything except the pages) of a JSON file."""
+    with file_path.open("rb") as json_file:
+        first_line = json_file.readline().rstrip()
+        if first_line.endswith(PAGES_START):
+            return orjson.loads(first_line[: -len(PAGES_START)] + b"}")
+
+        # Not written by `write_json_stream`: fall back to loading the whole file
+        data = orjson.loads(first_line + json_file.read())
+    data.pop("pages", None)
+    return data
+
+
+def iter_json_pages(
+    file_path: Path, page_indices: Iterable[int] | None = None
+) -> Iterator[Page]:
+    """Lazily yield the pages of a JSON file, optionally only the selected ones.
+
+    Files written by `write_json_stream` are read line by line and only the
+    selected pages are parsed; other files are loaded in one go.
+    """
+    selected = set(page_indices) if page_indices is not None else None
+
+    with file_path.open("rb") as json_file:
+        first_line = json_file.readline().rstrip()
+        if not first_line.endswith(PAGES_START):
+            data = orjson.loads(first_line + json_file.read())
+            for page_idx, page in enumerate(data["pages"]):
+                if selected is None or page_idx in selected:
+                    yield Page.model_validate(page)
+            return
+
+        remaining = len(selected) if selected is not None else -1
+        page_idx = 0
+        for raw_line in json_file:
+            line = raw_line.rstrip()
+            if not line or line == PAGES_END:
+                continue
+            if selected is None or page_idx in selected:
+                yield Page.model_validate(orjson.loads(line.removesuffix(b",")))
+                remaining -= 1
+                if remaining == 0:
+                    return
+            page_idx += 1
+
+
+def read_json_document(
+    file_path: Path, page_indices: Iterable[int] | None = None
+) -> Document:
+    """Build a Document from a JSON file, optionally keeping only selected pages."""
+    return Document(
+        **read_json_header(file_path),
+        pages=list(iter_json_pages(file_path, page_indices)),
+    )
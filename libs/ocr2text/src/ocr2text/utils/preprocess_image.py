@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import math
+import time
+from typing import TYPE_CHECKING, NamedTuple
+
+import numpy as np
+from PIL import Image
+
+from ocr2text.entities import ImageTransform
+
+
+if TYPE_CHECKING:
+    from ocr2text.entities import PreprocessConfig
+
+
+# Longest side (in pixels) of the sampled image used to estimate the skew angle
+SKEW_SAMPLE_SIDE = 1000
+# Maximum number of dark pixels projected per candidate angle
+SKEW_MAX_POINTS = 100_000
+
+
+class PreprocessResult(NamedTuple):
+    image: Image.Image
+    transform: ImageTransform
+    timings: dict[str, float]
+    # Resolution of the processed image when it was downscaled, None otherwise
+    dpi: int | None = None
+
+
+def preprocess_image(image: Image.Image, config: PreprocessConfig) -> PreprocessResult:
+    """Run the configured preprocessing stages on an image before OCR.
+
+    Stages run in order: grayscale, downscale, binarize, deskew, crop. The returned
+    transform maps coordinates of the processed image back to the input image.
+    """
+    timings: dict[str, float] = {}
+
+    start = time.perf_counter()
+    dpi = image.info.get("dpi")
+    gray = image.convert("L")
+    timings["grayscale"] = time.perf_counter() - start
+
+    scale_x = scale_y = 1.0
+    resized_dpi = None
+    if config.target_dpi is not None or config.max_side is not None:
+        start = time.perf_counter()
+        source_dpi = float(dpi[0]) if dpi else float(config.default_dpi)
+        gray, scale_x, scale_y = _downscale(
+            gray, source_dpi, config.target_dpi, config.max_side
+        )
+        if scale_x != 1.0:
+            resized_dpi = max(1, round(source_dpi * scale_x))
+        timings["downscale"] = time.perf_counter() - start
+
+    pixels = np.asarray(gray, dtype=np.uint8)
+
+    if config.binarize is not None:
+        start = time.perf_counter()
+        if config.binarize == "otsu":
+            pixels = np.where(pixels > otsu_threshold(pixels), 255, 0).astype(np.uint8)
+        else:
+            pixels = adaptive_binarize(
+                pixels, config.adaptive_block_size, config.adaptive_offset
+            )
+        timings["binarize"] = time.perf_counter() - start
+
+    angle = 0.0
+    center_x, center_y = pixels.shape[1] / 2, pixels.shape[0] / 2
+    if config.deskew:
+        start = time.perf_counter()
+        angle = estimate_skew_angle(
+            _dark_mask(pixels, binarized=config.binarize is not None),
+            config.max_skew_angle,
+            config.skew_angle_step,
+        )
+        if angle:
+            rotated = Image.fromarray(pixels).rotate(
+                angle, resample=Image.Resampling.BILINEAR, fillcolor=255
+            )
+            pixels = np.asarray(rotated, dtype=np.uint8)
+        timings["deskew"] = time.perf_counter() - start
+
+    offset_x = offset_y = 0
+    if config.crop_borders:
+        start = time.perf_counter()
+        mask = _dark_mask(pixels, binarized=config.binarize is not None)
+        offset_x, offset_y, right, bottom = content_box(mask, config.crop_margin)
+        pixels = pixels[offset_y:bottom, offset_x:right]
+        timings["crop"] = time.perf_counter() - start
+
+    transform = ImageTransform(
+        scale_x=scale_x,
+        scale_y=scale_y,
+        angle=angle,
+        center_x=center_x,
+        center_y=center_y,
+        offset_x=offset_x,
+        offset_y=offset_y,
+    )
+    return PreprocessResult(
+        image=Image.fromarray(pixels),
+        transform=transform,
+        timings=timings,
+        dpi=resized_dpi,
+    )
+
+
+def map_boxes_to_original(
+    transform: ImageTransform,
+    left: list[float],
+    top: list[float],
+    width: list[float],
+    height: list[float],
+) -> tuple[list[float], list[float], list[float], list[float]]:
+    """Map left/top/width/height boxes of a processed image back to the original.
+
+    Rotated boxes are replaced by the axis-aligned box enclosing their corners.
+    """
+    x1 = np.asarray(left, dtype=np.float64) + transform.offset_x
+    y1 = np.asarray(top, dtype=np.float64) + transform.offset_y
+    x2 = x1 + np.asarray(width, dtype=np.float64)
+    y2 = y1 + np.asarray(height, dtype=np.float64)
+
+    if transform.angle:
+        # Corners have shape (4, n): undo the counter-clockwise rotation of the image
+        xs = np.stack([x1, x2, x2, x1]) - transform.center_x
+        ys = np.stack([y1, y1, y2, y2]) - transform.center_y
+        theta = math.radians(transform.angle)
+        cos, sin = math.cos(theta), math.sin(theta)
+        xs, ys = (
+            xs * cos - ys * sin + transform.center_x,
+            xs * sin + ys * cos + transform.center_y,
+        )
+        x1, x2 = xs.min(axis=0), xs.max(axis=0)
+        y1, y2 = ys.min(axis=0), ys.max(axis=0)
+
+    x1 /= transform.scale_x
+    x2 /= transform.scale_x
+    y1 /= transform.scale_y
+    y2 /= transform.scale_y
+
+    return (
+        np.round(x1, 2).tolist(),
+        np.round(y1, 2).tolist(),
+        np.round(x2 - x1, 2).tolist(),
+        np.round(y2 - y1, 2).tolist(),
+    )
+
+
+def otsu_threshold(pixels: np.ndarray) -> int:
+    """Compute the Otsu threshold of a grayscale image."""
+    histogram = np.bincount(pixels.ravel(), minlength=256).astype(np.float64)
+    levels = np.arange(256, dtype=np.float64)
+
+    weight_bg = np.cumsum(histogram)
+    weight_fg = weight_bg[-1] - weight_bg
+    cumulative_mean = np.cumsum(histogram * levels)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_bg = cumulative_mean / weight_bg
+        mean_fg = (cumulative_mean[-1] - cumulative_mean) / weight_fg
+        between_variance = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+
+    return int(np.nanargmax(between_variance))
+
+
+def adaptive_binarize(pixels: np.ndarray, block_size: int, offset: float) -> np.ndarray:
+    """Binarize against the local mean of a `block_size` window (integral image)."""
+    half = max(1, block_size // 2)
+    padded = np.pad(pixels.astype(np.float64), half + 1, mode="edge")
+    integral = padded.cumsum(axis=0).cumsum(axis=1)
+
+    height, width = pixels.shape
+    size = 2 * half + 1
+    window_sum = (
+        integral[size : size + height, size : size + width]
+        - integral[:height, size : size + width]
+        - integral[size : size + height, :width]
+        + integral[:height, :width]
+    )
+    local_mean = window_sum / (size * size)
+
+    return np.where(pixels > local_mean - offset, 255, 0).astype(np.uint8)
+
+
+def estimate_skew_angle(mask: np.ndarray, max_angle: float, step: float) -> float:
+    """Find the rotation (degrees) that best aligns text rows horizontally.
+
+    Dark pixel coordinates are projected onto the vertical axis for every
+    candidate angle at once; the angle with the sharpest row profile wins.
+    """
+    sample_step = max(1, max(mask.shape) // SKEW_SAMPLE_SIDE)
+    ys, xs = np.nonzero(mask[::sample_step, ::sample_step])
+    if ys.size < 2 or step <= 0:  # noqa: PLR2004
+        return 0.0
+    if ys.size > SKEW_MAX_POINTS:
+        stride = math.ceil(ys.size / SKEW_MAX_POINTS)
+        ys, xs = ys[::stride], xs[::stride]
+
+    xs = xs.astype(np.float64) - mask.shape[1] / (2 * sample_step)
+    ys = ys.astype(np.float64) - mask.shape[0] / (2 * sample_step)
+
+    angles = np.arange(-max_angle, max_angle + step / 2, step)
+    theta = np.radians(angles)[:, np.newaxis]
+    rows = np.rint(ys * np.cos(theta) - xs * np.sin(theta)).astype(np.int64)
+    rows -= rows.min(axis=1, keepdims=True)
+
+    # Row histograms of all angles in one bincount, offset per angle
+    n_rows = int(rows.max()) + 1
+    flat = (rows + np.arange(len(angles))[:, np.newaxis] * n_rows).ravel()
+    histograms = np.bincount(flat, minlength=len(angles) * n_rows).reshape(
+        len(angles), n_rows
+    )
+    scores = (histograms.astype(np.float64) ** 2).sum(axis=1)
+
+    best = float(angles[int(np.argmax(scores))])
+    return 0.0 if abs(best) < step / 2 else best
+
+
+def content_box(mask: np.ndarray, margin: int) -> tuple[int, int, int, int]:
+    """Return the (left, top, right, bottom) box around dark content plus a margin."""
+    height, width = mask.shape
+    # Ignore rows/columns with only a few specks of noise
+    rows = np.flatnonzero(mask.sum(axis=1) > max(1, width // 500))
+    cols = np.flatnonzero(mask.sum(axis=0) > max(1, height // 500))
+    if rows.size == 0 or cols.size == 0:
+        return 0, 0, width, height
+
+    return (
+        max(0, int(cols[0]) - margin),
+        max(0, int(rows[0]) - margin),
+        min(width, int(cols[-1]) + 1 + margin),
+        min(height, int(rows[-1]) + 1 + margin),
+    )
+
+
+def _dark_mask(pixels: np.ndarray, *, binarized: bool) -> np.ndarray:
+    threshold = 127 if binarized else otsu_threshold(pixels)
+    return pixels <= threshold
+
+
+def _downscale(
+    image: Image.Image,
+    source_dpi: float,
+    target_dpi: int | None,
+    max_side: int | None,
+) -> tuple[Image.Image, float, float]:
+    scale = 1.0
+    if target_dpi is not None and source_dpi > target_dpi:
+        scale = target_dpi / source_dpi
+    if max_side is not None and max(image.size) * scale > max_side:
+        scale = max_side / max(image.size)
+
+    if scale >= 1.0:
+        return image, 1.0, 1.0
+
+    width = max(1, round(image.width * scale))
+    height = max(1, round(image.height * scale))
+    resized = image.resize(
+        (width, height), resample=Image.Resampling.LANCZOS, reducing_gap=2.0
+    )
+    return resized, width / image.width, height / image.height
@@ -15,6 +15,11 @@ def process_tesseract_results(
     """Process Tesseract OCR results to extract bounding boxes and text."""
     all_bbox = []
     all_text = []
+    all_line_keys = []
+    has_line_keys = (
+        len(results.block_num) == len(results.par_num) == len(results.line_num)
+        == len(results.level)
+    )
 
     for i in range(len(results.level)):
         text = results.text[i].strip()
@@ -35,5 +40,11 @@ def process_tesseract_results(
 
             all_bbox.append(bbox)
             all_text.append(text)
-
-    return ProcessResults(bounding_boxes=all_bbox, texts=all_text)
+            if has_line_keys:
+                all_line_keys.append(
+                    (results.block_num[i], results.par_num[i], results.line_num[i])
+                )
+
+    return ProcessResults(
+        bounding_boxes=all_bbox, texts=all_text, line_keys=all_line_keys
+    )
@@ -1,7 +1,16 @@
 from __future__ import annotations
 
-from openai_api_client.chat.model import ChatModel
-from openai_api_client.chat.settings import ChatModelSettings
+from .model import ChatModel
+from .results import ChatDelta, ChatUsage, ChatResult
+from .settings import ChatModelSettings
+from .async_model import AsyncChatModel
 
 
-__all__ = ["ChatModel", "ChatModelSettings"]
+__all__ = [
+    "AsyncChatModel",
+    "ChatDelta",
+    "ChatModel",
+    "ChatModelSettings",
+    "ChatResult",
+    "ChatUsage",
+]
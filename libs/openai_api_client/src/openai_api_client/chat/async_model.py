@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import time
+import asyncio
+from typing import TYPE_CHECKING
+
+from openai import NOT_GIVEN, AsyncOpenAI
+
+from ..rate_limit import estimate_chat_tokens
+from ..http_client import (
+    DEFAULT_MAX_RETRIES,
+    client_stats,
+    call_with_retry_async,
+    get_async_http_client,
+)
+from .results import ChatDelta, ChatUsage, ChatResult
+from .settings import settings_to_kwargs
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, AsyncIterator
+
+    from ..types import ChatCompletionMessageParam
+    from ..rate_limit import RateLimiter
+    from .settings import ChatModelSettings
+
+
+class AsyncChatModel:
+    def __init__(
+        self,
+        openai_api_url: str,
+        openai_api_key: str,
+        model_id: str,
+        max_concurrency: int = 8,
+        rate_limiter: RateLimiter | None = None,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        *,
+        include_usage: bool = True,
+    ) -> None:
+        self.model_id = model_id
+        self.openai_api_url = openai_api_url
+        self.openai_api_key = openai_api_key
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        # Default limit for `execute_many`
+        self.max_concurrency = max_concurrency
+        # Ask the server to append token usage to the stream (`stream_options`)
+        self.include_usage = include_usage
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """Client on the connection pool of the running event loop."""
+        # Retries are done by `call_with_retry_async` so they respect the rate limiter
+        return AsyncOpenAI(
+            base_url=self.openai_api_url,
+            api_key=self.openai_api_key,
+            http_client=get_async_http_client(),
+            max_retries=0,
+        )
+
+    async def execute_stream(
+        self,
+        messages: Iterable[ChatCompletionMessageParam],
+        settings: ChatModelSettings | None,
+    ) -> AsyncIterator[ChatDelta]:
+        """Stream the completion, yielding content deltas as they arrive."""
+        messages = list(messages)
+        tokens = estimate_chat_tokens(messages, (settings or {}).get("max_tokens", 0))
+        client = self.client
+
+        stream = await call_with_retry_async(
+            lambda: client.chat.completions.create(
+                messages=messages,
+                model=self.model_id,
+                stream=True,
+                stream_options=(
+                    {"include_usage": True} if self.include_usage else NOT_GIVEN
+                ),
+                # model settings
+                **settings_to_kwargs(settings),
+            ),
+            limiter=self.rate_limiter,
+            tokens=tokens,
+            max_retries=self.max_retries,
+        )
+
+        async for chunk in stream:
+            usage = (
+                ChatUsage(
+                    prompt_tokens=chunk.usage.prompt_tokens,
+                    completion_tokens=chunk.usage.completion_tokens,
+                    total_tokens=chunk.usage.total_tokens,
+                )
+                if chunk.usage is not None
+                else None
+            )
+            choice = chunk.choices[0] if chunk.choices else None
+            content = (choice.delta.content or "") if choice is not None else ""
+            finish_reason = choice.finish_reason if choice is not None else None
+
+            if usage is not None:
+                client_stats.record_tokens("chat", usage.total_tokens)
+                if self.rate_limiter is not None:
+                    self.rate_limiter.record_usage(tokens, usage.total_tokens)
+            if content or finish_reason or usage:
+                yield ChatDelta(content=content, finish_reason=finish_reason, usage=usage)
+
+    async def execute(
+        self,
+        messages: Iterable[ChatCompletionMessageParam],
+        settings: ChatModelSettings | None,
+    ) -> ChatResult:
+        """Run a completion, returning the text with usage and timing information."""
+        start = time.perf_counter()
+        time_to_first_token = None
+        parts: list[str] = []
+        finish_reason = None
+        usage = None
+
+        async for delta in self.execute_stream(messages, settings):
+            if delta.content:
+                if time_to_first_token is None:
+                    time_to_first_token = time.perf_counter() - start
+                parts.append(delta.content)
+            finish_reason = delta.finish_reason or finish_reason
+            usage = delta.usage or usage
+
+        return ChatResult(
+            content="".join(parts) if parts else None,
+            finish_reason=finish_reason,
+            usage=usage,
+            time_to_first_token=time_to_first_token,
+            elapsed=time.perf_counter() - start,
+        )
+
+    async def execute_many(
+        self,
+        messages_list: Iterable[Iterable[ChatCompletionMessageParam]],
+        settings: ChatModelSettings | None,
+        max_concurrency: int | None = None,
+    ) -> list[ChatResult | BaseException]:
+        """Run many completions with at most `max_concurrency` in flight.
+
+        Results keep the input order; a failed request yields its exception instead
+        of cancelling the others.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+
+        async def _run(messages: Iterable[ChatCompletionMessageParam]) -> ChatResult:
+            async with semaphore:
+                return await self.execute(messages, settings)
+
+        return await asyncio.gather(
+            *(_run(messages) for messages in messages_list), return_exceptions=True
+        )
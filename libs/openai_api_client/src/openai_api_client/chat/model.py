@@ -2,15 +2,25 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, Literal
 
-from openai import NOT_GIVEN, OpenAI
+from openai import OpenAI
 from pydantic import BaseModel
 
+from ..rate_limit import estimate_chat_tokens
+from ..http_client import (
+    DEFAULT_MAX_RETRIES,
+    client_stats,
+    call_with_retry,
+    get_http_client,
+)
+from .settings import settings_to_kwargs
+
 
 if TYPE_CHECKING:
     from collections.abc import Iterable
 
-    from openai_api_client.types import ChatCompletionMessageParam
-    from openai_api_client.chat.settings import ChatModelSettings
+    from ..types import ChatCompletionMessageParam
+    from ..rate_limit import RateLimiter
+    from .settings import ChatModelSettings
 
 
 class ChatUserMessage(BaseModel):
@@ -19,27 +29,49 @@ class ChatUserMessage(BaseModel):
 
 
 class ChatModel:
-    def __init__(self, openai_api_url: str, openai_api_key: str, model_id: str) -> None:
+    def __init__(
+        self,
+        openai_api_url: str,
+        openai_api_key: str,
+        model_id: str,
+        rate_limiter: RateLimiter | None = None,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+    ) -> None:
         self.model_id = model_id
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
 
-        self.client = OpenAI(base_url=openai_api_url, api_key=openai_api_key)
+        # Retries are done by `call_with_retry` so they respect the rate limiter
+        self.client = OpenAI(
+            base_url=openai_api_url,
+            api_key=openai_api_key,
+            http_client=get_http_client(),
+            max_retries=0,
+        )
 
     def execute(
         self,
         messages: Iterable[ChatCompletionMessageParam],
         settings: ChatModelSettings | None,
     ) -> str | None:
-        settings = settings or {}
-
-        results = self.client.chat.completions.create(
-            messages=messages,
-            model=self.model_id,
-            stream=False,
-            # model settings
-            max_tokens=settings.get("max_tokens", NOT_GIVEN),
-            temperature=settings.get("temperature", NOT_GIVEN),
-            top_p=settings.get("top_p", NOT_GIVEN),
-            presence_penalty=settings.get("presence_penalty", NOT_GIVEN),
-            frequency_penalty=settings.get("frequency_penalty", NOT_GIVEN),
+        messages = list(messages)
+        tokens = estimate_chat_tokens(messages, (settings or {}).get("max_tokens", 0))
+
+        results = call_with_retry(
+            lambda: self.client.chat.completions.create(
+                messages=messages,
+                model=self.model_id,
+                stream=False,
+                # model settings
+                **settings_to_kwargs(settings),
+            ),
+            limiter=self.rate_limiter,
+            tokens=tokens,
+            max_retries=self.max_retries,
         )
+
+        if results.usage is not None:
+            client_stats.record_tokens("chat", results.usage.total_tokens)
+            if self.rate_limiter is not None:
+                self.rate_limiter.record_usage(tokens, results.usage.total_tokens)
         return results.choices[0].message.content
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from pydantic import BaseModel
+
+
+class ChatUsage(BaseModel):
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+
+
+class ChatDelta(BaseModel):
+    """A piece of streamed output. The last delta carries `usage` when available."""
+
+    content: str
+    finish_reason: str | None = None
+    usage: ChatUsage | None = None
+
+
+class ChatResult(BaseModel):
+    content: str | None
+    finish_reason: str | None = None
+    usage: ChatUsage | None = None
+    # Seconds from sending the request until the first content token arrived
+    time_to_first_token: float | None = None
+    # Seconds from sending the request until the response was complete
+    elapsed: float
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from typing import TypedDict
+from typing import Any, TypedDict
+
+from openai import NOT_GIVEN
 
 
 class ChatModelSettings(TypedDict, total=False):
@@ -9,3 +11,15 @@ class ChatModelSettings(TypedDict, total=False):
     top_p: float
     presence_penalty: float
     frequency_penalty: float
+
+
+def settings_to_kwargs(settings: ChatModelSettings | None) -> dict[str, Any]:
+    """Map model settings to `chat.completions.create` keyword arguments."""
+    settings = settings or {}
+    return {
+        "max_tokens": settings.get("max_tokens", NOT_GIVEN),
+        "temperature": settings.get("temperature", NOT_GIVEN),
+        "top_p": settings.get("top_p", NOT_GIVEN),
+        "presence_penalty": settings.get("presence_penalty", NOT_GIVEN),
+        "frequency_penalty": settings.get("frequency_penalty", NOT_GIVEN),
+    }
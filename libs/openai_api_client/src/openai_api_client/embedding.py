@@ -1,19 +1,46 @@
 from __future__ import annotations
 
+import base64
 from typing import TYPE_CHECKING
 
+import numpy as np
 from openai import OpenAI
 
+from .rate_limit import estimate_tokens
+from .http_client import (
+    DEFAULT_MAX_RETRIES,
+    client_stats,
+    call_with_retry,
+    get_http_client,
+)
+
 
 if TYPE_CHECKING:
     from collections.abc import Iterable
 
+    from .rate_limit import RateLimiter
+
 
 class EmbeddingModel:
-    def __init__(self, openai_api_url: str, openai_api_key: str, model_id: str) -> None:
+    def __init__(
+        self,
+        openai_api_url: str,
+        openai_api_key: str,
+        model_id: str,
+        rate_limiter: RateLimiter | None = None,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+    ) -> None:
         self.model_id = model_id
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
 
-        self.client = OpenAI(base_url=openai_api_url, api_key=openai_api_key)
+        # Retries are done by `call_with_retry` so they respect the rate limiter
+        self.client = OpenAI(
+            base_url=openai_api_url,
+            api_key=openai_api_key,
+            http_client=get_http_client(),
+            max_retries=0,
+        )
 
     def embed(self, item: str) -> list[float]:
         """Embed a single text string, return a list of floats."""
@@ -21,8 +48,55 @@ class EmbeddingModel:
 
     def embed_multi(self, items: list[str]) -> Iterable[list[float]]:
         """Embed a batch of strings, return a lists of lists of floats."""
-        results = self.client.embeddings.create(
-            model=self.model_id,
-            input=items,
-        ).data
+        tokens = estimate_tokens(items)
+        response = call_with_retry(
+            lambda: self.client.embeddings.create(
+                model=self.model_id,
+                input=items,
+            ),
+            limiter=self.rate_limiter,
+            tokens=tokens,
+            max_retries=self.max_retries,
+        )
+
+        if response.usage is not None:
+            client_stats.record_tokens("embeddings", response.usage.total_tokens)
+            if self.rate_limiter is not None:
+                self.rate_limiter.record_usage(tokens, response.usage.total_tokens)
+
+        results = response.data
         return ([float(r) for r in result.embedding] for result in results)
+
+    def embed_array(self, items: list[str]) -> np.ndarray:
+        """Embed a batch of strings, return a float32 array of shape (n, dims).
+
+        Vectors are requested base64-encoded and decoded into one buffer, without
+        building Python floats.
+        """
+        if not items:
+            return np.empty((0, 0), dtype=np.float32)
+
+        tokens = estimate_tokens(items)
+        response = call_with_retry(
+            lambda: self.client.embeddings.create(
+                model=self.model_id,
+                input=items,
+                encoding_format="base64",
+            ),
+            limiter=self.rate_limiter,
+            tokens=tokens,
+            max_retries=self.max_retries,
+        )
+
+        if response.usage is not None:
+            client_stats.record_tokens("embeddings", response.usage.total_tokens)
+            if self.rate_limiter is not None:
+                self.rate_limiter.record_usage(tokens, response.usage.total_tokens)
+
+        results = sorted(response.data, key=lambda result: result.index)
+        if not isinstance(results[0].embedding, str):
+            # Server ignored `encoding_format` and sent JSON floats
+            return np.asarray([r.embedding for r in results], dtype=np.float32)
+
+        buffer = b"".join(base64.b64decode(result.embedding) for result in results)
+        return np.frombuffer(buffer, dtype="<f4").reshape(len(results), -1)
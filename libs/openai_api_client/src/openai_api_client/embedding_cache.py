@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import re
+import time
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+from typing import TYPE_CHECKING, NamedTuple
+
+import numpy as np
+
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from .embedding import EmbeddingModel
+
+
+# SQLite limits the number of `?` parameters of a statement
+LOOKUP_BATCH_SIZE = 500
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalization applied before hashing, so trivial variants share an entry."""
+    return WHITESPACE_PATTERN.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def text_hash(text: str) -> bytes:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).digest()
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    entries: int
+    size_bytes: int
+    evictions: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class EmbeddingCache:
+    """SQLite store of float32 vectors keyed by (model_id, sha256(normalized text)).
+
+    When `max_size_bytes` is set, the least recently used vectors are evicted
+    once the stored vectors grow beyond it.
+    """
+
+    def __init__(self, path: str | Path, max_size_bytes: int | None = None) -> None:
+        self.path = path
+        self.max_size_bytes = max_size_bytes
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model_id TEXT NOT NULL,"
+            " text_hash BLOB NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " last_access REAL NOT NULL,"
+            " PRIMARY KEY (model_id, text_hash)"
+            ") WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_access"
+            " ON embeddings (last_access)"
+        )
+        self._conn.commit()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._size_bytes = self._stored_size()
+
+    def get_many(self, model_id: str, hashes: list[bytes]) -> dict[bytes, np.ndarray]:
+        """Return the cached vectors among `hashes` (missing ones are left out)."""
+        found: dict[bytes, np.ndarray] = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(hashes), LOOKUP_BATCH_SIZE):
+                batch = hashes[start : start + LOOKUP_BATCH_SIZE]
+                rows = self._conn.execute(
+                    "SELECT text_hash, vector FROM embeddings"
+                    f" WHERE model_id = ? AND text_hash IN ({','.join('?' * len(batch))})",
+                    (model_id, *batch),
+                ).fetchall()
+                found.update(
+                    (key, np.frombuffer(vector, dtype=np.float32)) for key, vector in rows
+                )
+
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ?"
+                    " WHERE model_id = ? AND text_hash = ?",
+                    [(now, model_id, key) for key in found],
+                )
+                self._conn.commit()
+
+            self._hits += len(found)
+            self._misses += len(hashes) - len(found)
+        return found
+
+    def put_many(self, model_id: str, vectors: dict[bytes, np.ndarray]) -> None:
+        now = time.time()
+        rows = [
+            (model_id, key, np.ascontiguousarray(vector, dtype=np.float32).tobytes(), now)
+            for key, vector in vectors.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings"
+                " (model_id, text_hash, vector, last_access) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            self._size_bytes += sum(len(row[2]) for row in rows)
+
+            if self.max_size_bytes is not None and self._size_bytes > self.max_size_bytes:
+                self._evict()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                entries=entries,
+                size_bytes=self._size_bytes,
+                evictions=self._evictions,
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _stored_size(self) -> int:
+        (size,) = self._conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()
+        return size
+
+    def _evict(self) -> None:
+        # Other processes may write to the same file: start from the real size
+        self._size_bytes = self._stored_size()
+        # Evict down to 90% of the limit, so eviction does not run on every write
+        target = int(self.max_size_bytes * 0.9)
+        rows = self._conn.execute(
+            "SELECT model_id, text_hash, LENGTH(vector) FROM embeddings"
+            " ORDER BY last_access"
+        )
+        evicted = []
+        for model_id, key, size in rows:
+            if self._size_bytes <= target:
+                break
+            evicted.append((model_id, key))
+            self._size_bytes -= size
+
+        self._conn.executemany(
+            "DELETE FROM embeddings WHERE model_id = ? AND text_hash = ?", evicted
+        )
+        self._conn.commit()
+        self._evictions += len(evicted)
+
+
+class CachedEmbeddingModel:
+    """`EmbeddingModel` that only sends texts missing from `cache` to the API."""
+
+    def __init__(self, model: EmbeddingModel, cache: EmbeddingCache) -> None:
+        self.model = model
+        self.cache = cache
+
+    @property
+    def model_id(self) -> str:
+        return self.model.model_id
+
+    def embed(self, item: str) -> np.ndarray:
+        """Embed a single text string, return a float32 vector."""
+        return self.embed_multi([item])[0]
+
+    def embed_multi(self, items: list[str]) -> np.ndarray:
+        """Embed a batch of strings, return a float32 array of shape (n, dims)."""
+        if not items:
+            return np.empty((0, 0), dtype=np.float32)
+
+        hashes = [text_hash(item) for item in items]
+        unique_hashes = list(dict.fromkeys(hashes))
+        vectors = self.cache.get_many(self.model_id, unique_hashes)
+
+        # Identical texts of the batch are embedded once
+        missing: dict[bytes, str] = {}
+        for key, item in zip(hashes, items):
+            if key not in vectors:
+                missing.setdefault(key, item)
+        if missing:
+            embedded = self.model.embed_array(list(missing.values()))
+            new_vectors = dict(zip(missing, embedded))
+            self.cache.put_many(self.model_id, new_vectors)
+            vectors.update(new_vectors)
+
+        return np.stack([vectors[key] for key in hashes])
+
+    embed_array = embed_multi
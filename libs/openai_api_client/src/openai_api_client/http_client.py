@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import time
+import random
+import asyncio
+import threading
+from typing import TYPE_CHECKING, TypeVar
+from weakref import WeakKeyDictionary
+from collections import Counter
+from email.utils import parsedate_to_datetime
+
+import httpx
+from openai import (
+    APIStatusError,
+    RateLimitError,
+    APITimeoutError,
+    APIConnectionError,
+    InternalServerError,
+)
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Awaitable
+
+    from .rate_limit import RateLimiter
+
+
+T = TypeVar("T")
+
+# One pool for every OpenAI-compatible client of the process
+HTTP_LIMITS = httpx.Limits(
+    max_connections=100, max_keepalive_connections=50, keepalive_expiry=60
+)
+HTTP_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+
+DEFAULT_MAX_RETRIES = 5
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 30.0
+
+_RETRYABLE_ERRORS = (
+    RateLimitError,
+    APITimeoutError,
+    APIConnectionError,
+    InternalServerError,
+)
+
+class ClientStats:
+    """Process-wide request, retry and token counters, e.g. for metrics endpoints."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.retries = 0
+        self.tokens: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def record_request(self, *, retry: bool) -> None:
+        with self._lock:
+            self.requests += 1
+            self.retries += retry
+
+    def record_tokens(self, endpoint: str, tokens: int) -> None:
+        with self._lock:
+            self.tokens[endpoint] += tokens
+
+
+client_stats = ClientStats()
+
+_http_client: httpx.Client | None = None
+_async_http_clients: WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = (
+    WeakKeyDictionary()
+)
+_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.Client:
+    """Return the process-wide `httpx.Client` (keep-alive connection pool)."""
+    global _http_client  # noqa: PLW0603
+    with _lock:
+        if _http_client is None or _http_client.is_closed:
+            _http_client = httpx.Client(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+        return _http_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Return the `httpx.AsyncClient` shared by every client of the running loop."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_http_clients.get(loop)
+        if client is None or client.is_closed:
+            client = _async_http_clients[loop] = httpx.AsyncClient(
+                limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT
+            )
+        return client
+
+
+def retry_delay(error: Exception, attempt: int) -> float:
+    """Seconds to wait before retrying: `Retry-After` if given, else jittered backoff."""
+    if isinstance(error, APIStatusError):
+        retry_after = _parse_retry_after(error.response.headers)
+        if retry_after is not None:
+            return min(retry_after, RETRY_MAX_DELAY)
+
+    # Full jitter exponential backoff
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt))  # noqa: S311
+
+
+def call_with_retry(
+    func: Callable[[], T],
+    *,
+    limiter: RateLimiter | None,
+    tokens: int = 0,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+) -> T:
+    """Call `func` within the rate limits, retrying transient errors and 429s."""
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            limiter.acquire(tokens)
+        client_stats.record_request(retry=attempt > 0)
+        try:
+            return func()
+        except _RETRYABLE_ERRORS as e:
+            if attempt >= max_retries:
+                raise
+            delay = retry_delay(e, attempt)
+            if limiter is not None and isinstance(e, RateLimitError):
+                limiter.pause(delay)
+            time.sleep(delay)
+
+    raise AssertionError  # unreachable
+
+
+async def call_with_retry_async(
+    func: Callable[[], Awaitable[T]],
+    *,
+    limiter: RateLimiter | None,
+    tokens: int = 0,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+) -> T:
+    """Async version of `call_with_retry`."""
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            await limiter.acquire_async(tokens)
+        client_stats.record_request(retry=attempt > 0)
+        try:
+            return await func()
+        except _RETRYABLE_ERRORS as e:
+            if attempt >= max_retries:
+                raise
+            delay = retry_delay(e, attempt)
+            if limiter is not None and isinstance(e, RateLimitError):
+                limiter.pause(delay)
+            await asyncio.sleep(delay)
+
+    raise AssertionError  # unreachable
+
+
+def _parse_retry_after(headers: httpx.Headers) -> float | None:
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms is not None:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if retry_after is None:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
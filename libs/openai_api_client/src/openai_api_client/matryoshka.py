@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+
+if TYPE_CHECKING:
+    from .embedding import EmbeddingModel
+    from .embedding_cache import CachedEmbeddingModel
+
+
+def truncate_embeddings(vectors: np.ndarray, dims: int) -> np.ndarray:
+    """Keep the first `dims` components and L2-normalize again.
+
+    Only meaningful for Matryoshka-trained models (e.g. OpenAI text-embedding-3),
+    whose leading components carry most of the information.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dims >= vectors.shape[-1]:
+        return vectors
+    truncated = vectors[..., :dims]
+    norms = np.linalg.norm(truncated, axis=-1, keepdims=True)
+    return truncated / np.maximum(norms, np.finfo(np.float32).tiny)
+
+
+class TruncatedEmbeddingModel:
+    """Embedding model returning vectors truncated to `dims` (see `truncate_embeddings`).
+
+    Wrap the cached model rather than the other way around, so the cache keeps
+    full vectors and `dims` can change without re-embedding.
+    """
+
+    def __init__(self, model: EmbeddingModel | CachedEmbeddingModel, dims: int) -> None:
+        self.model = model
+        self.dims = dims
+
+    @property
+    def model_id(self) -> str:
+        return self.model.model_id
+
+    def embed(self, item: str) -> np.ndarray:
+        """Embed a single text string, return a float32 vector."""
+        return self.embed_multi([item])[0]
+
+    def embed_multi(self, items: list[str]) -> np.ndarray:
+        """Embed a batch of strings, return a float32 array of shape (n, dims)."""
+        if not items:
+            return np.empty((0, self.dims), dtype=np.float32)
+        return truncate_embeddings(self.model.embed_array(items), self.dims)
+
+    embed_array = embed_multi
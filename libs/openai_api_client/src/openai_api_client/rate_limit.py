@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import time
+import asyncio
+import threading
+from typing import Any
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate_per_minute`.
+
+    `reserve` always succeeds and returns how long the caller must wait; the level
+    may go negative, so concurrent callers queue up behind each other instead of
+    all retrying at once.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float | None = None) -> None:
+        self.rate_per_second = rate_per_minute / 60
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._level = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """Take `amount` from the bucket, return the seconds to wait before using it."""
+        with self._lock:
+            self._refill()
+            self._level -= amount
+            return max(0.0, -self._level / self.rate_per_second)
+
+    def refund(self, amount: float) -> None:
+        """Give back `amount` (e.g. when the estimate was higher than actual usage)."""
+        with self._lock:
+            self._refill()
+            self._level = min(self.capacity, self._level + amount)
+
+    def drain_for(self, seconds: float) -> None:
+        """Make the bucket empty for at least `seconds` (used on HTTP 429)."""
+        with self._lock:
+            self._refill()
+            self._level = min(self._level, -seconds * self.rate_per_second)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._level = min(
+            self.capacity, self._level + (now - self._updated_at) * self.rate_per_second
+        )
+        self._updated_at = now
+
+
+class RateLimiter:
+    """Requests/min and tokens/min limits shared by every client of one endpoint."""
+
+    def __init__(
+        self,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+    ) -> None:
+        self.requests = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    def _reserve(self, tokens: int) -> float:
+        delays = [0.0]
+        if self.requests is not None:
+            delays.append(self.requests.reserve(1))
+        if self.tokens is not None:
+            delays.append(self.tokens.reserve(tokens))
+        return max(delays)
+
+    def acquire(self, tokens: int = 0) -> None:
+        """Block until a request using about `tokens` tokens may be sent."""
+        delay = self._reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, tokens: int = 0) -> None:
+        """Async version of `acquire`."""
+        delay = self._reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int | None) -> None:
+        """Correct the token bucket once the real usage of a request is known."""
+        if self.tokens is None or actual_tokens is None:
+            return
+        difference = actual_tokens - estimated_tokens
+        if difference > 0:
+            self.tokens.reserve(difference)
+        elif difference < 0:
+            self.tokens.refund(-difference)
+
+    def pause(self, seconds: float) -> None:
+        """Stop every caller for `seconds`, e.g. after the server answered 429."""
+        for bucket in (self.requests, self.tokens):
+            if bucket is not None:
+                bucket.drain_for(seconds)
+
+
+_limiters: dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    name: str,
+    requests_per_minute: float | None = None,
+    tokens_per_minute: float | None = None,
+) -> RateLimiter:
+    """Return the process-wide limiter called `name`, creating it on first use."""
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = _limiters[name] = RateLimiter(
+                requests_per_minute, tokens_per_minute
+            )
+        return limiter
+
+
+def estimate_tokens(texts: list[str]) -> int:
+    """Rough token count (about 4 characters per token) used for rate limiting."""
+    return sum(len(text) for text in texts) // 4 + len(texts)
+
+
+def estimate_chat_tokens(messages: list[Any], max_tokens: int = 0) -> int:
+    """Rough prompt + completion token count of a chat request."""
+    texts = [
+        message["content"]
+        for message in messages
+        if isinstance(message.get("content"), str)
+    ]
+    return estimate_tokens(texts) + max_tokens
@@ -0,0 +1,10 @@
+from __future__ import annotations
+
+from libs.vectordb.src.vectordb.local import local_service
+
+
+__all__ = [
+
+    "local_service",
+
+]
@@ -0,0 +1,476 @@
+"""Backend vector DB chạy trong process, cùng bộ hàm với `os_service`.
+
+Dùng cho máy dev, test/benchmark và cài đặt nhỏ không có OpenSearch: vector được
+lưu trong file numpy memory-mapped, metadata trong SQLite, tìm kiếm bằng HNSW
+(hnswlib, nếu cài) hoặc tính chính xác bằng numpy. Kết quả có cùng dạng với
+response của OpenSearch (`hits.hits[]._id/_score/_source`).
+
+Truy vấn hỗ trợ một phần query DSL: `match_all`, `term`, `terms`, `range`,
+`exists`, `match` (mọi từ đều xuất hiện, không phân biệt hoa thường),
+`bool` (`must`/`filter`/`should`/`must_not`) và `nested` (như query bên trong).
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import operator
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+from libs.vectordb.src.vectordb.local.store import LocalVectorStore
+from logger.src.logger import get_logger
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+    from pathlib import Path
+
+log = get_logger(__name__)
+
+
+# ----------------- Query DSL -----------------
+def _field_values(source: Any, keys: tuple[str, ...]) -> list[Any]:
+    """Các giá trị của trường `a.b.c` (đi qua cả list, như mapping nested/array)."""
+    # Trường hợp thường gặp: toàn dict lồng nhau, giá trị cuối là scalar
+    value = source
+    for key in keys:
+        if not isinstance(value, dict):
+            break
+        value = value.get(key)
+    else:
+        if value is None:
+            return []
+        return list(value) if isinstance(value, list) else [value]
+
+    values = [source]
+    for key in keys:
+        next_values = []
+        for value in values:
+            if isinstance(value, list):
+                next_values.extend(v.get(key) for v in value if isinstance(v, dict))
+            elif isinstance(value, dict):
+                next_values.append(value.get(key))
+        values = next_values
+    flat: list[Any] = []
+    for value in values:
+        if isinstance(value, list):
+            flat.extend(value)
+        elif value is not None:
+            flat.append(value)
+    return flat
+
+
+@lru_cache(maxsize=65536)
+def _date_timestamp(value: str) -> float | None:
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    # Như OpenSearch: ngày không có múi giờ được hiểu là UTC
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _comparable(value: Any) -> Any:
+    """Chuỗi ngày ISO được so sánh theo epoch (giây, UTC), còn lại giữ nguyên."""
+    if isinstance(value, str):
+        timestamp = _date_timestamp(value)
+        return timestamp if timestamp is not None else value
+    return value
+
+
+_RANGE_OPS: dict[str, Callable[[Any, Any], bool]] = {
+    "gte": operator.ge,
+    "gt": operator.gt,
+    "lte": operator.le,
+    "lt": operator.lt,
+}
+
+
+def _range_check(
+    keys: tuple[str, ...], bounds: list[tuple[Callable[[Any, Any], bool], Any]]
+) -> Callable[[dict[str, Any]], bool]:
+    def check(source: dict[str, Any]) -> bool:
+        for value in _field_values(source, keys):
+            value = _comparable(value)
+            try:
+                for op, bound in bounds:
+                    if not op(value, bound):
+                        break
+                else:
+                    return True
+            except TypeError:
+                continue
+        return False
+
+    return check
+
+
+def compile_query(query: dict[str, Any] | None) -> Callable[[dict[str, Any]], bool]:
+    """Chuyển một query DSL thành hàm lọc `_source` -> bool."""
+    if not query or "match_all" in query:
+        return lambda source: True
+
+    if "bool" in query:
+        clauses = query["bool"]
+        required = [
+            compile_query(clause)
+            for key in ("must", "filter")
+            for clause in _as_list(clauses.get(key))
+        ]
+        should = [compile_query(clause) for clause in _as_list(clauses.get("should"))]
+        must_not = [compile_query(clause) for clause in _as_list(clauses.get("must_not"))]
+        min_should = clauses.get("minimum_should_match", 1 if should and not required else 0)
+        return lambda source: (
+            all(check(source) for check in required)
+            and not any(check(source) for check in must_not)
+            and sum(check(source) for check in should) >= int(min_should)
+        )
+
+    if "nested" in query:
+        return compile_query(query["nested"]["query"])
+
+    kind, spec = next(iter(query.items()))
+    if kind == "exists":
+        field, condition = spec["field"], None
+    else:
+        field, condition = next(iter(spec.items()))
+    keys = tuple(field.split("."))
+
+    if kind == "term":
+        expected = condition["value"] if isinstance(condition, dict) else condition
+        return lambda source: expected in _field_values(source, keys)
+    if kind == "terms":
+        expected_set = set(condition)
+        return lambda source: any(v in expected_set for v in _field_values(source, keys))
+    if kind == "range":
+        bounds = [
+            (_RANGE_OPS[op], _comparable(bound))
+            for op, bound in condition.items()
+            if op in _RANGE_OPS
+        ]
+        return _range_check(keys, bounds)
+    if kind == "exists":
+        return lambda source: bool(_field_values(source, keys))
+    if kind == "match":
+        text = condition["query"] if isinstance(condition, dict) else condition
+        words = str(text).lower().split()
+        return lambda source: any(
+            all(word in str(v).lower() for word in words)
+            for v in _field_values(source, keys)
+        )
+
+    msg = f"Backend local không hỗ trợ query `{kind}`"
+    raise ValueError(msg)
+
+
+def _as_list(value: Any) -> list[Any]:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _filter_source(
+    source: dict[str, Any],
+    includes: list[str] | None,
+    excludes: list[str] | None,
+    prefix: str = "",
+) -> dict[str, Any]:
+    """Lọc `_source` theo pattern dạng `metadata.subject`, `metadata.*`."""
+    filtered = {}
+    for key, value in source.items():
+        path = f"{prefix}{key}"
+        if excludes and any(fnmatch.fnmatchcase(path, pattern) for pattern in excludes):
+            continue
+        if not includes or any(fnmatch.fnmatchcase(path, pattern) for pattern in includes):
+            filtered[key] = value
+        elif isinstance(value, dict) and any(
+            pattern.startswith(f"{path}.") for pattern in includes
+        ):
+            filtered[key] = _filter_source(value, includes, excludes, f"{path}.")
+    return filtered
+
+
+def _hit(
+    index: str,
+    doc_id: str,
+    score: float,
+    source: dict[str, Any],
+    source_includes: list[str] | None,
+    source_excludes: list[str] | None,
+    docvalue_fields: list[str] | None,
+) -> dict[str, Any]:
+    hit: dict[str, Any] = {"_index": index, "_id": doc_id, "_score": score}
+    if source_includes is None or source_includes or source_excludes:
+        hit["_source"] = _filter_source(source, source_includes, source_excludes)
+    if docvalue_fields:
+        hit["fields"] = {field: _field_values(source, tuple(field.split("."))) for field in docvalue_fields}
+    return hit
+
+
+def _response(hits: list[dict[str, Any]], total: int) -> dict[str, Any]:
+    return {
+        "hits": {
+            "total": {"value": total, "relation": "eq"},
+            "max_score": max((hit["_score"] for hit in hits), default=None),
+            "hits": hits,
+        }
+    }
+
+
+# ----------------- Client -----------------
+def new_local_client(path: str | Path) -> LocalVectorStore:
+    """Tạo store local; mỗi index là một thư mục con của `path`."""
+    store = LocalVectorStore(path)
+    log.info("local_service.new_local_client.success", path=str(path))
+    return store
+
+
+def ping_opensearch(client: LocalVectorStore) -> bool:
+    """Thư mục store còn truy cập được (giữ tên hàm như `os_service`)."""
+    return client.ping()
+
+
+# ----------------- Index Management -----------------
+def create_index(
+    client: LocalVectorStore, index: str, mapping: dict[str, Any] | None = None
+) -> dict[str, Any] | None:
+    """Tạo index nếu chưa tồn tại; số chiều lấy từ `embedding.dimension` trong mapping
+    (không có thì lấy theo vector đầu tiên được upload)."""
+    if client.exists(index):
+        log.info("local_service.create_index.exists", index=index)
+        return None
+
+    dims = None
+    if mapping is not None:
+        embedding = mapping.get("mappings", {}).get("properties", {}).get("embedding", {})
+        dims = embedding.get("dimension")
+    client.create(index, dims)
+    log.info("local_service.create_index.success", index=index, dims=dims)
+    return {"acknowledged": True, "index": index}
+
+
+def delete_index(client: LocalVectorStore, index: str) -> dict[str, Any] | None:
+    """Xóa index (cả file trên đĩa)."""
+    if not client.drop(index):
+        log.info("local_service.delete_index.not_exists", index=index)
+        return None
+    log.info("local_service.delete_index.success", index=index)
+    return {"acknowledged": True}
+
+
+def get_index_info(client: LocalVectorStore, index: str) -> dict[str, Any] | None:
+    """Lấy thông tin về index."""
+    local_index = client.get(index)
+    if local_index is None:
+        log.info("local_service.get_index_info.not_exists", index=index)
+        return None
+    return {index: local_index.info()}
+
+
+# ----------------- Document Operations -----------------
+def upload_document(
+    client: LocalVectorStore,
+    index: str,
+    doc_id: str,
+    payload: dict[str, Any],
+    quantization: str = "none",
+) -> dict[str, Any] | None:
+    """Upload hoặc update một document (vector luôn lưu float32, bỏ qua `quantization`)."""
+    try:
+        source = {key: value for key, value in payload.items() if key != "embedding"}
+        vector = payload.get("embedding")
+        client.create(index).upsert(
+            [doc_id], [vector] if vector is not None else None, [source]
+        )
+        log.info("local_service.upload_document.success", index=index, doc_id=doc_id)
+        return {"_index": index, "_id": doc_id, "result": "updated"}
+
+    except Exception as e:
+        log.error("local_service.upload_document.error", index=index, doc_id=doc_id, error=str(e))
+        return None
+
+
+def get_document(
+    client: LocalVectorStore, index: str, doc_id: str
+) -> dict[str, Any] | None:
+    """Lấy document theo ID."""
+    local_index = client.get(index)
+    source = local_index.get(doc_id) if local_index is not None else None
+    if source is None:
+        log.info("local_service.get_document.not_found", index=index, doc_id=doc_id)
+        return None
+    return {"_index": index, "_id": doc_id, "found": True, "_source": source}
+
+
+def document_exists(client: LocalVectorStore, index: str, doc_id: str) -> bool:
+    """Kiểm tra document có tồn tại không."""
+    local_index = client.get(index)
+    return local_index is not None and local_index.get(doc_id) is not None
+
+
+def delete_document(
+    client: LocalVectorStore, index: str, doc_id: str
+) -> dict[str, Any] | None:
+    """Xóa một document theo doc_id."""
+    local_index = client.get(index)
+    if local_index is None or not local_index.delete(doc_id):
+        log.info("local_service.delete_document.not_exists", index=index, doc_id=doc_id)
+        return None
+    log.info("local_service.delete_document.success", index=index, doc_id=doc_id)
+    return {"_index": index, "_id": doc_id, "result": "deleted"}
+
+
+def bulk_upload_documents(
+    client: LocalVectorStore,
+    index: str,
+    documents: list[dict[str, Any]],
+    embeddings: Any | None = None,
+    quantization: str = "none",
+) -> tuple[int, list[Any]] | None:
+    """Upload nhiều documents cùng lúc (giống `os_service.bulk_upload_documents`)."""
+    try:
+        if embeddings is not None and len(embeddings) != len(documents):
+            msg = "Số embeddings không khớp với số documents"
+            raise ValueError(msg)
+        if embeddings is None:
+            embeddings = [doc["embedding"] for doc in documents]
+
+        client.create(index).upsert(
+            [doc["id"] for doc in documents],
+            embeddings,
+            [{"metadata": doc["metadata"]} for doc in documents],
+        )
+        log.info("local_service.bulk_upload.success", index=index, count=len(documents))
+        return len(documents), []
+
+    except Exception as e:
+        log.error("local_service.bulk_upload.error", index=index, error=str(e))
+        return None
+
+
+# ----------------- Search Operations -----------------
+def search_documents(
+    client: LocalVectorStore,
+    index: str,
+    query: dict[str, Any],
+    size: int = 10,
+    *,
+    source_includes: list[str] | None = None,
+    source_excludes: list[str] | None = None,
+    docvalue_fields: list[str] | None = None,
+) -> dict[str, Any] | None:
+    """Tìm documents khớp `query["query"]` (không chấm điểm, theo thứ tự ghi)."""
+    try:
+        local_index = client.get(index)
+        predicate = compile_query(query.get("query"))
+        matches = (
+            [(doc_id, source) for doc_id, source in local_index.iter_docs() if predicate(source)]
+            if local_index is not None
+            else []
+        )
+        hits = [
+            _hit(index, doc_id, 1.0, source, source_includes, source_excludes, docvalue_fields)
+            for doc_id, source in matches[:size]
+        ]
+        log.info("local_service.search_documents.success", index=index, hits=len(matches))
+        return _response(hits, len(matches))
+
+    except Exception as e:
+        log.error("local_service.search_documents.error", index=index, error=str(e))
+        return None
+
+
+def vector_search(
+    client: LocalVectorStore,
+    index: str,
+    query_vector: Any,
+    size: int = 10,
+    min_score: float = 0.0,
+    quantization: str = "none",
+    *,
+    filter: dict[str, Any] | None = None,  # noqa: A002
+    source_includes: list[str] | None = None,
+    source_excludes: list[str] | None = None,
+    docvalue_fields: list[str] | None = None,
+) -> dict[str, Any] | None:
+    """Tìm kiếm vector similarity, chỉ trong các document khớp `filter` (query DSL).
+
+    `_score` tính như OpenSearch với `cosinesimil`: (1 + cosine) / 2.
+    """
+    try:
+        local_index = client.get(index)
+        if local_index is None:
+            return _response([], 0)
+
+        predicate = compile_query(filter) if filter else None
+        results = local_index.search(query_vector, size, predicate)
+        hits = [
+            _hit(
+                index,
+                doc_id,
+                (1.0 + cosine) / 2,
+                source,
+                source_includes,
+                source_excludes,
+                docvalue_fields,
+            )
+            for doc_id, cosine, source in results
+            if (1.0 + cosine) / 2 >= min_score
+        ]
+        log.info("local_service.vector_search.success", index=index, hits=len(hits))
+        return _response(hits, len(hits))
+
+    except Exception as e:
+        log.error("local_service.vector_search.error", index=index, error=str(e))
+        return None
+
+
+def scan_documents(
+    client: LocalVectorStore,
+    index: str,
+    query: dict[str, Any] | None = None,
+    page_size: int = 1000,
+    *,
+    source_includes: list[str] | None = None,
+    source_excludes: list[str] | None = None,
+    docvalue_fields: list[str] | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Duyệt mọi document khớp `query` để export."""
+    local_index = client.get(index)
+    if local_index is None:
+        return
+    predicate = compile_query((query or {}).get("query"))
+    for doc_id, source in local_index.iter_docs():
+        if predicate(source):
+            yield _hit(
+                index, doc_id, 1.0, source, source_includes, source_excludes, docvalue_fields
+            )
+
+
+# ----------------- Index Stats -----------------
+def get_index_stats(client: LocalVectorStore, index: str) -> dict[str, Any] | None:
+    """Lấy thống kê index."""
+    return get_index_info(client, index)
+
+
+def count_documents(client: LocalVectorStore, index: str) -> int:
+    """Đếm số documents trong index."""
+    local_index = client.get(index)
+    count = local_index.count() if local_index is not None else 0
+    log.info("local_service.count_documents.success", index=index, count=count)
+    return count
+
+
+# ----------------- Utility Functions -----------------
+def refresh_index(client: LocalVectorStore, index: str) -> dict[str, Any] | None:
+    """Ghi vector và đồ thị HNSW của index xuống đĩa."""
+    local_index = client.get(index)
+    if local_index is None:
+        return None
+    local_index.flush()
+    log.info("local_service.refresh_index.success", index=index)
+    return {"_shards": {"failed": 0}}
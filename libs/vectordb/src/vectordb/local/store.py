@@ -0,0 +1,575 @@
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import shutil
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from logger.src.logger import get_logger
+
+try:
+    import hnswlib  # type: ignore
+except ImportError:  # pragma: no cover - hnswlib là tùy chọn
+    hnswlib = None
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+log = get_logger(__name__)
+
+VECTORS_FILE = "vectors.npy"
+DOCS_FILE = "docs.sqlite3"
+HNSW_FILE = "hnsw.bin"
+
+MIN_CAPACITY = 1024
+# Tham số HNSW (hnswlib): M và ef_construction lúc build, ef tối thiểu lúc search
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+# Lọc còn ít hơn số dòng này (hoặc tỉ lệ này) thì tính chính xác trên các dòng đó,
+# nhanh và chính xác hơn HNSW có filter
+EXACT_SEARCH_MAX_ROWS = 10_000
+EXACT_SEARCH_MAX_RATIO = 0.1
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, np.finfo(np.float32).tiny)
+
+
+class LocalIndex:
+    """Một index vector trong một thư mục.
+
+    - `vectors.npy`: vector đã chuẩn hóa (float32), memory-mapped, dòng i = document i
+    - `docs.sqlite3`: sidecar `doc_id`, `_source` (JSON) và cờ xóa của từng dòng
+    - `hnsw.bin`: đồ thị HNSW (nếu có hnswlib), build lại từ `vectors.npy` khi thiếu
+
+    Similarity là cosine; không có hnswlib thì tìm kiếm chính xác bằng numpy.
+
+    Nhiều process có thể mở cùng một index (vd. các worker dramatiq): mọi lần ghi
+    chạy trong transaction `BEGIN IMMEDIATE` (write lock của SQLite) nên được tuần tự
+    hóa, số dòng mới lấy từ SQLite; mỗi process nạp lại các dòng process khác đã
+    ghi (cột `gen`) trước khi đọc hoặc ghi.
+    """
+
+    def __init__(self, path: Path, dims: int | None = None) -> None:
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+
+        # Autocommit: transaction được mở tường minh (xem `_write`)
+        self._db = sqlite3.connect(
+            str(path / DOCS_FILE), timeout=60, isolation_level=None, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        # `gen`: generation của lần ghi cuối vào dòng
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            " row INTEGER PRIMARY KEY,"
+            " doc_id TEXT NOT NULL UNIQUE,"
+            " source TEXT NOT NULL,"
+            " deleted INTEGER NOT NULL DEFAULT 0,"
+            " gen INTEGER NOT NULL DEFAULT 0"
+            ")"
+        )
+        columns = {column[1] for column in self._db.execute("PRAGMA table_info(docs)")}
+        if "gen" not in columns:
+            self._db.execute("ALTER TABLE docs ADD COLUMN gen INTEGER NOT NULL DEFAULT 0")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+
+        # Bản sao trong bộ nhớ của sidecar để lọc nhanh (None = dòng đã xóa)
+        self._ids: dict[str, int] = {}
+        self._doc_ids: list[str | None] = []
+        self._sources: list[dict[str, Any] | None] = []
+        self._deleted: set[int] = set()
+        # Generation đã nạp (-1: chưa nạp gì); tăng sau mỗi lần ghi,
+        # `hnsw_generation` là generation lúc lưu `hnsw.bin`
+        self._generation = -1
+        self.dims: int | None = None
+        self._vectors: np.ndarray | None = None
+        self._vectors_inode: int | None = None
+        self._hnsw: Any = None
+        self._closed = False
+
+        with self._lock:
+            self._sync()
+        if self.dims is None and dims is not None:
+            with self._write():
+                if self.dims is None:
+                    self._set_dims(dims)
+
+    # ----------------- Thông tin -----------------
+    @property
+    def rows(self) -> int:
+        return len(self._sources)
+
+    def count(self) -> int:
+        with self._lock:
+            self._sync()
+            return self._count()
+
+    def info(self) -> dict[str, Any]:
+        with self._lock:
+            self._sync()
+            return {
+                "path": str(self.path),
+                "dims": self.dims,
+                "docs": self._count(),
+                "rows": self.rows,
+                "capacity": len(self._vectors) if self._vectors is not None else 0,
+                "hnsw": self._hnsw is not None,
+            }
+
+    # ----------------- Ghi -----------------
+    def upsert(
+        self,
+        doc_ids: list[str],
+        vectors: np.ndarray | None,
+        sources: list[dict[str, Any]],
+    ) -> None:
+        """Thêm hoặc ghi đè documents; `vectors` shape (n, dims) hoặc None (chỉ cập
+        nhật metadata của các document đang có, giữ vector cũ)."""
+        if vectors is not None:
+            vectors = np.asarray(vectors, dtype=np.float32).reshape(len(doc_ids), -1)
+        with self._write():
+            if vectors is None:
+                # Dòng mới (hoặc đã xóa) không có vector sẽ bị tính điểm trên ô trống
+                # hoặc vector cũ của `vectors.npy` khi search
+                missing = [
+                    doc_id
+                    for doc_id in doc_ids
+                    if doc_id not in self._ids or self._sources[self._ids[doc_id]] is None
+                ]
+                if missing:
+                    msg = f"Document mới cần vector: {', '.join(missing)}"
+                    raise ValueError(msg)
+            else:
+                if self.dims is None:
+                    self._set_dims(vectors.shape[1])
+                if vectors.shape[1] != self.dims:
+                    msg = f"Vector có {vectors.shape[1]} chiều, index cần {self.dims}"
+                    raise ValueError(msg)
+            self._bump_generation()
+
+            # Dòng mới lấy từ SQLite (trong transaction), không từ bản sao trong bộ nhớ
+            (next_row,) = self._db.execute(
+                "SELECT COALESCE(MAX(row) + 1, 0) FROM docs"
+            ).fetchone()
+            rows = []
+            for doc_id in doc_ids:
+                row = self._ids.get(doc_id)
+                if row is None:
+                    row = self._ids[doc_id] = next_row
+                    next_row += 1
+                    self._set_row(row, doc_id, None)
+                rows.append(row)
+
+            if vectors is not None:
+                self._ensure_capacity(self.rows)
+                assert self._vectors is not None
+                normalized = _normalize(vectors)
+                self._vectors[rows] = normalized
+                if self._hnsw is not None:
+                    self._hnsw.add_items(normalized, rows, replace_deleted=False)
+                    for row in rows:
+                        self._unmark_deleted(row)
+
+            for row, doc_id, source in zip(rows, doc_ids, sources):
+                self._set_row(row, doc_id, source)
+            self._db.executemany(
+                "INSERT OR REPLACE INTO docs (row, doc_id, source, deleted, gen)"
+                " VALUES (?, ?, ?, 0, ?)",
+                [
+                    (
+                        row,
+                        doc_id,
+                        json.dumps(source, ensure_ascii=False, default=str),
+                        self._generation,
+                    )
+                    for row, doc_id, source in zip(rows, doc_ids, sources)
+                ],
+            )
+
+    def delete(self, doc_id: str) -> bool:
+        with self._write():
+            row = self._ids.get(doc_id)
+            if row is None or self._sources[row] is None:
+                return False
+            self._bump_generation()
+            self._db.execute(
+                "UPDATE docs SET deleted = 1, gen = ? WHERE row = ?", (self._generation, row)
+            )
+            self._set_row(row, doc_id, None)
+            if self._hnsw is not None:
+                self._hnsw.mark_deleted(row)
+            return True
+
+    def flush(self) -> None:
+        """Ghi vector và đồ thị HNSW xuống đĩa.
+
+        Chạy trong transaction ghi nên chỉ một process lưu `hnsw.bin` mỗi lúc; file
+        được ghi ra file tạm rồi thay thế để process khác không đọc phải file dở.
+        """
+        with self._write():
+            if self._vectors is not None:
+                self._vectors.flush()
+            if self._hnsw is None or self._setting("hnsw_generation") == str(self._generation):
+                return
+            tmp_path = self.path / f"{HNSW_FILE}.tmp"
+            self._hnsw.save_index(str(tmp_path))
+            os.replace(tmp_path, self.path / HNSW_FILE)
+            self._set_setting("hnsw_generation", self._generation)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self.flush()
+            self._vectors = None
+            self._hnsw = None
+            self._db.close()
+            self._closed = True
+
+    # ----------------- Đọc -----------------
+    def get(self, doc_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            self._sync()
+            row = self._ids.get(doc_id)
+            return self._sources[row] if row is not None else None
+
+    def iter_docs(self) -> Iterator[tuple[str, dict[str, Any]]]:
+        """Các document còn lại theo thứ tự ghi."""
+        with self._lock:
+            self._sync()
+            docs = list(zip(self._doc_ids, self._sources))
+        for doc_id, source in docs:
+            if doc_id is not None and source is not None:
+                yield doc_id, source
+
+    def search(
+        self,
+        vector: Any,
+        k: int,
+        predicate: Callable[[dict[str, Any]], bool] | None = None,
+    ) -> list[tuple[str, float, dict[str, Any]]]:
+        """`k` document gần nhất (cosine) thỏa `predicate`: [(doc_id, cosine, source)].
+
+        Ít dòng (hoặc bộ lọc giữ lại ít dòng) thì tính chính xác bằng numpy, còn lại
+        dùng HNSW (kèm filter theo dòng).
+        """
+        with self._lock:
+            self._sync()
+            if self._vectors is None or k <= 0 or not self._count():
+                return []
+            query = _normalize(np.asarray(vector, dtype=np.float32).reshape(-1))
+
+            allowed = None
+            if predicate is not None:
+                allowed = [
+                    row
+                    for row, source in enumerate(self._sources)
+                    if source is not None and predicate(source)
+                ]
+                if not allowed:
+                    return []
+
+            candidates = len(allowed) if allowed is not None else self._count()
+            if self._hnsw is None or candidates <= EXACT_SEARCH_MAX_ROWS:
+                rows, scores = self._exact_search(query, allowed, k)
+            elif allowed is not None and candidates <= EXACT_SEARCH_MAX_RATIO * self.rows:
+                rows, scores = self._exact_search(query, allowed, k)
+            else:
+                try:
+                    rows, scores = self._hnsw_search(query, k, allowed)
+                except RuntimeError:
+                    # hnswlib không tìm đủ k kết quả (vd. ef quá nhỏ so với bộ lọc)
+                    rows, scores = self._exact_search(query, allowed, k)
+
+            return [
+                (self._doc_ids[row], float(score), self._sources[row])  # type: ignore[misc]
+                for row, score in zip(rows, scores)
+            ]
+
+    # ----------------- Nội bộ -----------------
+    def _count(self) -> int:
+        return self.rows - len(self._deleted)
+
+    @contextmanager
+    def _write(self) -> Iterator[None]:
+        """Transaction ghi: `BEGIN IMMEDIATE` giữ write lock của SQLite tới khi commit,
+        nên mỗi lúc chỉ một process/luồng ghi index. Trạng thái trong bộ nhớ được đồng
+        bộ với các lần ghi của process khác trước khi ghi; lỗi thì rollback và nạp lại.
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._sync()
+                yield
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                self._reload()
+                raise
+            self._db.execute("COMMIT")
+
+    def _sync(self) -> None:
+        """Nạp các dòng đã thay đổi từ generation đã nạp (do process khác ghi)."""
+        in_transaction = self._db.in_transaction
+        if not in_transaction:
+            # Đọc generation và các dòng trên cùng một snapshot
+            self._db.execute("BEGIN")
+        try:
+            generation = int(self._setting("generation") or 0)
+            if generation == self._generation:
+                return
+            changed = self._db.execute(
+                "SELECT row, doc_id, source, deleted FROM docs WHERE gen > ? ORDER BY row",
+                (self._generation,),
+            ).fetchall()
+            stored_dims = self._setting("dims")
+        finally:
+            if not in_transaction:
+                self._db.execute("COMMIT")
+
+        for row, doc_id, source, deleted in changed:
+            self._ids[doc_id] = row
+            self._set_row(row, doc_id, None if deleted else json.loads(source))
+        self._generation = generation
+        if self.dims is None and stored_dims is not None:
+            self.dims = int(stored_dims)
+        if self.dims is None:
+            return
+
+        # Process khác có thể đã thay `vectors.npy` bằng file lớn hơn (xem _ensure_capacity)
+        if self._vectors is None or self._vectors_replaced():
+            self._open_vectors()
+        if self._hnsw is None:
+            self._open_hnsw()
+            return
+        if self._hnsw.get_max_elements() < len(self._vectors):
+            self._hnsw.resize_index(len(self._vectors))
+        live = [
+            row for row, _, _, deleted in changed if not deleted and row < len(self._vectors)
+        ]
+        if live:
+            self._hnsw.add_items(self._vectors[live], live, replace_deleted=False)
+            for row in live:
+                self._unmark_deleted(row)
+        for row, _, _, deleted in changed:
+            if deleted:
+                self._mark_deleted(row)
+
+    def _reload(self) -> None:
+        # Sau rollback: bản sao trong bộ nhớ có thể đã lệch, nạp lại từ đầu
+        self._ids.clear()
+        self._doc_ids.clear()
+        self._sources.clear()
+        self._deleted.clear()
+        self._generation = -1
+        self._hnsw = None
+        self._sync()
+
+    def _set_row(self, row: int, doc_id: str, source: dict[str, Any] | None) -> None:
+        if row >= len(self._sources):
+            self._doc_ids.extend([None] * (row + 1 - len(self._doc_ids)))
+            self._sources.extend([None] * (row + 1 - len(self._sources)))
+        self._doc_ids[row] = doc_id
+        self._sources[row] = source
+        if source is None:
+            self._deleted.add(row)
+        else:
+            self._deleted.discard(row)
+
+    def _exact_search(
+        self, query: np.ndarray, allowed: list[int] | None, k: int
+    ) -> tuple[list[int], list[float]]:
+        assert self._vectors is not None
+        if allowed is None:
+            rows = np.arange(self.rows)
+            scores = self._vectors[: self.rows] @ query
+            if self._deleted:
+                scores[list(self._deleted)] = -np.inf
+            k = min(k, self._count())
+        else:
+            rows = np.asarray(allowed)
+            if len(rows) * 4 >= self.rows:
+                # Bộ lọc giữ nhiều dòng: nhân cả ma trận rẻ hơn copy các dòng được chọn
+                scores = (self._vectors[: self.rows] @ query)[rows]
+            else:
+                scores = self._vectors[rows] @ query
+            k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return rows[top].tolist(), scores[top].tolist()
+
+    def _hnsw_search(
+        self, query: np.ndarray, k: int, allowed: list[int] | None
+    ) -> tuple[list[int], list[float]]:
+        allowed_rows = set(allowed) if allowed is not None else None
+        k = min(k, len(allowed_rows) if allowed_rows is not None else self._count())
+        self._hnsw.set_ef(max(HNSW_EF_SEARCH, k))
+        labels, distances = self._hnsw.knn_query(
+            query,
+            k=k,
+            filter=(lambda row: row in allowed_rows) if allowed_rows is not None else None,
+        )
+        # space "ip": distance = 1 - dot, vector đã chuẩn hóa nên dot = cosine
+        return labels[0].tolist(), (1.0 - distances[0]).tolist()
+
+    def _setting(self, key: str) -> str | None:
+        row = self._db.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_setting(self, key: str, value: Any) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, str(value))
+        )
+
+    def _set_dims(self, dims: int) -> None:
+        # Trong transaction ghi: chỉ một process tạo `vectors.npy`
+        self.dims = dims
+        self._set_setting("dims", dims)
+        self._open_vectors()
+        self._open_hnsw()
+
+    def _bump_generation(self) -> None:
+        # Cùng transaction với thay đổi trong `docs`
+        self._generation += 1
+        self._set_setting("generation", self._generation)
+
+    def _open_vectors(self) -> None:
+        path = self.path / VECTORS_FILE
+        if path.exists():
+            self._vectors = np.load(path, mmap_mode="r+")
+        else:
+            self._vectors = np.lib.format.open_memmap(
+                path, mode="w+", dtype=np.float32, shape=(MIN_CAPACITY, self.dims)
+            )
+        self._vectors_inode = os.stat(path).st_ino
+
+    def _vectors_replaced(self) -> bool:
+        try:
+            return os.stat(self.path / VECTORS_FILE).st_ino != self._vectors_inode
+        except FileNotFoundError:
+            return False
+
+    def _ensure_capacity(self, rows: int) -> None:
+        assert self._vectors is not None
+        capacity = len(self._vectors)
+        if rows <= capacity:
+            return
+        while capacity < rows:
+            capacity *= 2
+
+        # Tạo file lớn hơn, chép dữ liệu cũ rồi thay thế file cũ
+        path = self.path / VECTORS_FILE
+        tmp_path = self.path / f"{VECTORS_FILE}.tmp"
+        grown = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=np.float32, shape=(capacity, self.dims)
+        )
+        grown[: len(self._vectors)] = self._vectors
+        grown.flush()
+        del grown
+        self._vectors = None
+        # Process khác vẫn đọc được file cũ qua mmap của nó và map lại file mới
+        # khi thấy inode đổi (xem _sync)
+        os.replace(tmp_path, path)
+        self._open_vectors()
+        if self._hnsw is not None:
+            self._hnsw.resize_index(capacity)
+        log.info("local_vectordb.index.grow", path=str(self.path), capacity=capacity)
+
+    def _open_hnsw(self) -> None:
+        if hnswlib is None:
+            return
+        assert self._vectors is not None
+        index = hnswlib.Index(space="ip", dim=self.dims)
+        path = self.path / HNSW_FILE
+        if path.exists() and self._setting("hnsw_generation") == str(self._generation):
+            index.load_index(str(path), max_elements=len(self._vectors))
+            self._hnsw = index
+            return
+        if path.exists():
+            log.warning("local_vectordb.hnsw.stale", path=str(path))
+
+        # Build lại từ vectors.npy (file HNSW thiếu hoặc cũ hơn dữ liệu, vd. chưa flush)
+        index = hnswlib.Index(space="ip", dim=self.dims)
+        index.init_index(
+            max_elements=len(self._vectors), M=HNSW_M, ef_construction=HNSW_EF_CONSTRUCTION
+        )
+        if self.rows:
+            index.add_items(self._vectors[: self.rows], np.arange(self.rows))
+        self._hnsw = index
+        for row in self._deleted:
+            self._mark_deleted(row)
+
+    def _mark_deleted(self, row: int) -> None:
+        try:
+            self._hnsw.mark_deleted(row)
+        except RuntimeError:
+            pass  # dòng không có trong đồ thị hoặc đã bị xóa
+
+    def _unmark_deleted(self, row: int) -> None:
+        try:
+            self._hnsw.unmark_deleted(row)
+        except RuntimeError:
+            pass  # dòng chưa từng bị xóa
+
+
+class LocalVectorStore:
+    """"Client" của backend local: mỗi index là một thư mục con của `path`."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._indices: dict[str, LocalIndex] = {}
+        self._lock = threading.Lock()
+        # Lưu đồ thị HNSW của các index khi process thoát
+        atexit.register(self.close)
+
+    def ping(self) -> bool:
+        """Thư mục store còn truy cập được (tương tự `OpenSearch.ping`)."""
+        return self.path.is_dir()
+
+    def exists(self, name: str) -> bool:
+        return name in self._indices or (self.path / name / DOCS_FILE).exists()
+
+    def get(self, name: str) -> LocalIndex | None:
+        with self._lock:
+            if name not in self._indices:
+                if not (self.path / name / DOCS_FILE).exists():
+                    return None
+                self._indices[name] = LocalIndex(self.path / name)
+            return self._indices[name]
+
+    def create(self, name: str, dims: int | None = None) -> LocalIndex:
+        with self._lock:
+            if name not in self._indices:
+                self._indices[name] = LocalIndex(self.path / name, dims)
+            return self._indices[name]
+
+    def drop(self, name: str) -> bool:
+        with self._lock:
+            index = self._indices.pop(name, None)
+            if index is not None:
+                index.close()
+            if not (self.path / name).exists():
+                return index is not None
+            shutil.rmtree(self.path / name)
+            return True
+
+    def close(self) -> None:
+        with self._lock:
+            for index in self._indices.values():
+                index.close()
+            self._indices.clear()
@@ -1,56 +1,152 @@
 from __future__ import annotations
 
-from typing import Any
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Literal
 
 from logger.src.logger import get_logger
 from opensearchpy import OpenSearch  # type: ignore
 
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
 log = get_logger(__name__)
 
-# Mapping cho email index
-EMAIL_INDEX_MAPPING = {
-    "mappings": {
-        "properties": {
-            "embedding": {
-                "type": "dense_vector",
-                "dims": 1536,  # Dimension cho OpenAI embedding
-                "index": True,
-                "similarity": "cosine"
-            },
-            "metadata": {
-                "properties": {
-                    "thread_id": {"type": "keyword"},
-                    "from": {"type": "keyword"},
-                    "to": {"type": "keyword"},
-                    "subject": {
-                        "type": "text",
-                        "analyzer": "standard"
-                    },
-                    "date": {"type": "date"},
-                    "labels_ids": {"type": "keyword"},
-                    "attachments": {
-                        "type": "nested",
-                        "properties": {
-                            "filename": {"type": "keyword"},
-                            "content": {
-                                "type": "text",
-                                "analyzer": "standard"
-                            }
-                        }
-                    }
+# Metadata của email index
+EMAIL_METADATA_MAPPING = {
+    "properties": {
+        "thread_id": {"type": "keyword"},
+        "from": {"type": "keyword"},
+        "to": {"type": "keyword"},
+        "subject": {
+            "type": "text",
+            "analyzer": "standard"
+        },
+        "date": {"type": "date"},
+        # Nguyên văn email (kể cả phần quote), chỉ lưu trong _source
+        "full_text": {"type": "text", "index": False},
+        # Email gần trùng với email đã index (dùng lại embedding của nó)
+        "duplicate_of": {"type": "keyword"},
+        "labels_ids": {"type": "keyword"},
+        "attachments": {
+            "type": "nested",
+            "properties": {
+                "filename": {"type": "keyword"},
+                "duplicate_of": {"type": "keyword"},
+                "content": {
+                    "type": "text",
+                    "analyzer": "standard"
                 }
             }
         }
-    },
-    "settings": {
-        "index": {
-            "number_of_shards": 1,
-            "number_of_replicas": 0,
-            "refresh_interval": "1s"
-        }
     }
 }
 
+# Cách lưu vector trong index k-NN:
+# - "none": float32 (lucene HNSW, cosine)
+# - "byte": int8, lượng tử hóa phía client (`_encode_vector`), 1/4 dung lượng
+# - "fp16": faiss HNSW + scalar quantization fp16, 1/2 dung lượng
+# - "pq": faiss IVF + product quantization, cần model đã train (`train_pq_model`)
+VectorQuantization = Literal["none", "byte", "fp16", "pq"]
+
+
+def _knn_vector_mapping(
+    dims: int, quantization: VectorQuantization, pq_model_id: str | None
+) -> dict[str, Any]:
+    if quantization == "pq":
+        if pq_model_id is None:
+            msg = "quantization='pq' cần pq_model_id (xem train_pq_model)"
+            raise ValueError(msg)
+        return {"type": "knn_vector", "model_id": pq_model_id}
+
+    if quantization == "fp16":
+        # faiss với vector đã chuẩn hóa: inner product tương đương cosine
+        return {
+            "type": "knn_vector",
+            "dimension": dims,
+            "method": {
+                "name": "hnsw",
+                "engine": "faiss",
+                "space_type": "innerproduct",
+                "parameters": {"encoder": {"name": "sq", "parameters": {"type": "fp16"}}},
+            },
+        }
+
+    mapping: dict[str, Any] = {
+        "type": "knn_vector",
+        "dimension": dims,
+        "method": {"name": "hnsw", "engine": "lucene", "space_type": "cosinesimil"},
+    }
+    if quantization == "byte":
+        mapping["data_type"] = "byte"
+    return mapping
+
+
+def build_email_index_mapping(
+    dims: int = 1536,
+    quantization: VectorQuantization = "none",
+    *,
+    pq_model_id: str | None = None,
+    exclude_vector_from_source: bool = True,
+) -> dict[str, Any]:
+    """Mapping + settings của email index với trường `embedding` kiểu `knn_vector`.
+
+    Với `exclude_vector_from_source`, vector chỉ nằm trong cấu trúc k-NN, không
+    lưu thêm một bản JSON trong `_source` (không đọc lại được vector qua get/search
+    hay reindex từ `_source`).
+    """
+    mappings: dict[str, Any] = {
+        "properties": {
+            "embedding": _knn_vector_mapping(dims, quantization, pq_model_id),
+            "metadata": EMAIL_METADATA_MAPPING,
+        }
+    }
+    if exclude_vector_from_source:
+        mappings["_source"] = {"excludes": ["embedding"]}
+
+    return {
+        "mappings": mappings,
+        "settings": {
+            "index": {
+                "knn": True,
+                "number_of_shards": 1,
+                "number_of_replicas": 0,
+                "refresh_interval": "1s"
+            }
+        }
+    }
+
+
+# Mapping cho email index (1536 chiều của OpenAI embedding, float32)
+EMAIL_INDEX_MAPPING = build_email_index_mapping()
+
+
+def _vector_to_list(vector: Any) -> list[float]:
+    """Chuyển vector (list hoặc numpy array float32) sang list để serialize JSON.
+
+    `ndarray.tolist()` chuyển cả mảng ở tầng C, nhanh hơn nhiều so với duyệt
+    từng phần tử; không import numpy để vectordb không phụ thuộc vào nó.
+    """
+    tolist = getattr(vector, "tolist", None)
+    return tolist() if tolist is not None else vector
+
+
+def _encode_vector(vector: Any, quantization: VectorQuantization = "none") -> list[Any]:
+    """Vector gửi lên OpenSearch: float, hoặc int8 với `quantization="byte"`.
+
+    Mỗi vector được co giãn để thành phần lớn nhất (trị tuyệt đối) thành 127;
+    cosine không đổi khi co giãn nên thứ hạng kết quả gần như giữ nguyên.
+    """
+    if quantization != "byte":
+        return _vector_to_list(vector)
+
+    if hasattr(vector, "astype"):
+        # numpy array: tính ở tầng C
+        scale = 127.0 / max(float(abs(vector).max()), 1e-12)
+        return (vector * scale).round().clip(-128, 127).astype("int8").tolist()
+
+    scale = 127.0 / max(max(abs(x) for x in vector), 1e-12)
+    return [max(-128, min(127, round(x * scale))) for x in vector]
+
 
 # ----------------- Client -----------------
 def new_os_client(url: str, user: str, password: str) -> OpenSearch:
@@ -140,12 +236,340 @@ def get_index_info(os_client: OpenSearch, index: str) -> dict[str, Any] | None:
         return None
 
 
+# ----------------- Index Lifecycle -----------------
+# Dữ liệu được chia thành nhiều index con `<base>-...` thay vì một index duy nhất:
+# - "monthly": `<base>-YYYY.MM` theo ngày của document (ghi thẳng vào index của tháng)
+# - "rollover": `<base>-000001`, `<base>-000002`... ghi qua write alias, chuyển sang
+#   index mới khi index hiện tại đủ lớn/đủ cũ (`rollover_index`)
+# Mọi index con dùng chung mapping qua index template và cùng nằm sau read alias.
+RolloverStrategy = Literal["monthly", "rollover"]
+
+
+def read_alias(base: str) -> str:
+    """Alias để search trên mọi index con."""
+    return f"{base}-read"
+
+
+def write_alias(base: str) -> str:
+    """Alias trỏ tới index con đang được ghi (chiến lược "rollover")."""
+    return f"{base}-write"
+
+
+def _to_utc(value: datetime | str) -> datetime:
+    """Chuẩn hóa ngày (datetime hoặc chuỗi ISO) về UTC; không có múi giờ thì coi là UTC."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def monthly_index_name(base: str, date: datetime | str | None = None) -> str:
+    """Tên index con của tháng chứa `date` (mặc định là tháng hiện tại), vd. `emails-2025.01`."""
+    date = _to_utc(date) if date is not None else datetime.now(timezone.utc)
+    return f"{base}-{date:%Y.%m}"
+
+
+def monthly_indices_in_range(
+    base: str, start: datetime | str, end: datetime | str
+) -> list[str]:
+    """Các index con theo tháng phủ khoảng [start, end]."""
+    start, end = _to_utc(start), _to_utc(end)
+    year, month = start.year, start.month
+    indices = []
+    while (year, month) <= (end.year, end.month):
+        indices.append(f"{base}-{year:04d}.{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return indices
+
+
+def put_index_template(
+    os_client: OpenSearch, base: str, mapping: dict[str, Any] | None = None
+) -> dict[str, Any] | None:
+    """Tạo/cập nhật index template cho `<base>-*`: mapping, settings và read alias.
+
+    Index con được tạo tự động (khi ghi vào index tháng mới hoặc khi rollover)
+    sẽ nhận mapping này.
+    """
+    if mapping is None:
+        mapping = EMAIL_INDEX_MAPPING
+    try:
+        response = os_client.indices.put_index_template(
+            name=base,
+            body={
+                "index_patterns": [f"{base}-*"],
+                "priority": 100,
+                "template": {
+                    "settings": mapping.get("settings", {}),
+                    "mappings": mapping.get("mappings", {}),
+                    "aliases": {read_alias(base): {}},
+                },
+            },
+        )
+        log.info("os_service.put_index_template.success", base=base)
+        return response
+
+    except Exception as e:
+        log.error("os_service.put_index_template.error", base=base, error=str(e))
+        raise
+
+
+def setup_rollover_indices(
+    os_client: OpenSearch,
+    base: str,
+    strategy: RolloverStrategy,
+    mapping: dict[str, Any] | None = None,
+) -> None:
+    """Chuẩn bị index template và alias cho `base` (gọi lại nhiều lần không sao).
+
+    Với "rollover", tạo index con đầu tiên `<base>-000001` làm write index nếu
+    write alias chưa có. Nếu index `base` cũ (một index duy nhất) còn tồn tại, nó
+    được thêm vào read alias để dữ liệu cũ vẫn search được.
+    """
+    try:
+        put_index_template(os_client, base, mapping)
+
+        if strategy == "rollover" and not os_client.indices.exists_alias(
+            name=write_alias(base)
+        ):
+            first_index = f"{base}-000001"
+            os_client.indices.create(
+                index=first_index,
+                body={"aliases": {write_alias(base): {"is_write_index": True}}},
+            )
+            log.info("os_service.setup_rollover_indices.created", index=first_index)
+
+        if os_client.indices.exists(index=base) and not os_client.indices.exists_alias(
+            name=base
+        ):
+            os_client.indices.put_alias(index=base, name=read_alias(base))
+
+        log.info("os_service.setup_rollover_indices.success", base=base, strategy=strategy)
+
+    except Exception as e:
+        log.error("os_service.setup_rollover_indices.error", base=base, error=str(e))
+        raise
+
+
+def rollover_index(
+    os_client: OpenSearch,
+    base: str,
+    *,
+    max_size: str | None = "30gb",
+    max_age: str | None = "30d",
+    max_docs: int | None = None,
+) -> dict[str, Any] | None:
+    """Chuyển write alias sang index con mới nếu index hiện tại thỏa một điều kiện.
+
+    Nên gọi định kỳ (vd. đầu mỗi lần ingest); không thỏa điều kiện nào thì không làm gì.
+    """
+    conditions: dict[str, Any] = {}
+    if max_size is not None:
+        conditions["max_size"] = max_size
+    if max_age is not None:
+        conditions["max_age"] = max_age
+    if max_docs is not None:
+        conditions["max_docs"] = max_docs
+
+    try:
+        response = os_client.indices.rollover(
+            alias=write_alias(base), body={"conditions": conditions}
+        )
+        log.info(
+            "os_service.rollover_index.success",
+            base=base,
+            rolled_over=response.get("rolled_over"),
+            new_index=response.get("new_index"),
+        )
+        return response
+
+    except Exception as e:
+        log.error("os_service.rollover_index.error", base=base, error=str(e))
+        return None
+
+
+def list_backing_indices(os_client: OpenSearch, base: str) -> list[str]:
+    """Các index con `<base>-*`, theo thứ tự tạo (tên tăng dần)."""
+    try:
+        response = os_client.indices.get_alias(index=f"{base}-*")
+        return sorted(response)
+
+    except Exception as e:
+        log.error("os_service.list_backing_indices.error", base=base, error=str(e))
+        return []
+
+
+def force_merge_old_indices(
+    os_client: OpenSearch,
+    base: str,
+    *,
+    keep: int = 1,
+    max_num_segments: int = 1,
+    request_timeout: int = 3600,
+) -> list[str]:
+    """Force-merge các index con cũ về `max_num_segments` segment.
+
+    Index con cũ gần như không còn được ghi: gộp segment giúp search nhanh hơn và
+    giảm dung lượng. Bỏ qua `keep` index mới nhất và write index hiện tại. Index
+    đã gộp rồi thì lệnh gần như không tốn gì.
+    """
+    try:
+        aliases = os_client.indices.get_alias(index=f"{base}-*")
+    except Exception as e:
+        log.error("os_service.force_merge_old_indices.error", base=base, error=str(e))
+        return []
+
+    indices = sorted(aliases)
+    old_indices = [
+        index
+        for index in (indices[:-keep] if keep > 0 else indices)
+        if not aliases[index]
+        .get("aliases", {})
+        .get(write_alias(base), {})
+        .get("is_write_index", False)
+    ]
+
+    merged = []
+    for index in old_indices:
+        try:
+            os_client.indices.forcemerge(
+                index=index,
+                max_num_segments=max_num_segments,
+                request_timeout=request_timeout,
+            )
+            merged.append(index)
+            log.info("os_service.force_merge.success", index=index)
+        except Exception as e:
+            log.error("os_service.force_merge.error", index=index, error=str(e))
+    return merged
+
+
+def search_time_range(
+    os_client: OpenSearch,
+    base: str,
+    query: dict[str, Any],
+    start: datetime | str,
+    end: datetime | str,
+    *,
+    strategy: RolloverStrategy = "monthly",
+    date_field: str = "metadata.date",
+    size: int = 10,
+) -> dict[str, Any] | None:
+    """Search trong khoảng [start, end] của `date_field`.
+
+    Với "monthly" chỉ search các index con của các tháng trong khoảng (tháng chưa
+    có index thì bỏ qua); với "rollover" search qua read alias, OpenSearch tự bỏ
+    qua các shard không có document nào trong khoảng.
+    """
+    if strategy == "monthly":
+        index = ",".join(monthly_indices_in_range(base, start, end))
+    else:
+        index = read_alias(base)
+
+    date_filter = {
+        "range": {
+            date_field: {
+                "gte": _to_utc(start).isoformat(),
+                "lte": _to_utc(end).isoformat(),
+            }
+        }
+    }
+    body = {
+        **query,
+        "query": {
+            "bool": {
+                "must": [query.get("query", {"match_all": {}})],
+                "filter": [date_filter],
+            }
+        },
+    }
+
+    try:
+        response = os_client.search(
+            index=index,
+            body=body,
+            size=size,
+            ignore_unavailable=True,
+            allow_no_indices=True,
+        )
+        log.info(
+            "os_service.search_time_range.success",
+            index=index,
+            hits=response["hits"]["total"]["value"],
+        )
+        return response
+
+    except Exception as e:
+        log.error("os_service.search_time_range.error", index=index, error=str(e))
+        return None
+
+
+# ----------------- Vector Quantization -----------------
+def train_pq_model(
+    os_client: OpenSearch,
+    model_id: str,
+    training_index: str,
+    dims: int,
+    *,
+    training_field: str = "embedding",
+    m: int = 96,
+    code_size: int = 8,
+    nlist: int = 256,
+    max_training_vector_count: int = 100_000,
+) -> dict[str, Any] | None:
+    """Train model IVF-PQ (faiss) từ vector float trong `training_index`.
+
+    Mỗi vector được chia thành `m` đoạn, mỗi đoạn lưu bằng `code_size` bit: với
+    1536 chiều và m=96 là 96 byte/vector thay vì 6 KB. `dims` phải chia hết cho `m`.
+    Index dùng model này tạo bằng `build_email_index_mapping(quantization="pq",
+    pq_model_id=model_id)` sau khi model ở trạng thái `created`.
+    """
+    body = {
+        "training_index": training_index,
+        "training_field": training_field,
+        "dimension": dims,
+        "max_training_vector_count": max_training_vector_count,
+        "description": f"IVF-PQ m={m} code_size={code_size} nlist={nlist}",
+        "method": {
+            "name": "ivf",
+            "engine": "faiss",
+            "space_type": "innerproduct",
+            "parameters": {
+                "nlist": nlist,
+                "encoder": {"name": "pq", "parameters": {"m": m, "code_size": code_size}},
+            },
+        },
+    }
+    try:
+        response = os_client.transport.perform_request(
+            "POST", f"/_plugins/_knn/models/{model_id}/_train", body=body
+        )
+        log.info("os_service.train_pq_model.started", model_id=model_id, m=m)
+        return response
+
+    except Exception as e:
+        log.error("os_service.train_pq_model.error", model_id=model_id, error=str(e))
+        return None
+
+
 # ----------------- Document Operations -----------------
 def upload_document(
-    os_client: OpenSearch, index: str, doc_id: str, payload: dict[str, Any]
+    os_client: OpenSearch,
+    index: str,
+    doc_id: str,
+    payload: dict[str, Any],
+    quantization: VectorQuantization = "none",
 ) -> dict[str, Any] | None:
-    """Upload hoặc update một document vào OpenSearch."""
+    """Upload hoặc update một document vào OpenSearch.
+
+    `quantization` phải khớp với mapping của index (xem `build_email_index_mapping`).
+    """
     try:
+        if "embedding" in payload:
+            payload = {
+                **payload,
+                "embedding": _encode_vector(payload["embedding"], quantization),
+            }
         response = os_client.index(
             index=index,
             id=doc_id,
@@ -205,19 +629,30 @@ def delete_document(os_client: OpenSearch, index: str, doc_id: str) -> dict[str,
 def bulk_upload_documents(
     os_client: OpenSearch,
     index: str,
-    documents: list[dict[str, Any]]
+    documents: list[dict[str, Any]],
+    embeddings: Any | None = None,
+    quantization: VectorQuantization = "none",
 ) -> dict[str, Any] | None:
-    """Upload nhiều documents cùng lúc để tăng performance."""
+    """Upload nhiều documents cùng lúc để tăng performance.
+
+    `embeddings` (tùy chọn) là mảng float32 shape (n, dims), dòng i là embedding
+    của `documents[i]`; khi không truyền thì lấy `doc["embedding"]`.
+    """
     try:
         from opensearchpy.helpers import bulk
 
+        if embeddings is not None and len(embeddings) != len(documents):
+            msg = "Số embeddings không khớp với số documents"
+            raise ValueError(msg)
+
         actions = []
-        for doc in documents:
+        for i, doc in enumerate(documents):
+            embedding = embeddings[i] if embeddings is not None else doc["embedding"]
             action = {
                 "_index": index,
                 "_id": doc["id"],
                 "_source": {
-                    "embedding": doc["embedding"],
+                    "embedding": _encode_vector(embedding, quantization),
                     "metadata": doc["metadata"]
                 }
             }
@@ -233,17 +668,52 @@ def bulk_upload_documents(
 
 
 # ----------------- Search Operations -----------------
+def _with_source_filter(
+    body: dict[str, Any],
+    source_includes: list[str] | None = None,
+    source_excludes: list[str] | None = None,
+    docvalue_fields: list[str] | None = None,
+) -> dict[str, Any]:
+    """Thêm lọc `_source` và `docvalue_fields` vào body search (không sửa body gốc).
+
+    `source_includes=[]` bỏ hẳn `_source` (chỉ lấy id/score/docvalue_fields).
+    `docvalue_fields` đọc giá trị từ doc values (keyword, date...) thay vì parse
+    `_source`, rẻ hơn khi chỉ cần vài trường.
+    """
+    body = dict(body)
+    if source_includes is not None and not source_includes and not source_excludes:
+        body["_source"] = False
+    elif source_includes is not None or source_excludes is not None:
+        body["_source"] = {
+            "includes": source_includes or [],
+            "excludes": source_excludes or [],
+        }
+    if docvalue_fields:
+        body["docvalue_fields"] = docvalue_fields
+    return body
+
+
 def search_documents(
     os_client: OpenSearch,
     index: str,
     query: dict[str, Any],
-    size: int = 10
+    size: int = 10,
+    *,
+    source_includes: list[str] | None = None,
+    source_excludes: list[str] | None = None,
+    docvalue_fields: list[str] | None = None,
 ) -> dict[str, Any] | None:
-    """Tìm kiếm documents."""
+    """Tìm kiếm documents.
+
+    Chỉ trả về `size` kết quả đầu; duyệt sâu hơn dùng `iter_search_after` hoặc
+    `scan_documents`.
+    """
     try:
         response = os_client.search(
             index=index,
-            body=query,
+            body=_with_source_filter(
+                query, source_includes, source_excludes, docvalue_fields
+            ),
             size=size
         )
         log.info("os_service.search_documents.success", index=index, hits=response["hits"]["total"]["value"])
@@ -257,19 +727,32 @@ def search_documents(
 def vector_search(
     os_client: OpenSearch,
     index: str,
-    query_vector: list[float],
+    query_vector: Any,
     size: int = 10,
-    min_score: float = 0.0
+    min_score: float = 0.0,
+    quantization: VectorQuantization = "none",
+    *,
+    filter: dict[str, Any] | None = None,  # noqa: A002
+    source_includes: list[str] | None = None,
+    source_excludes: list[str] | None = None,
+    docvalue_fields: list[str] | None = None,
 ) -> dict[str, Any] | None:
-    """Tìm kiếm vector similarity."""
+    """Tìm kiếm vector similarity.
+
+    `filter` (query DSL) được áp dụng trong lúc tìm k-NN (lucene/faiss), nên vẫn
+    trả về đủ `size` kết quả khớp bộ lọc.
+    """
     try:
+        knn: dict[str, Any] = {
+            "vector": _encode_vector(query_vector, quantization),
+            "k": size
+        }
+        if filter is not None:
+            knn["filter"] = filter
         query = {
             "query": {
                 "knn": {
-                    "embedding": {
-                        "vector": query_vector,
-                        "k": size
-                    }
+                    "embedding": knn
                 }
             },
             "min_score": min_score
@@ -277,7 +760,9 @@ def vector_search(
 
         response = os_client.search(
             index=index,
-            body=query,
+            body=_with_source_filter(
+                query, source_includes, source_excludes, docvalue_fields
+            ),
             size=size
         )
         log.info("os_service.vector_search.success", index=index, hits=response["hits"]["total"]["value"])
@@ -288,6 +773,166 @@ def vector_search(
         return None
 
 
+# ----------------- Pagination -----------------
+def open_point_in_time(
+    os_client: OpenSearch, index: str, keep_alive: str = "5m"
+) -> str | None:
+    """Mở point-in-time (PIT): ảnh chụp cố định của index để phân trang nhất quán."""
+    try:
+        response = os_client.create_pit(index=index, params={"keep_alive": keep_alive})
+        log.info("os_service.open_point_in_time.success", index=index)
+        return response["pit_id"]
+
+    except Exception as e:
+        log.error("os_service.open_point_in_time.error", index=index, error=str(e))
+        return None
+
+
+def close_point_in_time(os_client: OpenSearch, pit_id: str) -> None:
+    """Đóng PIT để OpenSearch giải phóng các segment đang giữ."""
+    try:
+        os_client.delete_pit(body={"pit_id": [pit_id]})
+        log.info("os_service.close_point_in_time.success")
+
+    except Exception as e:
+        log.error("os_service.close_point_in_time.error", error=str(e))
+
+
+# Tiebreaker của PIT: (shard, doc id Lucene) duy nhất trên mọi shard/index của PIT
+PIT_TIEBREAKER = {"_shard_doc": "asc"}
+
+
+def _with_tiebreaker(sort: list[Any] | None) -> list[Any]:
+    """`sort` kèm `_shard_doc` ở cuối (nếu chưa có) để thứ tự luôn duy nhất."""
+    sort = list(sort or [])
+    if not any(
+        key == "_shard_doc" or (isinstance(key, dict) and "_shard_doc" in key)
+        for key in sort
+    ):
+        sort.append(PIT_TIEBREAKER)
+    return sort
+
+
+def search_after_page(
+    os_client: OpenSearch,
+    pit_id: str,
+    query: dict[str, Any],
+    size: int = 100,
+    *,
+    sort: list[Any] | None = None,
+    search_after: list[Any] | None = None,
+    keep_alive: str = "5m",
+    source_includes: list[str] | None = None,
+    source_excludes: list[str] | None = None,
+    docvalue_fields: list[str] | None = None,
+) -> dict[str, Any] | None:
+    """Một trang kết quả trong PIT `pit_id`, tiếp sau `search_after`.
+
+    `search_after` của trang kế là `hits[-1]["sort"]` của trang này. Thứ tự phải
+    duy nhất để không bỏ sót/lặp hit giữa các trang: `_shard_doc` luôn được thêm vào
+    cuối `sort` làm tiebreaker (mặc định chỉ sort theo `_shard_doc`). `_doc` một
+    mình không đủ vì doc id chỉ duy nhất trong một shard.
+    """
+    body = _with_source_filter(query, source_includes, source_excludes, docvalue_fields)
+    body["pit"] = {"id": pit_id, "keep_alive": keep_alive}
+    body["sort"] = _with_tiebreaker(sort)
+    body["track_total_hits"] = False
+    if search_after is not None:
+        body["search_after"] = search_after
+
+    try:
+        return os_client.search(body=body, size=size)
+
+    except Exception as e:
+        log.error("os_service.search_after_page.error", error=str(e))
+        return None
+
+
+def iter_search_after(
+    os_client: OpenSearch,
+    index: str,
+    query: dict[str, Any],
+    page_size: int = 1000,
+    *,
+    sort: list[Any] | None = None,
+    keep_alive: str = "5m",
+    source_includes: list[str] | None = None,
+    source_excludes: list[str] | None = None,
+    docvalue_fields: list[str] | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Duyệt mọi hit theo `sort` (kèm tiebreaker `_shard_doc`) bằng `search_after`
+    trong một PIT.
+
+    Mỗi lần chỉ giữ một trang trong bộ nhớ; PIT được đóng khi duyệt xong hoặc
+    khi iterator bị đóng giữa chừng.
+    """
+    pit_id = open_point_in_time(os_client, index, keep_alive)
+    if pit_id is None:
+        return
+
+    try:
+        search_after = None
+        pages = 0
+        while True:
+            response = search_after_page(
+                os_client,
+                pit_id,
+                query,
+                page_size,
+                sort=sort,
+                search_after=search_after,
+                keep_alive=keep_alive,
+                source_includes=source_includes,
+                source_excludes=source_excludes,
+                docvalue_fields=docvalue_fields,
+            )
+            if response is None:
+                msg = f"Lỗi khi lấy trang {pages + 1} của index {index}"
+                raise RuntimeError(msg)
+
+            hits = response["hits"]["hits"]
+            yield from hits
+            pages += 1
+            if len(hits) < page_size:
+                break
+            search_after = hits[-1]["sort"]
+
+        log.info("os_service.iter_search_after.success", index=index, pages=pages)
+    finally:
+        close_point_in_time(os_client, pit_id)
+
+
+def scan_documents(
+    os_client: OpenSearch,
+    index: str,
+    query: dict[str, Any] | None = None,
+    page_size: int = 1000,
+    *,
+    scroll: str = "5m",
+    source_includes: list[str] | None = None,
+    source_excludes: list[str] | None = None,
+    docvalue_fields: list[str] | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Duyệt mọi document khớp `query` (không theo thứ tự) để export.
+
+    Dùng scroll theo `_doc`, cách rẻ nhất để đọc hết index; mỗi lần chỉ giữ một
+    trang `page_size` hit trong bộ nhớ.
+    """
+    from opensearchpy.helpers import scan
+
+    body = _with_source_filter(
+        query or {"query": {"match_all": {}}},
+        source_includes,
+        source_excludes,
+        docvalue_fields,
+    )
+    count = 0
+    for hit in scan(os_client, query=body, index=index, size=page_size, scroll=scroll):
+        count += 1
+        yield hit
+    log.info("os_service.scan_documents.success", index=index, count=count)
+
+
 # ----------------- Index Stats -----------------
 def get_index_stats(os_client: OpenSearch, index: str) -> dict[str, Any] | None:
     """Lấy thống kê index."""
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from functools import cached_property
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, Literal
 
 from pydantic import AnyUrl, Field, SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -53,6 +53,9 @@ class WorkflowsBaseConfig(BaseSettings):
     open_url: AnyUrl
     open_user: Annotated[str, Field(min_length=3)]
     open_password: Annotated[SecretStr, Field(min_length=8)]
+    # Backend vector DB: "opensearch" hoặc "local" (index trong process, lưu ở
+    # cache_dir/vectordb; cho máy dev, test và cài đặt nhỏ không có OpenSearch)
+    vector_backend: Literal["opensearch", "local"] = "opensearch"
 
     # == Chunking config ==
     chunk_size: Annotated[int, Field(gt=0)] = 300
@@ -62,17 +65,44 @@ class WorkflowsBaseConfig(BaseSettings):
     openai_api_url: AnyUrl
     model_llm_id: Annotated[str, Field(min_length=3)]
     openai_api_key: Annotated[str, Field(min_length=3)]
+    # Giới hạn của endpoint, dùng chung cho mọi client trong process (None = không giới hạn)
+    openai_requests_per_minute: Annotated[int, Field(gt=0)] | None = None
+    openai_tokens_per_minute: Annotated[int, Field(gt=0)] | None = None
+    openai_max_retries: Annotated[int, Field(ge=0)] = 5
 
     # == Local model IDs ==
     model_tokenizer_id: Annotated[str, Field(min_length=3)]
     model_embedding_id: Annotated[str, Field(min_length=3)]
     model_pdf_id: Annotated[str, Field(min_length=3)]
 
+    # == Embedding cache ==
+    # Vector đã embed được lưu trong SQLite ở cache_dir, tránh gọi lại API cho cùng text
+    embedding_cache_enabled: bool = True
+    embedding_cache_size_mb: Annotated[int, Field(gt=0)] | None = 2048
+    # Chỉ giữ `embedding_dimensions` chiều đầu của vector và chuẩn hóa lại (Matryoshka);
+    # chỉ dùng với model hỗ trợ (vd. text-embedding-3-*). None = giữ nguyên số chiều
+    embedding_dimensions: Annotated[int, Field(gt=0)] | None = None
+
+    # == Lưu vector trong OpenSearch ==
+    # Số chiều vector của model (khi không cắt bớt bằng `embedding_dimensions`)
+    opensearch_vector_dims: Annotated[int, Field(gt=0)] = 1536
+    # Lượng tử hóa vector: "none" (float32), "byte" (int8), "fp16", "pq" (cần model đã train)
+    opensearch_vector_quantization: Literal["none", "byte", "fp16", "pq"] = "none"
+    opensearch_pq_model_id: Annotated[str, Field(min_length=1)] | None = None
+
     # == MinIO embedding ==
     minio_endpoint: AnyUrl
     minio_access_key: Annotated[str, Field(min_length=3)]
     minio_secret_key: Annotated[SecretStr, Field(min_length=3)]
     minio_bucket: Annotated[str, Field(min_length=1)]
+    # Số luồng tải song song và kích thước mỗi đoạn (ranged GET) khi tải model
+    model_download_workers: Annotated[int, Field(gt=0)] = 16
+    model_download_chunk_size_mb: Annotated[int, Field(gt=0)] = 64
+
+    # == Local LLM (llama.cpp) ==
+    # Tổng dung lượng model được giữ trong RAM mỗi process (None = không giới hạn)
+    model_memory_budget_mb: Annotated[int, Field(gt=0)] | None = None
+    model_use_mlock: bool = False
 
     ## == Mail ==
     after_mail: Annotated[str, Field(min_length=1)]
@@ -80,6 +110,34 @@ class WorkflowsBaseConfig(BaseSettings):
     table_mail: Path
     col_name: Annotated[str, Field(min_length=1)]
     sheet_name: Annotated[str, Field(min_length=1)]
+    # Chỉ embed/index phần nội dung mới của mỗi email (bỏ phần quote các reply trước)
+    mail_strip_quotes: bool = True
+    # Lưu thêm nguyên văn email vào `metadata.full_text` (chỉ lưu, không index)
+    mail_store_full_text: bool = False
+    # Ngưỡng độ giống (Jaccard ước lượng bằng MinHash) để coi email/tệp đính kèm là gần trùng
+    near_duplicate_threshold: Annotated[float, Field(gt=0, le=1)] = 0.85
+    # Số email/tệp đính kèm (mỗi loại) giữ chữ ký MinHash trong bộ nhớ (LRU); lúc bắt
+    # đầu crawl được nạp lại từ vector DB
+    near_duplicate_max_items: Annotated[int, Field(gt=0)] | None = 100_000
+    # Số luồng mỗi bước của pipeline xử lý mail (fetch -> extract -> embed -> index)
+    mail_fetch_workers: Annotated[int, Field(gt=0)] = 4
+    mail_extract_workers: Annotated[int, Field(gt=0)] = 2
+    mail_embed_workers: Annotated[int, Field(gt=0)] = 4
+    mail_index_workers: Annotated[int, Field(gt=0)] = 2
+    mail_pipeline_queue_size: Annotated[int, Field(gt=0)] = 32
+    # Cách chia index email: "single" (một index `emails`), "monthly" (`emails-YYYY.MM`
+    # theo ngày gửi) hoặc "rollover" (`emails-000001`..., sang index mới theo dung lượng/tuổi)
+    mail_index_strategy: Literal["single", "monthly", "rollover"] = "single"
+    mail_index_rollover_max_size: Annotated[str, Field(min_length=2)] = "30gb"
+    mail_index_rollover_max_age: Annotated[str, Field(min_length=2)] = "30d"
+    # Gộp segment các index con cũ sau mỗi lần ingest (chỉ với "monthly"/"rollover")
+    mail_index_force_merge: bool = True
+
+    # == Metrics ==
+    # Port endpoint Prometheus `/metrics` của worker dramatiq (None = tắt)
+    metrics_port: Annotated[int, Field(gt=0, lt=65536)] | None = 9464
+    # Mỗi process worker dùng một port riêng trong `metrics_port`..`metrics_port + count - 1`
+    metrics_port_count: Annotated[int, Field(gt=0)] = 16
 
     @cached_property
     def model_tokenizer_dir(self) -> Path:
@@ -89,6 +147,18 @@ class WorkflowsBaseConfig(BaseSettings):
     def model_pdf_dir(self) -> Path:
         return self.cache_dir / self.model_pdf_id
 
+    @cached_property
+    def mail_progress_dir(self) -> Path:
+        return self.cache_dir / "mail_progress"
+
+    @cached_property
+    def embedding_cache_path(self) -> Path:
+        return self.cache_dir / "embedding_cache.sqlite3"
+
+    @cached_property
+    def local_vectordb_dir(self) -> Path:
+        return self.cache_dir / "vectordb"
+
     @cached_property
     def minio_embedding_path(self) -> str:
         return self.cache_dir / self.model_embedding_id
@@ -1,6 +1,7 @@
 import base64
 import logging
 import os
+import threading
 import warnings
 
 import pandas as pd
@@ -11,8 +12,21 @@ from google_auth_oauthlib.flow import InstalledAppFlow  # noqa: E402
 from googleapiclient.discovery import build  # noqa: E402
 from simplegmail.query import construct_query
 from docling_core.types.doc import ImageRefMode, PictureItem, TableItem
+from libs.vectordb.src.vectordb.local import local_service
 from libs.vectordb.src.vectordb.opensearch import os_service
+from logger.src.logger.async_sink import setup_file_logging
+from logger.src.logger.rate_limit import RateLimitFilter
 from workflows.config import get_config
+from workflows.converter.mail_progress import MailProgress, OrderedThreadCommitter
+from workflows.converter.near_duplicates import get_near_duplicate_index
+from workflows.converter.reply_quotes import extract_thread_deltas
+from workflows.utils.metrics import (
+    BYTES_FETCHED,
+    DOCS_INDEXED,
+    PAGES_CONVERTED,
+    stage_span,
+)
+from workflows.utils.pipeline import Stage, run_pipeline
 
 # Import docling để đọc tệp đính kèm
 try:
@@ -28,15 +42,10 @@ except ImportError:
 # Ẩn cảnh báo BeautifulSoup XMLParsedAsHTMLWarning
 warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
 
-# Cấu hình logging -> ghi log ra file
-logging.basicConfig(
-    filename="mail_fetcher.log",
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-)
-
 INDEX_NAME = "emails"
-downloaded_ids = set()
+# Chỉ nạp index gần trùng từ vector DB một lần mỗi process
+_near_duplicates_seeded = threading.Event()
+_seed_lock = threading.Lock()
 
 # Các định dạng file được hỗ trợ bởi docling
 SUPPORTED_FORMATS = {
@@ -60,30 +69,57 @@ CREDENTIALS_FILE = os.getenv("WORKFLOWS_CLIENT_SECRET")
 TOKEN_FILE = os.getenv("WORKFLOWS_GMAIL_TOKEN")
 
 
-def init_gmail_service():
-    SCOPES = [
-        "https://www.googleapis.com/auth/gmail.settings.basic",
-        "https://www.googleapis.com/auth/gmail.modify",
-    ]
+def setup_mail_logging() -> None:
+    """Ghi log ra file `mail_fetcher.log` (format + ghi file ở luồng nền, theo lô).
 
-    creds = None
+    - Log INFO lặp lại theo từng email chỉ giữ tối đa 20 dòng/phút cho mỗi dòng code.
+    - Gọi từ entry point (actor upload mail, `__main__`), không chạy lúc import để không đè
+      cấu hình logging của ứng dụng; gọi nhiều lần chỉ thêm handler một lần.
+    """
+    setup_file_logging(
+        "mail_fetcher.log",
+        level=logging.INFO,
+        fmt="%(asctime)s [%(levelname)s] %(message)s",
+        filters=[RateLimitFilter(max_events=20, interval=60)],
+    )
 
-    if os.path.exists(TOKEN_FILE):
-        creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
 
-    # nếu chưa có gmail_token thì thực hiện
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_FILE, SCOPES)
-            creds = flow.run_local_server(port=8080)
+SCOPES = [
+    "https://www.googleapis.com/auth/gmail.settings.basic",
+    "https://www.googleapis.com/auth/gmail.modify",
+]
+
+# Credentials dùng chung cho mọi luồng; chỉ một luồng đọc/refresh/xác thực OAuth
+_credentials = None
+_credentials_lock = threading.Lock()
+
+
+def get_gmail_credentials():
+    """Credentials Gmail của process: xác thực (OAuth, cổng 8080) tối đa một lần."""
+    global _credentials
+    with _credentials_lock:
+        creds = _credentials
+        if creds is None and os.path.exists(TOKEN_FILE):
+            creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
+
+        # nếu chưa có gmail_token thì thực hiện
+        if not creds or not creds.valid:
+            if creds and creds.expired and creds.refresh_token:
+                creds.refresh(Request())
+            else:
+                flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_FILE, SCOPES)
+                creds = flow.run_local_server(port=8080)
+
+            with open(TOKEN_FILE, "w") as token:
+                token.write(creds.to_json())
 
-        with open(TOKEN_FILE, "w") as token:
-            token.write(creds.to_json())
+        _credentials = creds
+        return creds
 
-    # build gmail service
-    service = build("gmail", "v1", credentials=creds)
+
+def init_gmail_service():
+    # build gmail service (mỗi luồng một service, dùng chung credentials)
+    service = build("gmail", "v1", credentials=get_gmail_credentials())
     return service
 
 
@@ -176,6 +212,7 @@ def extract_content_with_docling(file_data, filename):
         try:
             converter = DocumentConverter()
             result = converter.convert(temp_path)
+            PAGES_CONVERTED.inc(len(result.document.pages))
             doc_file = result.input.file.stem
 
             for page_no, page in result.document.pages.items():
@@ -215,109 +252,317 @@ def extract_content_with_docling(file_data, filename):
         return None
 
 
-def process_attachments(service, user_id, msg_id):
-    """Lấy và xử lý tất cả tệp đính kèm của 1 email."""
+def fetch_attachments(service, user_id, msg_id):
+    """Tải dữ liệu tất cả tệp đính kèm của 1 email: danh sách (filename, bytes)."""
+    files = []
+    message = service.users().messages().get(userId=user_id, id=msg_id).execute()
+    payload = message.get("payload", {})
+
+    def _extract_parts(parts):
+        for part in parts:
+            if part.get("filename"):
+                body = part.get("body", {})
+                att_id = body.get("attachmentId")
+                if att_id:
+                    att = (
+                        service.users()
+                        .messages()
+                        .attachments()
+                        .get(userId=user_id, messageId=msg_id, id=att_id)
+                        .execute()
+                    )
+                    data = att.get("data")
+                    if data:
+                        file_data = base64.urlsafe_b64decode(data.encode("UTF-8"))
+                        BYTES_FETCHED.inc(len(file_data))
+                        files.append((part["filename"], file_data))
+
+            if "parts" in part:
+                _extract_parts(part["parts"])
+
+    if "parts" in payload:
+        _extract_parts(payload["parts"])
+
+    return files
+
+
+def extract_attachments(msg_id, files):
+    """Trích xuất nội dung các tệp đính kèm đã tải (không lưu file)."""
     attachments_info = []
+    attachment_index = get_near_duplicate_index("attachments")
 
-    try:
-        message = service.users().messages().get(userId=user_id, id=msg_id).execute()
-        payload = message.get("payload", {})
-
-        def _extract_parts(parts):
-            for part in parts:
-                if part.get("filename"):
-                    body = part.get("body", {})
-                    att_id = body.get("attachmentId")
-                    if att_id:
-                        att = (
-                            service.users()
-                            .messages()
-                            .attachments()
-                            .get(userId=user_id, messageId=msg_id, id=att_id)
-                            .execute()
-                        )
-                        data = att.get("data")
-                        if data:
-                            file_data = base64.urlsafe_b64decode(data.encode("UTF-8"))
-                            attachment_context = extract_content_with_docling(
-                                file_data, part["filename"]
-                            )
-
-                            attachment_info = {
-                                "filename": part["filename"],
-                                "content": attachment_context
-                                if attachment_context
-                                else None,
-                            }
-                            attachments_info.append(attachment_info)
-
-                if "parts" in part:
-                    _extract_parts(part["parts"])
-
-        if "parts" in payload:
-            _extract_parts(payload["parts"])
+    for filename, file_data in files:
+        attachment_context = extract_content_with_docling(file_data, filename)
 
-    except Exception as e:
-        logging.error(f"Lỗi xử lý file đính kèm từ mail {msg_id}: {e}")
+        attachment_info = {
+            "filename": filename,
+            "content": attachment_context if attachment_context else None,
+        }
+
+        # Tệp gần trùng tệp đã xử lý (CV forward lại, PDF xuất lại...): đánh dấu
+        # liên kết, vẫn giữ nội dung để tìm được mail theo nội dung tệp
+        if attachment_context:
+            duplicate = attachment_index.query_or_add(
+                f"{msg_id}/{filename}", attachment_context
+            )
+            if duplicate is not None:
+                attachment_info["duplicate_of"] = duplicate.key
+        attachments_info.append(attachment_info)
 
     return attachments_info
 
 
-def save_mail_to_opensearch(mail_data, os_client, embedding_model):
-    """Lưu một email vào OpenSearch với mail_id làm document ID."""
+def process_attachments(service, user_id, msg_id):
+    """Lấy và xử lý tất cả tệp đính kèm của 1 email."""
     try:
-        mail_id = mail_data["id"]
-        plain_text = mail_data.get("plain_text") or ""
-
-        # Tạo vector embedding từ plain_text
-        embedding = embedding_model.get_text_embedding(plain_text)
-
-        # Chuẩn bị metadata (chỉ các trường yêu cầu)
-        metadata = {
-            "thread_id": mail_data["thread_id"],
-            "from": mail_data.get("from"),
-            "to": mail_data.get("to"),
-            "subject": mail_data.get("subject"),
-            "date": mail_data.get("date"),
-            "plain_text": plain_text,
-            "labels_ids": mail_data.get("labels_ids", []),
-            "attachments": mail_data.get("attachments", []),
-        }
+        return extract_attachments(msg_id, fetch_attachments(service, user_id, msg_id))
+    except Exception as e:
+        logging.error(f"Lỗi xử lý file đính kèm từ mail {msg_id}: {e}")
+        return []
 
-        doc = {
-            "embedding": embedding,
-            "metadata": metadata,
-        }
 
-        # Upload vào OpenSearch với mail_id làm document ID
-        result = os_service.upload_document(
-            os_client=os_client,
-            index=INDEX_NAME,
-            doc_id=mail_id,
-            payload=doc,
+def _indexed_mail_text(os_client, mail_id):
+    """`plain_text` của email đã index (None nếu chưa có, vd. còn đang xử lý)."""
+    if _index_strategy() == "single":
+        response = vector_service().get_document(os_client, INDEX_NAME, mail_id)
+        source = response.get("_source") if response else None
+    else:
+        response = os_service.search_documents(
+            os_client,
+            mail_read_target(),
+            {"query": {"ids": {"values": [mail_id]}}},
+            size=1,
+            source_includes=["metadata.plain_text"],
+        )
+        hits = response["hits"]["hits"] if response else []
+        source = hits[0]["_source"] if hits else None
+    return (source or {}).get("metadata", {}).get("plain_text")
+
+
+def build_mail_document(mail_data, embedding_model, os_client=None):
+    """Tạo document (embedding + metadata) của một email để lưu vào OpenSearch."""
+    mail_id = mail_data["id"]
+    plain_text = mail_data.get("plain_text") or ""
+
+    # Tạo vector embedding từ plain_text (chỉ phần nội dung mới của email).
+    # Email gần trùng email đã index thì embed văn bản của email đó để hai email có
+    # cùng vector; chỉ tránh được lần gọi API khi bật cache embedding.
+    duplicate = get_near_duplicate_index("mails").query_or_add(mail_id, plain_text)
+    canonical_text = None
+    if duplicate is not None:
+        logging.info(
+            f"Mail {mail_id} gần trùng mail {duplicate.key} "
+            f"(độ giống {duplicate.similarity:.2f})"
         )
+        if os_client is not None:
+            canonical_text = _indexed_mail_text(os_client, duplicate.key)
+    embedding = embedding_model.embed(canonical_text or plain_text)
+
+    # Chuẩn bị metadata (chỉ các trường yêu cầu)
+    metadata = {
+        "thread_id": mail_data["thread_id"],
+        "from": mail_data.get("from"),
+        "to": mail_data.get("to"),
+        "subject": mail_data.get("subject"),
+        "date": mail_data.get("date"),
+        "plain_text": plain_text,
+        "labels_ids": mail_data.get("labels_ids", []),
+        "attachments": mail_data.get("attachments", []),
+    }
+    if mail_data.get("full_text"):
+        metadata["full_text"] = mail_data["full_text"]
+    if duplicate is not None:
+        metadata["duplicate_of"] = duplicate.key
+
+    return {
+        "embedding": embedding,
+        "metadata": metadata,
+    }
 
-        if result:
-            logging.info(f"Đã upload mail {mail_id} vào OpenSearch")
-        else:
-            logging.error(f"Không thể upload mail {mail_id} vào OpenSearch")
 
+def vector_service():
+    """Module backend vector DB theo config (`os_service` hoặc `local_service`)."""
+    return local_service if get_config().vector_backend == "local" else os_service
+
+
+def _index_strategy():
+    # Backend local chỉ có một index duy nhất
+    config = get_config()
+    return "single" if config.vector_backend == "local" else config.mail_index_strategy
+
+
+def mail_index_target(doc):
+    """Index để ghi document của email theo `mail_index_strategy`."""
+    strategy = _index_strategy()
+    if strategy == "monthly":
+        # Index của tháng gửi email; ngày không đọc được thì dùng tháng hiện tại
+        try:
+            return os_service.monthly_index_name(INDEX_NAME, doc["metadata"].get("date"))
+        except (TypeError, ValueError):
+            return os_service.monthly_index_name(INDEX_NAME)
+    if strategy == "rollover":
+        return os_service.write_alias(INDEX_NAME)
+    return INDEX_NAME
+
+
+def mail_read_target():
+    """Index (hoặc alias) để đọc/search mọi email đã index."""
+    if _index_strategy() == "single":
+        return INDEX_NAME
+    return os_service.read_alias(INDEX_NAME)
+
+
+def mail_index_mapping():
+    """Mapping email index theo số chiều vector và cách lượng tử hóa trong config."""
+    config = get_config()
+    return os_service.build_email_index_mapping(
+        dims=config.embedding_dimensions or config.opensearch_vector_dims,
+        quantization=config.opensearch_vector_quantization,
+        pq_model_id=config.opensearch_pq_model_id,
+    )
+
+
+def seed_near_duplicate_indexes(os_client):
+    """Nạp chữ ký MinHash của email/tệp đính kèm đã index (mỗi process một lần).
+
+    Để phát hiện gần trùng cả với email của các lần chạy trước; đọc tối đa
+    `near_duplicate_max_items` email.
+    """
+    with _seed_lock:
+        if _near_duplicates_seeded.is_set():
+            return
+        mail_index = get_near_duplicate_index("mails")
+        attachment_index = get_near_duplicate_index("attachments")
+        limit = get_config().near_duplicate_max_items
+
+        seeded = 0
+        for hit in vector_service().scan_documents(
+            os_client,
+            mail_read_target(),
+            source_includes=["metadata.plain_text", "metadata.attachments"],
+        ):
+            if limit is not None and seeded >= limit:
+                break
+            metadata = hit.get("_source", {}).get("metadata", {})
+            mail_index.add(hit["_id"], metadata.get("plain_text") or "")
+            for attachment in metadata.get("attachments") or []:
+                if attachment.get("content"):
+                    attachment_index.add(
+                        f"{hit['_id']}/{attachment.get('filename')}", attachment["content"]
+                    )
+            seeded += 1
+
+        _near_duplicates_seeded.set()
+        logging.info(f"Đã nạp {seeded} email đã index để phát hiện gần trùng")
+
+
+def setup_mail_index(os_client):
+    """Đảm bảo index (hoặc template + alias) của email tồn tại."""
+    config = get_config()
+    mapping = mail_index_mapping()
+    if _index_strategy() == "single":
+        vector_service().create_index(os_client, INDEX_NAME, mapping)
+        return
+
+    os_service.setup_rollover_indices(
+        os_client, INDEX_NAME, config.mail_index_strategy, mapping
+    )
+    if config.mail_index_strategy == "rollover":
+        os_service.rollover_index(
+            os_client,
+            INDEX_NAME,
+            max_size=config.mail_index_rollover_max_size,
+            max_age=config.mail_index_rollover_max_age,
+        )
+
+
+def upload_mail_document(os_client, mail_id, doc):
+    """Upload document của email vào OpenSearch với mail_id làm document ID."""
+    result = vector_service().upload_document(
+        os_client,
+        index=mail_index_target(doc),
+        doc_id=mail_id,
+        payload=doc,
+        quantization=get_config().opensearch_vector_quantization,
+    )
+
+    if result:
+        DOCS_INDEXED.inc()
+        logging.info(f"Đã upload mail {mail_id} vào OpenSearch")
+    else:
+        logging.error(f"Không thể upload mail {mail_id} vào OpenSearch")
+    return bool(result)
+
+
+def save_mail_to_opensearch(mail_data, os_client, embedding_model):
+    """Lưu một email vào OpenSearch với mail_id làm document ID."""
+    try:
+        doc = build_mail_document(mail_data, embedding_model, os_client)
+        upload_mail_document(os_client, mail_data["id"], doc)
     except Exception as e:
         logging.error(f"Lỗi khi upload mail {mail_data.get('id')} vào OpenSearch: {e}")
 
 
+_thread_local = threading.local()
+
+
+def _get_thread_gmail_service():
+    """Gmail service riêng cho từng luồng (googleapiclient không thread-safe).
+
+    Các service dùng chung credentials của `get_gmail_credentials`, nên không có
+    nhiều luồng cùng chạy OAuth hay cùng ghi file token.
+    """
+    service = getattr(_thread_local, "gmail_service", None)
+    if service is None:
+        service = _thread_local.gmail_service = init_gmail_service()
+    return service
+
+
+def mail_progress_path():
+    """File tiến độ của backend và index đích hiện tại.
+
+    Đổi backend (`vector_backend`) hay cách chia index (`mail_index_strategy`)
+    thì dùng file khác, nên email đã index ở nơi cũ vẫn được index lại ở nơi mới.
+    """
+    config = get_config()
+    return config.mail_progress_dir / (
+        f"{config.vector_backend}-{_index_strategy()}-{INDEX_NAME}.json"
+    )
+
+
 def fetch_mails_in_date(
-    allowed_subjects, after_default, before_default, os_client, embedding_model
+    allowed_subjects,
+    after_default,
+    before_default,
+    os_client,
+    embedding_model,
+    reset_progress=False,
 ):
-    """Crawl emails và upload trực tiếp vào OpenSearch."""
+    """Crawl emails và upload trực tiếp vào OpenSearch.
+
+    Các email được xử lý qua pipeline fetch -> extract -> embed -> index: mỗi
+    bước có số luồng riêng và các bước chạy chồng lên nhau. Tiến độ được ghi
+    theo từng thread (theo thứ tự) vào file trong cache_dir (riêng cho từng
+    backend/index), lần chạy sau bỏ qua các email đã index; `reset_progress=True`
+    xóa tiến độ và xử lý lại tất cả.
+    """
+    config = get_config()
+    progress = MailProgress(mail_progress_path())
+    if reset_progress:
+        progress.reset()
 
     # Đảm bảo index emails tồn tại
     try:
-        os_service.create_index(os_client, INDEX_NAME)
+        setup_mail_index(os_client)
     except Exception as e:
         logging.error(f"Lỗi khi tạo index: {e}")
         return
 
+    try:
+        seed_near_duplicate_indexes(os_client)
+    except Exception as e:
+        logging.warning(f"Không nạp được index gần trùng từ vector DB: {e}")
+
     query_params = {
         "after": after_default,
         "before": before_default,
@@ -332,12 +577,14 @@ def fetch_mails_in_date(
         logging.error(f"Lỗi khi fetch mail: {e}")
         return
 
-    # Gom thread_id -> danh sách mail
+    # Gom thread_id -> danh sách mail. Email đã index ở lần chạy trước được bỏ qua
+    # theo `progress` (email lỗi không được ghi vào đó nên lần chạy sau thử lại)
     threads = {}
     valid_threads = set()
+    seen_ids = set()
 
     for msg in messages:
-        if msg.id in downloaded_ids:
+        if msg.id in seen_ids:
             continue
 
         subj_norm = normalize_subject(msg.subject)
@@ -347,23 +594,29 @@ def fetch_mails_in_date(
             valid_threads.add(msg.thread_id)
 
         threads.setdefault(msg.thread_id, []).append(msg)
-        downloaded_ids.add(msg.id)
+        seen_ids.add(msg.id)
 
-    # Xử lý từng email và upload vào OpenSearch
-    total_uploaded = 0
+    # Chuẩn bị dữ liệu các email cần xử lý, theo thứ tự thread
+    work_items = []
+    thread_sizes = {}
     for thread_id, msgs in threads.items():
         if thread_id not in valid_threads:
             continue
 
         msgs_sorted = sorted(msgs, key=lambda x: x.date)
 
-        for msg in msgs_sorted:
-            # Xử lý attachments (không lưu file)
-            attachments_info = []
-            if msg.attachments:
-                attachments_info = process_attachments(gmail.service, "me", msg.id)
+        # Mỗi reply chứa lại lịch sử thread: chỉ giữ phần nội dung mới của từng email
+        full_texts = [msg.plain or "" for msg in msgs_sorted]
+        if config.mail_strip_quotes:
+            plain_texts = extract_thread_deltas(full_texts)
+        else:
+            plain_texts = full_texts
+
+        for msg, plain_text, full_text in zip(msgs_sorted, plain_texts, full_texts):
+            # Đã index ở lần chạy trước
+            if progress.is_done(msg.id):
+                continue
 
-            # Chuẩn bị dữ liệu mail
             mail_data = {
                 "id": msg.id,
                 "thread_id": thread_id,
@@ -371,21 +624,100 @@ def fetch_mails_in_date(
                 "to": msg.recipient,
                 "subject": msg.subject,
                 "date": str(msg.date),
-                "plain_text": msg.plain,
+                "plain_text": plain_text,
+                "full_text": full_text if config.mail_store_full_text else None,
                 "labels_ids": [label.name for label in msg.label_ids],
-                "attachments": attachments_info,
+                "attachments": [],
             }
+            work_items.append(
+                {"mail_data": mail_data, "has_attachments": bool(msg.attachments)}
+            )
+            thread_sizes[thread_id] = thread_sizes.get(thread_id, 0) + 1
+
+    def _span(stage, item):
+        # Log (structlog) thời gian từng bước, gắn thread_id/mail_id của email
+        return stage_span(
+            stage,
+            thread_id=item["mail_data"]["thread_id"],
+            mail_id=item["mail_data"]["id"],
+        )
+
+    def _fetch(item):
+        with _span("fetch", item):
+            if item["has_attachments"]:
+                item["files"] = fetch_attachments(
+                    _get_thread_gmail_service(), "me", item["mail_data"]["id"]
+                )
+        return item
+
+    def _extract(item):
+        # Xử lý attachments (không lưu file)
+        with _span("extract", item):
+            files = item.pop("files", None)
+            if files:
+                item["mail_data"]["attachments"] = extract_attachments(
+                    item["mail_data"]["id"], files
+                )
+        return item
+
+    def _embed(item):
+        with _span("embed", item):
+            item["doc"] = build_mail_document(
+                item["mail_data"], embedding_model, os_client
+            )
+        return item
+
+    def _index(item):
+        # Upload trực tiếp vào OpenSearch với mail_id làm document ID
+        with _span("index", item):
+            mail_id = item["mail_data"]["id"]
+            if not upload_mail_document(os_client, mail_id, item.pop("doc")):
+                msg = f"Không thể upload mail {mail_id}"
+                raise RuntimeError(msg)
+        return item
+
+    stages = [
+        Stage("fetch", _fetch, workers=config.mail_fetch_workers),
+        Stage("extract", _extract, workers=config.mail_extract_workers),
+        Stage("embed", _embed, workers=config.mail_embed_workers),
+        Stage("index", _index, workers=config.mail_index_workers),
+    ]
 
-            # Upload trực tiếp vào OpenSearch với mail_id làm document ID
-            save_mail_to_opensearch(mail_data, os_client, embedding_model)
+    # Commit tiến độ theo từng thread (theo thứ tự thread) khi mọi email của nó đã xong
+    committer = OrderedThreadCommitter(progress, thread_sizes)
+    total_uploaded = 0
+    for result in run_pipeline(work_items, stages, config.mail_pipeline_queue_size):
+        mail_data = result.item["mail_data"]
+        if result.error is None:
             total_uploaded += 1
+        else:
+            logging.error(
+                f"Lỗi khi xử lý mail {mail_data['id']} "
+                f"(bước {result.failed_stage}): {result.error}"
+            )
 
-        logging.info(f"Đã xử lý thread {thread_id} với {len(msgs_sorted)} emails")
+        for thread_id in committer.done(
+            mail_data["thread_id"], mail_data["id"], ok=result.error is None
+        ):
+            logging.info(
+                f"Đã xử lý thread {thread_id} với {thread_sizes[thread_id]} emails"
+            )
 
     logging.info(f"Tổng cộng đã upload {total_uploaded} emails vào OpenSearch")
 
+    # Ghi các document vừa index xuống đĩa/cho phép search ngay (backend local: lưu
+    # vector và đồ thị HNSW)
+    vector_service().refresh_index(os_client, mail_read_target())
+
+    # Các index con cũ không còn được ghi: gộp segment để search nhanh hơn
+    if _index_strategy() != "single" and config.mail_index_force_merge:
+        merged = os_service.force_merge_old_indices(os_client, INDEX_NAME)
+        if merged:
+            logging.info(f"Đã force-merge các index: {', '.join(merged)}")
+
 
 if __name__ == "__main__":
+    setup_mail_logging()
     config = get_config()
     excel_path = config.tabel_mail
     after_default = config.after_mail
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+class MailProgress:
+    """Ghi lại các email đã index xong theo từng thread (file JSON trong cache_dir).
+
+    Lần chạy sau (vd. chạy lại `fetch_mails_in_date` sau khi bị dừng giữa chừng)
+    bỏ qua các email đã có trong file này.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._threads: dict[str, list[str]] = {}
+        if path.exists():
+            try:
+                self._threads = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                logging.warning(f"Không đọc được file tiến độ {path}: {e}")
+        self._mail_ids = {
+            mail_id for mail_ids in self._threads.values() for mail_id in mail_ids
+        }
+
+    def is_done(self, mail_id: str) -> bool:
+        return mail_id in self._mail_ids
+
+    def reset(self) -> None:
+        """Xóa tiến độ đã ghi: lần chạy này xử lý lại mọi email."""
+        with self._lock:
+            self._threads.clear()
+            self._mail_ids.clear()
+            self.path.unlink(missing_ok=True)
+
+    def commit(self, thread_id: str, mail_ids: list[str]) -> None:
+        """Ghi nhận các email của thread đã index xong (ghi file nguyên tử)."""
+        with self._lock:
+            done = self._threads.setdefault(thread_id, [])
+            done.extend(mail_id for mail_id in mail_ids if mail_id not in self._mail_ids)
+            self._mail_ids.update(mail_ids)
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            tmp_path.write_text(json.dumps(self._threads), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+
+
+@dataclass
+class _ThreadState:
+    expected: int
+    indexed: list[str] = field(default_factory=list)
+    failed: int = 0
+
+    @property
+    def finished(self) -> bool:
+        return len(self.indexed) + self.failed >= self.expected
+
+
+class OrderedThreadCommitter:
+    """Commit tiến độ theo thứ tự thread ban đầu, khi mọi email của thread đã xong.
+
+    Các email được xử lý song song và xong theo thứ tự bất kỳ; thread chỉ được
+    ghi nhận khi nó và mọi thread đứng trước đã xong, nên file tiến độ luôn là
+    một tiền tố liên tục của danh sách thread (email lỗi không được ghi nhận, lần
+    sau sẽ được xử lý lại).
+    """
+
+    def __init__(self, progress: MailProgress, thread_sizes: dict[str, int]) -> None:
+        self.progress = progress
+        self._order = list(thread_sizes)
+        self._next = 0
+        self._states = {
+            thread_id: _ThreadState(expected=size)
+            for thread_id, size in thread_sizes.items()
+        }
+
+    def done(self, thread_id: str, mail_id: str, *, ok: bool) -> list[str]:
+        """Ghi nhận một email xong, trả về các thread vừa được commit."""
+        state = self._states[thread_id]
+        if ok:
+            state.indexed.append(mail_id)
+        else:
+            state.failed += 1
+
+        committed = []
+        while self._next < len(self._order):
+            next_thread = self._order[self._next]
+            next_state = self._states[next_thread]
+            if not next_state.finished:
+                break
+            self.progress.commit(next_thread, next_state.indexed)
+            committed.append(next_thread)
+            self._next += 1
+        return committed
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+from workflows.config import get_config
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Hash 32-bit của shingle được đưa qua NUM_PERM hàm hash dạng (a*x + b) >> 32 (mod 2^64)
+NUM_PERM = 128
+# LSH: chia chữ ký thành BANDS band, mỗi band ROWS giá trị. Hai văn bản có độ giống
+# Jaccard s thành ứng viên với xác suất 1 - (1 - s^ROWS)^BANDS (~0.7 là ngưỡng dốc nhất)
+BANDS = 16
+SHINGLE_SIZE = 5
+# Văn bản quá ngắn (vd. "OK thanks") không đủ shingle để so sánh tin cậy
+MIN_SHINGLES = 10
+
+_rng = np.random.default_rng(20240901)
+_PERM_A = _rng.integers(1, 2**63, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_PERM_B = _rng.integers(0, 2**63, size=NUM_PERM, dtype=np.uint64)
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> np.ndarray:
+    """Hash (crc32) của các cụm `size` từ liên tiếp, sau khi lowercase."""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < size:
+        return np.empty(0, dtype=np.uint64)
+    hashes = {
+        zlib.crc32(" ".join(words[i : i + size]).encode("utf-8"))
+        for i in range(len(words) - size + 1)
+    }
+    return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+
+def minhash(shingle_hashes: np.ndarray) -> np.ndarray:
+    """Chữ ký MinHash (NUM_PERM giá trị uint32) của tập shingle."""
+    # (n, 1) * (NUM_PERM,) -> (n, NUM_PERM), phép nhân uint64 tự tràn (mod 2^64)
+    hashed = (shingle_hashes[:, None] * _PERM_A + _PERM_B) >> np.uint64(32)
+    return hashed.min(axis=0).astype(np.uint32)
+
+
+@dataclass
+class NearDuplicate:
+    key: str
+    similarity: float
+    payload: Any
+
+
+@dataclass
+class NearDuplicateIndex:
+    """Index MinHash LSH trong bộ nhớ để tìm văn bản gần trùng (độ giống Jaccard).
+
+    Dùng cho email/tệp đính kèm gần trùng (CV forward với footer khác, PDF xuất
+    lại...): phần tử gần trùng được đánh dấu `duplicate_of` và có thể dùng lại kết
+    quả của phần tử gốc. Chỉ giữ chữ ký (và `payload` nhỏ, vd. id) của tối đa
+    `max_items` phần tử dùng gần nhất (LRU).
+    """
+
+    threshold: float = 0.85
+    max_items: int | None = None
+    _signatures: OrderedDict[str, np.ndarray] = field(default_factory=OrderedDict)
+    _payloads: dict[str, Any] = field(default_factory=dict)
+    _buckets: list[dict[bytes, set[str]]] = field(
+        default_factory=lambda: [{} for _ in range(BANDS)]
+    )
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    @staticmethod
+    def signature(text: str) -> np.ndarray | None:
+        """Chữ ký MinHash của `text`, None nếu văn bản quá ngắn."""
+        shingle_hashes = shingles(text)
+        if len(shingle_hashes) < MIN_SHINGLES:
+            return None
+        return minhash(shingle_hashes)
+
+    def query(
+        self, text: str, signature: np.ndarray | None = None
+    ) -> NearDuplicate | None:
+        """Phần tử giống `text` nhất với độ giống >= threshold (nếu có)."""
+        if signature is None:
+            signature = self.signature(text)
+        if signature is None:
+            return None
+
+        with self._lock:
+            return self._query(signature)
+
+    def add(
+        self,
+        key: str,
+        text: str,
+        payload: Any = None,
+        signature: np.ndarray | None = None,
+    ) -> bool:
+        """Thêm `text` vào index, trả về False nếu văn bản quá ngắn để index."""
+        if signature is None:
+            signature = self.signature(text)
+        if signature is None:
+            return False
+
+        with self._lock:
+            self._add(key, signature, payload)
+        return True
+
+    def query_or_add(
+        self,
+        key: str,
+        text: str,
+        payload: Any = None,
+        signature: np.ndarray | None = None,
+    ) -> NearDuplicate | None:
+        """`query`, và nếu không có phần tử gần trùng thì `add` — trong cùng một lần khóa.
+
+        Hai luồng xử lý hai văn bản gần trùng cùng lúc sẽ không cùng được coi là bản gốc.
+        Phần tử có cùng `key` (vd. email đã index, được xử lý lại) không tính là bản gần
+        trùng của chính nó.
+        """
+        if signature is None:
+            signature = self.signature(text)
+        if signature is None:
+            return None
+
+        with self._lock:
+            duplicate = self._query(signature, exclude=key)
+            if duplicate is None:
+                self._add(key, signature, payload)
+            return duplicate
+
+    def _query(
+        self, signature: np.ndarray, exclude: str | None = None
+    ) -> NearDuplicate | None:
+        candidates = set()
+        for band, bucket in zip(self._bands(signature), self._buckets):
+            candidates.update(bucket.get(band, ()))
+        candidates.discard(exclude)
+
+        best = None
+        for key in candidates:
+            # Tỉ lệ giá trị MinHash trùng nhau ước lượng độ giống Jaccard
+            similarity = float(np.mean(self._signatures[key] == signature))
+            if similarity >= self.threshold and (
+                best is None or similarity > best.similarity
+            ):
+                best = NearDuplicate(key, similarity, self._payloads[key])
+        if best is not None:
+            self._signatures.move_to_end(best.key)
+        return best
+
+    def _add(self, key: str, signature: np.ndarray, payload: Any) -> None:
+        if key in self._signatures:
+            self._remove(key)
+        self._signatures[key] = signature
+        self._payloads[key] = payload
+        for band, bucket in zip(self._bands(signature), self._buckets):
+            bucket.setdefault(band, set()).add(key)
+
+        while self.max_items is not None and len(self._signatures) > self.max_items:
+            self._remove(next(iter(self._signatures)))
+
+    def _remove(self, key: str) -> None:
+        signature = self._signatures.pop(key)
+        self._payloads.pop(key, None)
+        for band, bucket in zip(self._bands(signature), self._buckets):
+            keys = bucket.get(band)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del bucket[band]
+
+    @staticmethod
+    def _bands(signature: np.ndarray) -> list[bytes]:
+        return [band.tobytes() for band in np.split(signature, BANDS)]
+
+
+_indexes: dict[str, NearDuplicateIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_near_duplicate_index(name: str) -> NearDuplicateIndex:
+    """Index dùng chung trong process cho từng loại dữ liệu ("mails", "attachments")."""
+    with _indexes_lock:
+        index = _indexes.get(name)
+        if index is None:
+            config = get_config()
+            index = _indexes[name] = NearDuplicateIndex(
+                threshold=config.near_duplicate_threshold,
+                max_items=config.near_duplicate_max_items,
+            )
+        return index
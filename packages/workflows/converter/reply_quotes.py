@@ -0,0 +1,100 @@
+"""Tách phần nội dung mới của từng email khỏi phần trích dẫn (quote) các reply trước.
+
+Mỗi reply trong Gmail thường chứa lại toàn bộ lịch sử thread phía dưới, nên nếu
+embed/index nguyên `plain_text` thì dung lượng và số token tăng theo bình phương
+độ dài thread. Module này cắt phần quote theo các dấu hiệu phổ biến:
+
+- Dòng mở đầu quote của Gmail: "On <ngày>, <người gửi> wrote:"
+- Bản tiếng Việt: "Vào <ngày>, <người gửi> đã viết:"
+- Outlook: "-----Original Message-----" / "From: ... Sent: ..."
+- Các dòng bắt đầu bằng `>`
+"""
+
+from __future__ import annotations
+
+import re
+
+# Dòng giới thiệu có thể bị client xuống dòng giữa chừng, nên cho phép tối đa 2 dòng
+ATTRIBUTION_PATTERNS = [
+    re.compile(r"^[ \t]*On\b[^\n]*(?:\n[^\n]*)?\bwrote:[ \t]*$", re.MULTILINE),
+    re.compile(r"^[ \t]*Vào\b[^\n]*(?:\n[^\n]*)?\bđã viết:[ \t]*$", re.MULTILINE),
+    re.compile(r"^[ \t]*-{2,}[ \t]*Original Message[ \t]*-{2,}[ \t]*$", re.MULTILINE),
+    re.compile(r"^[ \t]*From:[^\n]*\n[ \t]*Sent:[^\n]*$", re.MULTILINE),
+]
+QUOTED_LINE_PATTERN = re.compile(r"^[ \t]*>")
+BLANK_LINES_PATTERN = re.compile(r"\n{3,}")
+
+# Số dòng liên tiếp đã xuất hiện ở email trước thì coi là bị quote lại (không có dấu hiệu)
+MIN_REPEATED_BLOCK_LINES = 3
+
+
+def strip_quoted_reply(text: str) -> str:
+    """Bỏ phần quote (từ dòng giới thiệu đầu tiên trở đi và các dòng `>`)."""
+    if not text:
+        return ""
+
+    text = text.replace("\r\n", "\n")
+    cut = len(text)
+    for pattern in ATTRIBUTION_PATTERNS:
+        match = pattern.search(text)
+        if match is not None:
+            cut = min(cut, match.start())
+    text = text[:cut]
+
+    lines = [line for line in text.split("\n") if not QUOTED_LINE_PATTERN.match(line)]
+    return BLANK_LINES_PATTERN.sub("\n\n", "\n".join(lines)).strip()
+
+
+def _normalize_line(line: str) -> str:
+    return " ".join(line.split()).lower()
+
+
+def _drop_repeated_blocks(text: str, seen_lines: set[str]) -> str:
+    """Bỏ các khối >= MIN_REPEATED_BLOCK_LINES dòng đã có ở các email trước."""
+    lines = text.split("\n")
+    keep = [True] * len(lines)
+
+    start = None
+    # Thêm phần tử canh để khối cuối cùng cũng được xử lý trong vòng lặp
+    for i, line in enumerate([*lines, None]):
+        normalized = _normalize_line(line) if line is not None else None
+        # Dòng trống không làm đứt khối
+        if normalized == "" and start is not None:
+            continue
+        if normalized and normalized in seen_lines:
+            if start is None:
+                start = i
+            continue
+        if start is not None:
+            block = [j for j in range(start, i) if _normalize_line(lines[j])]
+            if len(block) >= MIN_REPEATED_BLOCK_LINES:
+                for j in range(start, i):
+                    keep[j] = False
+            start = None
+
+    kept = "\n".join(line for line, k in zip(lines, keep) if k)
+    return BLANK_LINES_PATTERN.sub("\n\n", kept).strip()
+
+
+def extract_thread_deltas(texts: list[str]) -> list[str]:
+    """Trả về phần nội dung mới của từng email trong thread (đã sắp theo thời gian).
+
+    - Cắt phần quote bằng `strip_quoted_reply`.
+    - Bỏ thêm các khối dòng đã xuất hiện nguyên văn ở email trước (client quote
+      không có dấu hiệu, chữ ký lặp lại...).
+    - Nếu không còn gì (email chỉ forward/quote lại) thì giữ bản đã cắt quote,
+      hoặc văn bản gốc, để email vẫn có nội dung để embed.
+    """
+    deltas = []
+    seen_lines: set[str] = set()
+    for text in texts:
+        stripped = strip_quoted_reply(text or "")
+        delta = _drop_repeated_blocks(stripped, seen_lines) or stripped or (text or "")
+        deltas.append(delta)
+
+        seen_lines.update(
+            normalized
+            for normalized in map(_normalize_line, stripped.split("\n"))
+            if normalized
+        )
+    return deltas
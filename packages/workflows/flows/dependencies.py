@@ -7,11 +7,20 @@ from dramatiq.brokers.rabbitmq import RabbitmqBroker
 from opensearchpy import OpenSearch
 
 from libs.openai_api_client.src.openai_api_client.embedding import EmbeddingModel
+from libs.openai_api_client.src.openai_api_client.embedding_cache import (
+    CachedEmbeddingModel,
+    EmbeddingCache,
+)
+from libs.openai_api_client.src.openai_api_client.matryoshka import (
+    TruncatedEmbeddingModel,
+)
+from libs.openai_api_client.src.openai_api_client.rate_limit import get_rate_limiter
+from libs.vectordb.src.vectordb.local import local_service
 from libs.vectordb.src.vectordb.opensearch import os_service
 from workflows.config import get_config
 
 if TYPE_CHECKING:
-    pass
+    from libs.vectordb.src.vectordb.local.store import LocalVectorStore
 
 
 def get_rabbitmq_broker() -> RabbitmqBroker:
@@ -29,16 +38,20 @@ def get_rabbitmq_broker() -> RabbitmqBroker:
     return broker
 
 
-def get_os_client() -> OpenSearch:
+def get_os_client() -> OpenSearch | LocalVectorStore:
     """Khởi tạo client kết nối tới Opensearch.
 
     - Sử dụng URL, user, password từ config.
     - Client này được dùng để lưu và tìm kiếm dữ liệu (vector + metadata).
+    - Với `vector_backend="local"`: store vector local trong cache_dir (dùng với
+      `local_service`, cùng bộ hàm với `os_service`).
 
     Returns:
         Opensearch: Client kết nối ES.
     """
     config = get_config()
+    if config.vector_backend == "local":
+        return local_service.new_local_client(config.local_vectordb_dir)
     return os_service.new_os_client(
         config.open_url.unicode_string(),
         config.open_user,
@@ -46,15 +59,43 @@ def get_os_client() -> OpenSearch:
     )
 
 
-def get_embedding_model() -> EmbeddingModel:
+def get_embedding_model() -> (
+    EmbeddingModel | CachedEmbeddingModel | TruncatedEmbeddingModel
+):
     """Khởi tạo model sinh embedding từ OpenAI API
     - Lấy API URL và model_id từ config
+    - Dùng chung connection pool và rate limiter của endpoint OpenAI
+    - Bọc bởi cache embedding trên đĩa (nếu bật): chỉ text chưa có mới gọi API
+    - Cắt vector còn `embedding_dimensions` chiều (nếu cấu hình); cache vẫn giữ vector đầy đủ
     - Dùng để convert text thành vector embedding lưu vào OS
     Returns:
         EmbeddingModel: Model_embedding
     """
     config = get_config()
-    return EmbeddingModel(model_embedding_id=config.model_embedding_id)
+    rate_limiter = get_rate_limiter(
+        config.openai_api_url.unicode_string(),
+        requests_per_minute=config.openai_requests_per_minute,
+        tokens_per_minute=config.openai_tokens_per_minute,
+    )
+    model = EmbeddingModel(
+        openai_api_url=config.openai_api_url.unicode_string(),
+        openai_api_key=config.openai_api_key,
+        model_id=config.model_embedding_id,
+        rate_limiter=rate_limiter,
+        max_retries=config.openai_max_retries,
+    )
+    if config.embedding_cache_enabled:
+        config.cache_dir.mkdir(parents=True, exist_ok=True)
+        size_mb = config.embedding_cache_size_mb
+        cache = EmbeddingCache(
+            config.embedding_cache_path,
+            max_size_bytes=size_mb * 1024 * 1024 if size_mb else None,
+        )
+        model = CachedEmbeddingModel(model, cache)
+
+    if config.embedding_dimensions is not None:
+        model = TruncatedEmbeddingModel(model, config.embedding_dimensions)
+    return model
 
 
 ## ===============Khởi tạo các đối tượng toàn cục ======
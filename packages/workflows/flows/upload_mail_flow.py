@@ -4,20 +4,46 @@ import dramatiq
 from logger import get_logger
 
 from workflows.config import get_config
-from workflows.converter.gmail_utils import fetch_mails_in_date, load_allowed_subjects
+from workflows.converter.gmail_utils import (
+    fetch_mails_in_date,
+    load_allowed_subjects,
+    setup_mail_logging,
+    vector_service,
+)
 from workflows.flows.dependencies import embedding_model, os_client, rabbitmq_broker
+from workflows.utils.metrics import start_metrics_server
 
 log = get_logger(__name__)
 dramatiq.set_broker(rabbitmq_broker)
 
 
+class MetricsServerMiddleware(dramatiq.Middleware):
+    """Mở endpoint Prometheus `/metrics` (thời gian từng bước, byte/trang/token/document
+    đã xử lý) khi một process worker dramatiq khởi động, không phải lúc import module.
+
+    Mỗi process có metrics riêng nên dùng port riêng (xem `start_metrics_server`).
+    """
+
+    def after_process_boot(self, broker: dramatiq.Broker) -> None:
+        config = get_config()
+        if config.metrics_port is not None:
+            start_metrics_server(config.metrics_port, port_count=config.metrics_port_count)
+
+
+rabbitmq_broker.add_middleware(MetricsServerMiddleware())
+
+
 @dramatiq.actor
-def process_mail_upload():
-    """Actor để crawl mail và upload vào OpenSearch."""
+def process_mail_upload(reset_progress: bool = False):
+    """Actor để crawl mail và upload vào OpenSearch.
+
+    `reset_progress=True`: bỏ qua tiến độ đã lưu, xử lý lại mọi email.
+    """
+    setup_mail_logging()
     log.info("[UPLOAD] Bắt đầu crawl và upload mail")
 
     try:
-        if not os_client.ping():
+        if not vector_service().ping_opensearch(os_client):
             log.error("Không thể kết nối tới OpenSearch!")
             return
         log.info("Kết nối OpenSearch thành công.")
@@ -42,6 +68,7 @@ def process_mail_upload():
             before_default=config.before_mail,
             os_client=os_client,
             embedding_model=embedding_model,
+            reset_progress=reset_progress,
         )
         log.info("Đã crawl và upload mail vào OpenSearch thành công")
 
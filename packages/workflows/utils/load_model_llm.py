@@ -1,70 +1,83 @@
 from __future__ import annotations
 
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
 import boto3
+from botocore.config import Config as BotoConfig
 from workflows.config import get_config
+from workflows.utils.minio_sync import sync_from_minio
+from workflows.utils.model_registry import get_model_registry
 
 try:
     from llama_cpp import Llama
 except ImportError:
     Llama = None
 
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
 
 def download_model_from_minio_if_needed(model_id: str) -> Path:
-    """Tải model từ MinIO về cache nếu chưa tồn tại.
+    """Đồng bộ model từ MinIO về cache, chỉ tải các file còn thiếu hoặc bị lỗi.
     Trả về đường dẫn local chứa model.
     """  # noqa: D205, DOC501
     config = get_config()
     cache_dir = Path(config.cache_dir).expanduser()
     local_path = cache_dir / model_id
 
-    # Nếu đã tồn tại và có file
-    if local_path.exists() and any(local_path.glob("*")):
-        print(f" Model `{model_id}` đã tồn tại ở `{local_path}`. Bỏ qua tải lại.")
-        return local_path
-
-    print(f"  Đang tải model `{model_id}` từ MinIO...")
+    print(f"  Đang đồng bộ model `{model_id}` từ MinIO...")
 
     client = boto3.client(
         "s3",
         endpoint_url=str(config.minio_endpoint),
         aws_access_key_id=config.minio_access_key,
         aws_secret_access_key=config.minio_secret_key.get_secret_value(),
+        config=BotoConfig(max_pool_connections=config.model_download_workers),
     )
 
     prefix = model_id.strip("/")
-    paginator = client.get_paginator("list_objects_v2")
-    pages = paginator.paginate(Bucket=config.minio_bucket, Prefix=prefix)
-
-    found = False
-    for page in pages:
-        for obj in page.get("Contents", []):
-            found = True
-            key = obj["Key"]
-            relative_path = Path(key).relative_to(prefix)
-            file_path = local_path / relative_path
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            client.download_file(config.minio_bucket, key, str(file_path))
-
-    if not found:
+    objects = sync_from_minio(
+        client,
+        config.minio_bucket,
+        prefix,
+        local_path,
+        workers=config.model_download_workers,
+        chunk_size=config.model_download_chunk_size_mb * 1024 * 1024,
+    )
+
+    if not objects:
         msg = f"Không tìm thấy model `{model_id}` trong bucket `{config.minio_bucket}` với prefix `{prefix}`"
         raise FileNotFoundError(msg)
 
-    print(f" Đã tải model `{model_id}` về `{local_path}`")
+    print(f" Model `{model_id}` đã sẵn sàng ở `{local_path}`")
     return local_path
 
 
-def load_model_llm(model_id: str, **kwargs):
+@lru_cache(maxsize=None)
+def find_model_file(model_id: str) -> Path | None:
+    """Đồng bộ model một lần mỗi process và trả về file trọng số (.bin) nếu có."""
     local_dir = download_model_from_minio_if_needed(model_id)
+    bin_files = sorted(Path(local_dir).rglob("*.bin"))
+    return bin_files[0] if bin_files else None
 
+
+@contextmanager
+def load_model_llm(model_id: str, **kwargs: Any) -> Iterator[Any]:
+    """Mượn model llama.cpp từ registry dùng chung (mmap, LRU theo memory budget).
+
+    Dùng trong khối `with`: model chỉ được một thread dùng tại một thời điểm và
+    không bị giải phóng cho tới khi ra khỏi khối. Trả về None nếu không có model.
+    """
     # Trường hợp: Ollama / llama.cpp (.bin)
-    bin_files = list(Path(local_dir).rglob("*.bin"))
-    if bin_files and Llama is not None:
-        model_file = bin_files[0]
-        print(f" Đang load LLaMA model từ {model_file}")
-        return Llama(model_path=str(model_file), **kwargs)
-    return None
+    model_file = find_model_file(model_id)
+    if model_file is None or Llama is None:
+        yield None
+        return
+    with get_model_registry().lease(model_file, **kwargs) as model:
+        yield model
 
 
 def load_atta_file(atta_file_id: str) -> Path:
@@ -76,12 +89,12 @@ def load_atta_file(atta_file_id: str) -> Path:
 if __name__ == "__main__":
     # Ví dụ: tải model ollama từ MinIO
     model_id = "ollama"  # Thư mục chứa file .bin trên MinIO
-    llm = load_model_llm(
+    with load_model_llm(
         model_id,
         n_ctx=2048,
         n_threads=8,
         verbose=False,
-    )
-    # llama_cpp model
-    output = llm("Tôi đang đi làm", max_tokens=50)
+    ) as llm:
+        # llama_cpp model
+        output = llm("Tôi đang đi làm", max_tokens=50)
     print(output["choices"][0]["text"])
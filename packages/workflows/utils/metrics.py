@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING
+
+from logger.src.logger import get_logger
+from logger.src.logger.contextualize_logger import bound
+from libs.openai_api_client.src.openai_api_client.http_client import client_stats
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+log = get_logger(__name__)
+
+# Ngưỡng (giây) của histogram thời gian các bước
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+LabelValues = tuple[tuple[str, str], ...]
+
+
+def _format_labels(labels: LabelValues, extra: str = "") -> str:
+    parts = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str) -> None:
+        self.name = name
+        self.documentation = documentation
+        self._values: dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        with self._lock:
+            lines.extend(
+                f"{self.name}{_format_labels(labels)} {value}"
+                for labels, value in self._values.items()
+            )
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self, name: str, documentation: str, buckets: tuple[float, ...] = DURATION_BUCKETS
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        # labels -> (số quan sát theo từng bucket, tổng, số lượng)
+        self._values: dict[LabelValues, tuple[list[int], float, int]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound_value in enumerate(self.buckets):
+                if value <= bound_value:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            for labels, (counts, total, count) in self._values.items():
+                for bound_value, bucket_count in zip(self.buckets, counts):
+                    le = _format_labels(labels, f'le="{bound_value}"')
+                    lines.append(f"{self.name}_bucket{le} {bucket_count}")
+                le = _format_labels(labels, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{le} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+# == Metrics của pipeline xử lý mail ==
+STAGE_DURATION = Histogram(
+    "mail_pipeline_stage_duration_seconds", "Thời gian mỗi bước xử lý một email"
+)
+STAGE_ERRORS = Counter("mail_pipeline_stage_errors_total", "Số lần một bước bị lỗi")
+BYTES_FETCHED = Counter("mail_bytes_fetched_total", "Số byte tệp đính kèm đã tải từ Gmail")
+PAGES_CONVERTED = Counter("mail_pages_converted_total", "Số trang docling đã chuyển đổi")
+DOCS_INDEXED = Counter("mail_docs_indexed_total", "Số document đã index vào OpenSearch")
+
+METRICS = [
+    STAGE_DURATION,
+    STAGE_ERRORS,
+    BYTES_FETCHED,
+    PAGES_CONVERTED,
+    DOCS_INDEXED,
+]
+
+# Các metrics lấy từ nơi khác (vd. số lần retry của OpenAI client), đọc lúc render
+_collectors: list[Callable[[], list[str]]] = []
+
+
+def register_collector(collector: Callable[[], list[str]]) -> None:
+    _collectors.append(collector)
+
+
+def _openai_client_metrics() -> list[str]:
+    """Số request/retry/token của các OpenAI client (embedding, chat) trong process."""
+    lines = [
+        "# HELP openai_requests_total Số request đã gửi tới OpenAI API (kể cả retry)",
+        "# TYPE openai_requests_total counter",
+        f"openai_requests_total {client_stats.requests}",
+        "# HELP openai_retries_total Số lần retry (429, timeout, lỗi kết nối, 5xx)",
+        "# TYPE openai_retries_total counter",
+        f"openai_retries_total {client_stats.retries}",
+        "# HELP openai_tokens_total Số token đã dùng theo endpoint (embeddings, chat)",
+        "# TYPE openai_tokens_total counter",
+    ]
+    lines.extend(
+        f'openai_tokens_total{{endpoint="{endpoint}"}} {tokens}'
+        for endpoint, tokens in sorted(client_stats.tokens.items())
+    )
+    return lines
+
+
+register_collector(_openai_client_metrics)
+
+
+def render_metrics() -> str:
+    """Nội dung endpoint `/metrics` (Prometheus text format 0.0.4)."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    for collector in _collectors:
+        lines.extend(collector())
+    return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def stage_span(stage: str, **fields: str) -> Iterator[None]:
+    """Đo thời gian một bước: ghi log structlog (kèm `fields`, vd. thread_id/mail_id)
+    và cập nhật histogram/counter lỗi của bước đó."""
+    with bound(**fields):
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            duration = time.perf_counter() - start
+            STAGE_ERRORS.inc(stage=stage)
+            log.warning(
+                "mail_pipeline.stage.error",
+                stage=stage,
+                duration_ms=round(duration * 1000, 3),
+                error=str(e),
+            )
+            raise
+        else:
+            duration = time.perf_counter() - start
+            log.info(
+                "mail_pipeline.stage",
+                stage=stage,
+                duration_ms=round(duration * 1000, 3),
+            )
+        finally:
+            STAGE_DURATION.observe(duration, stage=stage)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        pass
+
+
+_server: ThreadingHTTPServer | None = None
+
+
+def start_metrics_server(
+    port: int, host: str = "0.0.0.0", port_count: int = 1  # noqa: S104
+) -> ThreadingHTTPServer | None:
+    """Mở endpoint `/metrics` ở một luồng nền (chỉ một lần mỗi process).
+
+    Mỗi process (vd. các worker dramatiq) có metrics riêng nên cần port riêng: thử lần
+    lượt `port`, `port + 1`, ... (tối đa `port_count` port) và dùng port trống đầu tiên.
+    Hết port trống thì bỏ qua, không lỗi.
+    """
+    global _server
+    if _server is not None:
+        return _server
+    for candidate in range(port, min(port + port_count, 65536)):
+        try:
+            _server = ThreadingHTTPServer((host, candidate), _MetricsHandler)
+        except OSError:
+            continue
+        threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+        log.info("metrics.server.started", port=candidate)
+        return _server
+
+    log.warning("metrics.server.unavailable", port=port, port_count=port_count)
+    return None
@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from logger.src.logger import get_logger
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from botocore.client import BaseClient
+
+log = get_logger(__name__)
+
+# File ghi lại ETag/size của các object đã tải xong, dùng để bỏ qua ở lần sau
+MANIFEST_FILE = ".minio_manifest.json"
+# Khóa giữa các process (vd. các worker dramatiq) cùng đồng bộ vào một thư mục
+LOCK_FILE = ".minio_sync.lock"
+READ_BLOCK_SIZE = 1024 * 1024
+
+
+@dataclass
+class RemoteObject:
+    key: str
+    relative_path: str
+    size: int
+    etag: str
+
+
+@dataclass
+class _Download:
+    """Trạng thái tải một object: file `.part` và danh sách đoạn đã xong."""
+
+    obj: RemoteObject
+    target: Path
+    chunk_size: int
+    done: set[int] = field(default_factory=set)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @property
+    def part_path(self) -> Path:
+        return self.target.with_name(self.target.name + ".part")
+
+    @property
+    def state_path(self) -> Path:
+        return self.target.with_name(self.target.name + ".part.json")
+
+    @property
+    def chunk_count(self) -> int:
+        return max(1, -(-self.obj.size // self.chunk_size))
+
+    def chunk_range(self, index: int) -> tuple[int, int]:
+        start = index * self.chunk_size
+        return start, min(start + self.chunk_size, self.obj.size) - 1
+
+    def save_state(self) -> None:
+        state = {
+            "etag": self.obj.etag,
+            "size": self.obj.size,
+            "chunk_size": self.chunk_size,
+            "done": sorted(self.done),
+        }
+        tmp_path = self.state_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(state), encoding="utf-8")
+        tmp_path.replace(self.state_path)
+
+
+def list_remote_objects(
+    client: BaseClient, bucket: str, prefix: str
+) -> list[RemoteObject]:
+    """Liệt kê các object dưới `prefix` kèm size và ETag."""
+    paginator = client.get_paginator("list_objects_v2")
+    objects = []
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            key = obj["Key"]
+            if key.endswith("/"):
+                continue
+            objects.append(
+                RemoteObject(
+                    key=key,
+                    relative_path=Path(key).relative_to(prefix).as_posix(),
+                    size=obj["Size"],
+                    etag=obj["ETag"].strip('"'),
+                )
+            )
+    return objects
+
+
+def sync_from_minio(
+    client: BaseClient,
+    bucket: str,
+    prefix: str,
+    local_path: Path,
+    *,
+    workers: int,
+    chunk_size: int,
+) -> list[RemoteObject]:
+    """Đồng bộ các object dưới `prefix` về `local_path`.
+
+    - Object đã có đúng size/ETag (theo manifest) được bỏ qua.
+    - Object lớn được chia thành các đoạn `chunk_size` byte, tải song song bằng
+      ranged GET vào file `.part`; các đoạn đã xong được ghi lại nên lần chạy sau
+      chỉ tải tiếp phần còn thiếu.
+    - Tải xong thì kiểm tra size (và MD5 nếu ETag là MD5), rồi rename atomically.
+
+    - Không liệt kê được object (vd. MinIO không chạy) thì dùng bản đã tải về nếu
+      manifest có và các file còn đủ.
+    - Nhiều process cùng đồng bộ vào `local_path` thì lần lượt từng process (khóa
+      file `LOCK_FILE`): process sau thấy object đã tải xong qua manifest.
+
+    Trả về danh sách object dưới prefix; rỗng nếu prefix không có object nào.
+    """
+    manifest_path = local_path / MANIFEST_FILE
+    manifest = _read_json(manifest_path)
+
+    try:
+        objects = list_remote_objects(client, bucket, prefix)
+    except (BotoCoreError, ClientError) as e:
+        cached = _cached_objects(prefix, local_path, manifest)
+        if not cached:
+            raise
+        log.warning("minio_sync.list.failed_using_cache", prefix=prefix, error=str(e))
+        return cached
+    if not objects:
+        return objects
+
+    local_path.mkdir(parents=True, exist_ok=True)
+    with _sync_lock(local_path):
+        # Đọc lại: process giữ khóa trước đó có thể vừa tải xong
+        manifest = _read_json(manifest_path)
+        _download_objects(
+            client, bucket, objects, local_path, manifest, manifest_path, workers, chunk_size
+        )
+    return objects
+
+
+@contextmanager
+def _sync_lock(local_path: Path) -> Iterator[None]:
+    with (local_path / LOCK_FILE).open("a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _download_objects(
+    client: BaseClient,
+    bucket: str,
+    objects: list[RemoteObject],
+    local_path: Path,
+    manifest: dict[str, Any],
+    manifest_path: Path,
+    workers: int,
+    chunk_size: int,
+) -> None:
+    downloads = [
+        _prepare_download(obj, local_path / obj.relative_path, chunk_size)
+        for obj in objects
+        if not _is_up_to_date(obj, local_path / obj.relative_path, manifest, manifest_path)
+    ]
+    if not downloads:
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_download_chunk, client, bucket, download, index): download
+            for download in downloads
+            for index in range(download.chunk_count)
+            if index not in download.done
+        }
+        # Object không còn đoạn nào phải tải (đã xong ở lần chạy trước)
+        pending = {download.obj.key: download for download in downloads}
+        for download in downloads:
+            if len(download.done) == download.chunk_count:
+                _finalize(download, manifest, manifest_path)
+                pending.pop(download.obj.key)
+
+        for future in as_completed(futures):
+            download = futures[future]
+            future.result()
+            if (
+                download.obj.key in pending
+                and len(download.done) == download.chunk_count
+            ):
+                _finalize(download, manifest, manifest_path)
+                pending.pop(download.obj.key)
+
+
+def _cached_objects(
+    prefix: str, local_path: Path, manifest: dict[str, Any]
+) -> list[RemoteObject]:
+    """Các object trong manifest, nếu file local của tất cả đều còn đúng size."""
+    objects = [
+        RemoteObject(
+            key=f"{prefix}/{relative_path}",
+            relative_path=relative_path,
+            size=entry["size"],
+            etag=entry["etag"],
+        )
+        for relative_path, entry in manifest.items()
+    ]
+    for obj in objects:
+        target = local_path / obj.relative_path
+        if not target.exists() or target.stat().st_size != obj.size:
+            return []
+    return objects
+
+
+def _is_up_to_date(
+    obj: RemoteObject, target: Path, manifest: dict[str, Any], manifest_path: Path
+) -> bool:
+    if not target.exists() or target.stat().st_size != obj.size:
+        return False
+
+    entry = manifest.get(obj.relative_path)
+    if entry is not None:
+        return entry.get("etag") == obj.etag
+
+    # Không có trong manifest (vd: tải bằng phiên bản cũ): kiểm tra MD5 nếu được,
+    # rồi ghi vào manifest để lần sau không phải hash lại
+    if _is_md5_etag(obj.etag) and _md5(target) == obj.etag:
+        _record(obj, manifest, manifest_path)
+        return True
+    return False
+
+
+def _prepare_download(obj: RemoteObject, target: Path, chunk_size: int) -> _Download:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    download = _Download(obj=obj, target=target, chunk_size=chunk_size)
+
+    # Tiếp tục lần tải dở nếu object không thay đổi
+    state = _read_json(download.state_path)
+    if (
+        download.part_path.exists()
+        and state.get("etag") == obj.etag
+        and state.get("size") == obj.size
+        and state.get("chunk_size") == chunk_size
+    ):
+        download.done = set(state.get("done", []))
+    else:
+        with download.part_path.open("wb") as part_file:
+            part_file.truncate(obj.size)
+        download.save_state()
+
+    return download
+
+
+def _download_chunk(
+    client: BaseClient, bucket: str, download: _Download, index: int
+) -> None:
+    start, end = download.chunk_range(index)
+    if download.obj.size > 0:
+        response = client.get_object(
+            Bucket=bucket,
+            Key=download.obj.key,
+            Range=f"bytes={start}-{end}",
+            IfMatch=download.obj.etag,
+        )
+        body = response["Body"]
+        with download.part_path.open("r+b") as part_file:
+            part_file.seek(start)
+            while block := body.read(READ_BLOCK_SIZE):
+                part_file.write(block)
+
+    with download.lock:
+        download.done.add(index)
+        download.save_state()
+
+
+def _finalize(
+    download: _Download, manifest: dict[str, Any], manifest_path: Path
+) -> None:
+    obj = download.obj
+    size = download.part_path.stat().st_size
+    if size != obj.size:
+        msg = f"Sai kích thước khi tải `{obj.key}`: {size} != {obj.size}"
+        raise OSError(msg)
+    if _is_md5_etag(obj.etag) and _md5(download.part_path) != obj.etag:
+        # Xóa trạng thái để lần sau tải lại từ đầu
+        download.state_path.unlink(missing_ok=True)
+        msg = f"Sai checksum khi tải `{obj.key}`"
+        raise OSError(msg)
+
+    os.replace(download.part_path, download.target)
+    download.state_path.unlink(missing_ok=True)
+
+    _record(obj, manifest, manifest_path)
+
+
+def _record(obj: RemoteObject, manifest: dict[str, Any], manifest_path: Path) -> None:
+    manifest[obj.relative_path] = {"etag": obj.etag, "size": obj.size}
+    tmp_path = manifest_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    tmp_path.replace(manifest_path)
+
+
+def _is_md5_etag(etag: str) -> bool:
+    # ETag của multipart upload có dạng "<md5>-<số part>", không phải MD5 của file
+    return len(etag) == 32 and "-" not in etag  # noqa: PLR2004
+
+
+def _md5(path: Path) -> str:
+    digest = hashlib.md5()  # noqa: S324
+    with path.open("rb") as file:
+        while block := file.read(READ_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_json(path: Path) -> dict[str, Any]:
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except ValueError:
+        return {}
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from workflows.config import get_config
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+try:
+    from llama_cpp import Llama
+except ImportError:
+    Llama = None
+
+
+@dataclass
+class _LoadedModel:
+    model: Any
+    size_bytes: int
+    # Context llama.cpp không thread-safe: mỗi lúc chỉ một thread dùng model
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    # Số lease đang mở; model bị giải phóng khi đang dùng thì chỉ close khi về 0
+    leases: int = 0
+    released: bool = False
+
+
+class ModelRegistry:
+    """Giữ các model llama.cpp đã load trong process, dùng lại giữa các lần gọi.
+
+    - Trọng số được mmap từ file (`use_mmap=True`) thay vì copy vào heap, nên các
+      worker process trên cùng máy dùng chung page cache của file model: thêm
+      worker không làm RSS tăng thêm một bản model.
+    - `use_mlock=True` khóa các page đó trong RAM (tránh bị swap/evict) cho các
+      deployment cần độ trễ thấp.
+    - Khi tổng kích thước model vượt `memory_budget_bytes`, model dùng lâu nhất
+      (LRU) mà không có ai đang dùng bị giải phóng.
+    - Model chỉ được dùng qua `lease`: các thread (vd. actor dramatiq) dùng chung
+      một model lần lượt, và model không bị close khi đang có lease.
+    - Model được load ngoài khóa chung của registry (load lâu không chặn các model
+      khác); các thread cùng cần một model đang load thì chờ chung lần load đó.
+    """
+
+    def __init__(
+        self, memory_budget_bytes: int | None = None, *, use_mlock: bool = False
+    ) -> None:
+        self.memory_budget_bytes = memory_budget_bytes
+        self.use_mlock = use_mlock
+
+        self._models: OrderedDict[tuple[str, str], _LoadedModel] = OrderedDict()
+        # Các model đang được load: key -> kết quả lần load đó
+        self._loading: dict[tuple[str, str], Future[_LoadedModel]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def loaded_bytes(self) -> int:
+        return sum(loaded.size_bytes for loaded in self._models.values())
+
+    @contextmanager
+    def lease(self, model_file: Path, **kwargs: Any) -> Iterator[Any]:
+        """Mượn model của `model_file` (cùng tham số), load nếu chưa có.
+
+        Giữ khóa riêng của model trong suốt khối `with`, nên các thread khác dùng
+        cùng model phải chờ; model không bị giải phóng cho tới khi trả lại.
+        """
+        loaded = self._acquire(model_file, kwargs)
+        try:
+            with loaded.lock:
+                yield loaded.model
+        finally:
+            with self._lock:
+                loaded.leases -= 1
+                if loaded.released and loaded.leases == 0:
+                    self._close(loaded)
+
+    def evict(self, model_file: Path | None = None) -> None:
+        """Giải phóng các model của `model_file` (hoặc tất cả nếu không truyền).
+
+        Model đang được mượn sẽ được close khi lease cuối cùng kết thúc.
+        """
+        with self._lock:
+            for key in list(self._models):
+                if model_file is None or key[0] == str(model_file):
+                    self._release(key)
+
+    def _acquire(self, model_file: Path, kwargs: dict[str, Any]) -> _LoadedModel:
+        if Llama is None:
+            msg = "Chưa cài đặt llama-cpp-python"
+            raise ImportError(msg)
+
+        key = (str(model_file), repr(sorted(kwargs.items())))
+        while True:
+            with self._lock:
+                loaded = self._models.get(key)
+                if loaded is not None:
+                    self._models.move_to_end(key)
+                    loaded.leases += 1
+                    return loaded
+                loading = self._loading.get(key)
+                if loading is None:
+                    size_bytes = model_file.stat().st_size
+                    self._evict_for(size_bytes)
+                    future = self._loading[key] = Future()
+                    break
+            # Thread khác đang load model này: chờ rồi lấy lại từ `_models`
+            # (lỗi khi load được raise cho cả các thread đang chờ)
+            loading.result()
+
+        try:
+            print(f" Đang load LLaMA model từ {model_file}")
+            model = Llama(
+                model_path=str(model_file),
+                **{"use_mmap": True, "use_mlock": self.use_mlock, **kwargs},
+            )
+        except BaseException as e:
+            with self._lock:
+                del self._loading[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            loaded = self._models[key] = _LoadedModel(model=model, size_bytes=size_bytes)
+            loaded.leases += 1
+            del self._loading[key]
+        future.set_result(loaded)
+        return loaded
+
+    def _evict_for(self, size_bytes: int) -> None:
+        if self.memory_budget_bytes is None:
+            return
+        # Chỉ giải phóng model không ai đang dùng, theo thứ tự LRU
+        for key in [key for key, loaded in self._models.items() if loaded.leases == 0]:
+            if self.loaded_bytes + size_bytes <= self.memory_budget_bytes:
+                return
+            self._release(key)
+
+    def _release(self, key: tuple[str, str]) -> None:
+        loaded = self._models.pop(key)
+        loaded.released = True
+        print(f" Giải phóng model {key[0]}")
+        if loaded.leases == 0:
+            self._close(loaded)
+
+    @staticmethod
+    def _close(loaded: _LoadedModel) -> None:
+        close = getattr(loaded.model, "close", None)
+        if close is not None:
+            close()
+
+
+_registry: ModelRegistry | None = None
+
+
+def get_model_registry() -> ModelRegistry:
+    """Registry dùng chung cho cả process, cấu hình theo WorkflowsBaseConfig."""
+    global _registry
+    if _registry is None:
+        config = get_config()
+        budget_mb = config.model_memory_budget_mb
+        _registry = ModelRegistry(
+            memory_budget_bytes=budget_mb * 1024 * 1024 if budget_mb else None,
+            use_mlock=config.model_use_mlock,
+        )
+    return _registry
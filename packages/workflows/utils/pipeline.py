@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+
+# Đánh dấu hết dữ liệu trong queue giữa các stage
+_DONE = object()
+# Trả về từ `_get` khi pipeline bị dừng giữa chừng
+_STOPPED = object()
+
+
+@dataclass
+class Stage:
+    """Một bước của pipeline: `func(item) -> item` chạy trên `workers` luồng."""
+
+    name: str
+    func: Callable[[Any], Any]
+    workers: int = 1
+
+
+@dataclass
+class StageResult:
+    """Kết quả cuối của một item; `error` khác None nếu có stage bị lỗi."""
+
+    item: Any
+    error: BaseException | None = None
+    failed_stage: str | None = None
+
+
+def run_pipeline(
+    items: Iterable[Any], stages: list[Stage], queue_size: int = 16
+) -> Iterator[StageResult]:
+    """Chạy `items` qua các stage nối tiếp nhau bằng queue có giới hạn.
+
+    - Mỗi stage có số luồng riêng, các stage chạy chồng lên nhau: tổng thời gian
+      tiến tới thời gian của stage chậm nhất thay vì tổng thời gian các stage.
+    - Queue giới hạn `queue_size` tạo back-pressure: stage nhanh sẽ chờ khi stage
+      sau chưa kịp xử lý, bộ nhớ không tăng theo số item.
+    - Item bị lỗi ở một stage không đi tiếp mà được trả về ngay kèm lỗi.
+
+    Kết quả được yield (ở luồng gọi) theo thứ tự hoàn thành, không theo thứ tự vào.
+    """
+    queues: list[queue.Queue] = [queue.Queue(maxsize=queue_size) for _ in stages]
+    results: queue.Queue = queue.Queue(maxsize=queue_size)
+    outputs = [*queues[1:], results]
+    stop = threading.Event()
+
+    def _put(q: queue.Queue, value: Any) -> bool:
+        # Không chặn mãi khi bên nhận đã dừng (vd. luồng gọi ngừng đọc kết quả)
+        while not stop.is_set():
+            try:
+                q.put(value, timeout=0.1)
+            except queue.Full:
+                continue
+            return True
+        return False
+
+    def _get(q: queue.Queue) -> Any:
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _STOPPED
+
+    def _feed() -> None:
+        try:
+            for item in items:
+                if not _put(queues[0], item):
+                    return
+        except Exception as e:
+            logging.error(f"Lỗi khi đọc dữ liệu đầu vào của pipeline: {e}")
+        finally:
+            for _ in range(stages[0].workers):
+                _put(queues[0], _DONE)
+
+    def _work(index: int, remaining: list[int], lock: threading.Lock) -> None:
+        stage = stages[index]
+        output = outputs[index]
+        while True:
+            item = _get(queues[index])
+            if item is _STOPPED:
+                return
+            if item is _DONE:
+                break
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                logging.error(f"Lỗi ở stage {stage.name}: {e}")
+                if not _put(results, StageResult(item, e, stage.name)):
+                    return
+                continue
+            if output is results:
+                result = StageResult(result)
+            if not _put(output, result):
+                return
+
+        # Luồng cuối cùng của stage báo hết dữ liệu cho stage sau
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            next_workers = stages[index + 1].workers if index + 1 < len(stages) else 1
+            for _ in range(next_workers):
+                _put(output, _DONE)
+
+    threads = [threading.Thread(target=_feed, name="pipeline-feed", daemon=True)]
+    for index, stage in enumerate(stages):
+        remaining, lock = [stage.workers], threading.Lock()
+        threads.extend(
+            threading.Thread(
+                target=_work,
+                args=(index, remaining, lock),
+                name=f"pipeline-{stage.name}-{i}",
+                daemon=True,
+            )
+            for i in range(stage.workers)
+        )
+    for thread in threads:
+        thread.start()
+
+    try:
+        while True:
+            value = results.get()
+            if value is _DONE:
+                break
+            yield value
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join(timeout=1)
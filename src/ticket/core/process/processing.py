@@ -1,88 +1,72 @@
+from __future__ import annotations
+
 import os
-import re
+import threading
+from typing import TYPE_CHECKING
 
-import boto3
 from dotenv import load_dotenv
 
-load_dotenv()
+from ticket.core.process.stopwords import get_stopword_provider
+from ticket.core.process.text_normalizer import TextNormalizer
 
+if TYPE_CHECKING:
+    from collections.abc import Iterable
 
-def load_stopwords_from_minio(file_path: str) -> set[str]:
-    """
-    Load stopwords từ file trên MinIO
-    """
-    endpoint = os.getenv("TICKET_OPENAI_API_URL")
-    access_key = os.getenv("TICKET_MINIO_ACCESS_KEY")
-    secret_key = os.getenv("TICKET_MINIO_SECRET_KEY")
-    bucket_name = os.getenv("TICKET_MINIO_BUCKET")
-
-    if not all([endpoint, access_key, secret_key, bucket_name, file_path]):
-        print("Thiếu thông tin MinIO hoặc file_path rỗng.")
-        return set()
-
-    try:
-        client = boto3.client(
-            "s3",
-            endpoint_url=endpoint,
-            aws_access_key_id=access_key,
-            aws_secret_access_key=secret_key,
-        )
-        response = client.get_object(Bucket=bucket_name, Key=file_path)
-        content = response["Body"].read().decode("utf-8")
-        return {line.strip().lower() for line in content.splitlines() if line.strip()}
-    except Exception as e:
-        print(f"Không thể tải stopwords từ MinIO: {file_path} - {e}")
-        return set()
-
-
-# Load stopwords từ MinIO (tiếng Việt, tiếng Anh)
+load_dotenv()
+
+# File stopwords trên MinIO (tiếng Việt, tiếng Anh), chỉ được tải khi dùng lần đầu
 STOPWORDS_VI_PATH = os.getenv("STOPWORDS_VIE")
 STOPWORDS_EN_PATH = os.getenv("STOPWORDS_EN")
-STOPWORDS_VI = load_stopwords_from_minio(STOPWORDS_VI_PATH)
-STOPWORDS_EN = load_stopwords_from_minio(STOPWORDS_EN_PATH)
-STOPWORDS_ALL = STOPWORDS_VI | STOPWORDS_EN
-
-# Regex bắt emoji
-EMOJI_PATTERN = re.compile(
-    "["
-    "\U0001f600-\U0001f64f"  # emoticons
-    "\U0001f300-\U0001f5ff"  # symbols & pictographs
-    "\U0001f680-\U0001f6ff"  # transport & map symbols
-    "\U0001f1e0-\U0001f1ff"  # flags
-    "]+",
-    flags=re.UNICODE,
-)
+
+# use_lang -> (phiên bản stopwords lúc build, bộ làm sạch)
+_normalizers: dict[str, tuple[int, TextNormalizer]] = {}
+_normalizers_lock = threading.Lock()
+
+
+def get_stopwords(use_lang: str = "all") -> frozenset[str]:
+    """Lấy stopwords theo ngôn ngữ ("vi", "en", mặc định "all")."""
+    provider = get_stopword_provider()
+    if use_lang == "vi":
+        return provider.get(STOPWORDS_VI_PATH)
+    if use_lang == "en":
+        return provider.get(STOPWORDS_EN_PATH)
+    return provider.get(STOPWORDS_VI_PATH) | provider.get(STOPWORDS_EN_PATH)
+
+
+def reload_stopwords() -> None:
+    """Hot reload: kiểm tra lại stopwords với MinIO, build lại bộ lọc nếu có thay đổi."""
+    get_stopword_provider().reload()
+
+
+def get_normalizer(use_lang: str = "all") -> TextNormalizer:
+    """Bộ làm sạch theo ngôn ngữ, build lười và build lại khi stopwords thay đổi."""
+    if use_lang not in {"vi", "en"}:
+        use_lang = "all"
+
+    provider = get_stopword_provider()
+    with _normalizers_lock:
+        cached = _normalizers.get(use_lang)
+        if cached is not None and cached[0] == provider.version:
+            return cached[1]
+
+        normalizer = TextNormalizer(get_stopwords(use_lang))
+        _normalizers[use_lang] = (provider.version, normalizer)
+        return normalizer
 
 
 def clean_text(raw_text: str, use_lang: str = "all") -> str:
     """
     1. Xóa HTML tags
     2. Xóa emoji
-    3. Xóa stopwords (từ MinIO)
+    3. Chuẩn hóa Unicode (NFC) và chữ thường
+    4. Xóa stopwords (từ MinIO), kể cả cụm nhiều âm tiết như "của mình"
        - use_lang = "vi"  -> chỉ dùng stopwords tiếng Việt
        - use_lang = "en"  -> chỉ dùng stopwords tiếng Anh
        - use_lang = "all" -> cả 2
     """
-    # Xóa HTML tag
-    text = re.sub(re.compile("<.*?>"), "", raw_text)
-
-    # Xóa emoji
-    text = EMOJI_PATTERN.sub(r"", text)
-
-    # Chọn stopwords theo ngôn ngữ
-    if use_lang == "vi":
-        stop_words = STOPWORDS_VI
-    elif use_lang == "en":
-        stop_words = STOPWORDS_EN
-    else:
-        stop_words = STOPWORDS_ALL
-
-    # Tokenize và lọc stopwords
-    tokens = re.findall(r"\b\w+\b", text.lower())
-    filtered_tokens = [w for w in tokens if w not in stop_words]
-
-    return " ".join(filtered_tokens)
+    return get_normalizer(use_lang).clean(raw_text)
 
 
-sample = "<p>Hello 😃, đây là ví dụ để test stopwords!</p>"
-print(clean_text(sample, use_lang="all"))
+def clean_texts(raw_texts: Iterable[str], use_lang: str = "all") -> list[str]:
+    """Làm sạch nhiều text cùng lúc (dùng chung một bộ lọc stopwords)."""
+    return get_normalizer(use_lang).clean_many(raw_texts)
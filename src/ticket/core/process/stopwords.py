@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from logger.src.logger import get_logger
+
+if TYPE_CHECKING:
+    from botocore.client import BaseClient
+
+log = get_logger(__name__)
+
+# Sau khoảng thời gian này (giây) bản cache trên đĩa sẽ được kiểm tra lại với MinIO
+DEFAULT_REVALIDATE_AFTER = 3600
+
+_client: BaseClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_minio_client() -> BaseClient:
+    """Trả về boto3 client dùng chung cho MinIO (tạo một lần, thread-safe).
+
+    boto3 chỉ được import khi cần, để việc import package ticket không bị chậm.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import boto3
+
+                _client = boto3.client(
+                    "s3",
+                    endpoint_url=os.getenv("TICKET_MINIO_ENDPOINT"),
+                    aws_access_key_id=os.getenv("TICKET_MINIO_ACCESS_KEY"),
+                    aws_secret_access_key=os.getenv("TICKET_MINIO_SECRET_KEY"),
+                )
+    return _client
+
+
+class StopwordProvider:
+    """Cung cấp danh sách stopwords từ MinIO, load lười và cache trên đĩa.
+
+    - Lần dùng đầu tiên: đọc bản cache trên đĩa nếu có, nếu không thì tải từ MinIO.
+    - Bản cache cũ hơn `revalidate_after` giây được kiểm tra lại bằng GET có điều
+      kiện (ETag/Last-Modified); MinIO trả 304 thì giữ nguyên bản cache.
+    - `reload()` buộc kiểm tra lại ngay (hot reload) mà không cần restart.
+    """
+
+    def __init__(
+        self,
+        bucket: str | None,
+        cache_dir: Path,
+        revalidate_after: float = DEFAULT_REVALIDATE_AFTER,
+    ) -> None:
+        self.bucket = bucket
+        self.cache_dir = cache_dir
+        self.revalidate_after = revalidate_after
+        # Tăng mỗi khi nội dung stopwords thay đổi, để bên dùng biết cần build lại
+        self.version = 0
+
+        self._stopwords: dict[str, frozenset[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str | None) -> frozenset[str]:
+        """Lấy stopwords của file `key` trên MinIO (rỗng nếu không cấu hình)."""
+        if not key:
+            return frozenset()
+
+        stopwords = self._stopwords.get(key)
+        if stopwords is None:
+            with self._lock:
+                stopwords = self._stopwords.get(key)
+                if stopwords is None:
+                    stopwords = self._load(key, force_revalidate=False)
+        return stopwords
+
+    def reload(self, key: str | None = None) -> None:
+        """Kiểm tra lại với MinIO các file đã load (hoặc chỉ file `key`)."""
+        with self._lock:
+            keys = [key] if key else list(self._stopwords)
+            for k in keys:
+                self._load(k, force_revalidate=True)
+
+    def _load(self, key: str, *, force_revalidate: bool) -> frozenset[str]:
+        content_path, meta_path = self._cache_paths(key)
+        meta = self._read_meta(meta_path)
+
+        cache_age = time.time() - meta.get("checked_at", 0)
+        if (
+            content_path.exists()
+            and not force_revalidate
+            and cache_age < self.revalidate_after
+        ):
+            return self._set(key, content_path.read_text(encoding="utf-8"))
+
+        content = self._fetch(key, meta, content_path, meta_path)
+        if content is None:
+            if not content_path.exists():
+                log.warning("stopwords.unavailable", key=key)
+                return self._set(key, "")
+            content = content_path.read_text(encoding="utf-8")
+        return self._set(key, content)
+
+    def _fetch(
+        self, key: str, meta: dict[str, Any], content_path: Path, meta_path: Path
+    ) -> str | None:
+        """Tải file từ MinIO; trả về None nếu không tải được hoặc không đổi (304)."""
+        from botocore.exceptions import BotoCoreError, ClientError
+
+        if not self.bucket:
+            log.warning("stopwords.minio_not_configured", key=key)
+            return None
+
+        conditions: dict[str, Any] = {}
+        if content_path.exists():
+            if meta.get("etag"):
+                conditions["IfNoneMatch"] = meta["etag"]
+            if meta.get("last_modified"):
+                conditions["IfModifiedSince"] = meta["last_modified"]
+
+        try:
+            response = get_minio_client().get_object(
+                Bucket=self.bucket, Key=key, **conditions
+            )
+        except ClientError as e:
+            error = e.response.get("Error", {})
+            if error.get("Code") in {"304", "NotModified"}:
+                log.info("stopwords.not_modified", key=key)
+                self._write_meta(meta_path, {**meta, "checked_at": time.time()})
+                return None
+            log.warning("stopwords.fetch_error", key=key, error=str(e))
+            return None
+        except BotoCoreError as e:
+            log.warning("stopwords.fetch_error", key=key, error=str(e))
+            return None
+
+        content = response["Body"].read().decode("utf-8")
+
+        content_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = content_path.with_suffix(".tmp")
+        tmp_path.write_text(content, encoding="utf-8")
+        tmp_path.replace(content_path)
+
+        last_modified = response.get("LastModified")
+        self._write_meta(
+            meta_path,
+            {
+                "etag": response.get("ETag"),
+                "last_modified": last_modified.isoformat() if last_modified else None,
+                "checked_at": time.time(),
+            },
+        )
+        log.info("stopwords.downloaded", key=key, size=len(content))
+        return content
+
+    def _set(self, key: str, content: str) -> frozenset[str]:
+        stopwords = frozenset(
+            line.strip().lower() for line in content.splitlines() if line.strip()
+        )
+        if self._stopwords.get(key) != stopwords:
+            self._stopwords[key] = stopwords
+            self.version += 1
+        return stopwords
+
+    def _cache_paths(self, key: str) -> tuple[Path, Path]:
+        safe_name = key.strip("/").replace("/", "__")
+        content_path = self.cache_dir / safe_name
+        return content_path, content_path.with_name(f"{safe_name}.meta.json")
+
+    @staticmethod
+    def _read_meta(meta_path: Path) -> dict[str, Any]:
+        if not meta_path.exists():
+            return {}
+        try:
+            return json.loads(meta_path.read_text(encoding="utf-8"))
+        except ValueError:
+            return {}
+
+    @staticmethod
+    def _write_meta(meta_path: Path, meta: dict[str, Any]) -> None:
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        meta_path.write_text(json.dumps(meta), encoding="utf-8")
+
+
+_provider: StopwordProvider | None = None
+
+
+def get_stopword_provider() -> StopwordProvider:
+    """Provider dùng chung cho cả process, cấu hình từ biến môi trường."""
+    global _provider
+    if _provider is None:
+        cache_dir = Path(
+            os.getenv("TICKET_CACHE_DIR", "~/.cache/ticket")
+        ).expanduser()
+        _provider = StopwordProvider(
+            bucket=os.getenv("TICKET_MINIO_BUCKET"),
+            cache_dir=cache_dir / "stopwords",
+            revalidate_after=float(
+                os.getenv("TICKET_STOPWORDS_REVALIDATE_AFTER", DEFAULT_REVALIDATE_AFTER)
+            ),
+        )
+    return _provider
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+# Regex được compile một lần khi import
+HTML_TAG_PATTERN = re.compile(r"<[^>]*>")
+TOKEN_PATTERN = re.compile(r"\w+")
+EMOJI_PATTERN = re.compile(
+    "["
+    "\U0001f600-\U0001f64f"  # emoticons
+    "\U0001f300-\U0001f5ff"  # symbols & pictographs
+    "\U0001f680-\U0001f6ff"  # transport & map symbols
+    "\U0001f1e0-\U0001f1ff"  # flags
+    "]+",
+    flags=re.UNICODE,
+)
+
+# Key đánh dấu node kết thúc một cụm stopword trong trie (token không bao giờ rỗng)
+_END = ""
+
+
+def normalize_text(text: str) -> str:
+    """Chuẩn hóa Unicode về dạng NFC và chuyển về chữ thường.
+
+    Tiếng Việt dạng tổ hợp (NFD) bị `\\w` tách giữa chữ và dấu, nên phải NFC trước
+    khi tách token.
+    """
+    return unicodedata.normalize("NFC", text).lower()
+
+
+def tokenize(text: str) -> list[str]:
+    """Tách token (chữ/số) từ text đã chuẩn hóa."""
+    return TOKEN_PATTERN.findall(text)
+
+
+class StopwordMatcher:
+    """Lọc stopwords, hỗ trợ cả cụm nhiều âm tiết (vd: "của mình").
+
+    Các cụm stopword được lưu trong một trie theo token; khi lọc, tại mỗi vị trí
+    chọn cụm khớp dài nhất rồi bỏ qua toàn bộ các token của cụm đó.
+    """
+
+    def __init__(self, stopwords: Iterable[str]) -> None:
+        self._single: set[str] = set()
+        self._trie: dict[str, dict] = {}
+        self.max_phrase_len = 0
+
+        for stopword in stopwords:
+            tokens = tokenize(normalize_text(stopword))
+            if not tokens:
+                continue
+            if len(tokens) == 1:
+                self._single.add(tokens[0])
+                continue
+
+            node = self._trie
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node[_END] = {}
+            self.max_phrase_len = max(self.max_phrase_len, len(tokens))
+
+    def __len__(self) -> int:
+        return len(self._single) + self._count_phrases(self._trie)
+
+    def filter(self, tokens: list[str]) -> list[str]:
+        """Trả về danh sách token sau khi bỏ stopwords (đơn và cụm)."""
+        single = self._single
+        trie = self._trie
+        if not trie:
+            return [token for token in tokens if token not in single]
+
+        kept: list[str] = []
+        i = 0
+        n = len(tokens)
+        while i < n:
+            token = tokens[i]
+            node = trie.get(token)
+            if node is not None:
+                # Tìm cụm dài nhất bắt đầu tại i
+                match_end = 0
+                j = i + 1
+                while True:
+                    if _END in node:
+                        match_end = j
+                    if j >= n:
+                        break
+                    node = node.get(tokens[j])
+                    if node is None:
+                        break
+                    j += 1
+                if match_end:
+                    i = match_end
+                    continue
+
+            if token not in single:
+                kept.append(token)
+            i += 1
+
+        return kept
+
+    @classmethod
+    def _count_phrases(cls, node: dict[str, dict]) -> int:
+        return sum(
+            1 if key == _END else cls._count_phrases(child)
+            for key, child in node.items()
+        )
+
+
+class TextNormalizer:
+    """Làm sạch text: bỏ HTML, emoji, chuẩn hóa NFC, tách token và lọc stopwords."""
+
+    def __init__(self, stopwords: Iterable[str]) -> None:
+        self.matcher = StopwordMatcher(stopwords)
+
+    def clean(self, raw_text: str) -> str:
+        text = HTML_TAG_PATTERN.sub(" ", raw_text)
+        text = EMOJI_PATTERN.sub("", text)
+        tokens = tokenize(normalize_text(text))
+        return " ".join(self.matcher.filter(tokens))
+
+    def clean_many(self, raw_texts: Iterable[str]) -> list[str]:
+        clean = self.clean
+        return [clean(raw_text) for raw_text in raw_texts]
@@ -0,0 +1,124 @@
+"""Benchmark clean_text: bản cũ (regex + list comprehension) so với TextNormalizer.
+
+Corpus lấy từ dữ liệu mail thật trong repo:
+- `output/*.json`: plain_text và nội dung đính kèm của các hội thoại đã crawl
+- `mail_fetcher.log`: subject của các mail bị bỏ qua
+
+Chạy:
+    python test/benchmark/bench_clean_text.py --repeat 20
+    python test/benchmark/bench_clean_text.py --stopwords-vi vi.txt --stopwords-en en.txt
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+from ticket.core.process.text_normalizer import (  # noqa: E402
+    EMOJI_PATTERN,
+    TextNormalizer,
+)
+
+# Một phần stopwords dùng khi không truyền file (gồm cả cụm nhiều âm tiết)
+SAMPLE_STOPWORDS = {
+    "và", "là", "của", "có", "cho", "các", "những", "được", "trong", "với",
+    "này", "đã", "để", "thì", "mà", "bạn", "tôi", "mình", "của mình", "của bạn",
+    "bởi vì", "cho nên", "tuy nhiên", "vì vậy", "hãy", "một", "the", "a", "an",
+    "and", "of", "to", "in", "is", "for", "on", "with", "as", "by", "at", "it",
+    "this", "that", "be", "are", "from", "or", "we", "you", "in order to",
+}  # fmt: skip
+
+
+def load_corpus() -> list[str]:
+    texts: list[str] = []
+
+    for json_path in sorted((ROOT_DIR / "output").glob("*.json")):
+        data = json.loads(json_path.read_text(encoding="utf-8"))
+        for message in data.get("messages", []):
+            texts.append(message.get("plain_text") or "")
+            texts.extend(
+                attachment.get("attachment_context") or ""
+                for attachment in message.get("attachments", [])
+            )
+
+    log_path = ROOT_DIR / "mail_fetcher.log"
+    if log_path.exists():
+        for line in log_path.read_text(encoding="utf-8").splitlines():
+            _, sep, subject = line.partition("Bỏ qua mail không hợp lệ: ")
+            if sep:
+                texts.append(subject)
+
+    return [text for text in texts if text]
+
+
+def load_stopwords(path: str | None) -> set[str]:
+    if path is None:
+        return set()
+    lines = Path(path).read_text(encoding="utf-8").splitlines()
+    return {line.strip().lower() for line in lines if line.strip()}
+
+
+def legacy_clean_text(raw_text: str, stop_words: set[str]) -> str:
+    """Bản clean_text cũ, giữ lại để so sánh."""
+    text = re.sub(re.compile("<.*?>"), "", raw_text)
+    text = EMOJI_PATTERN.sub(r"", text)
+    tokens = re.findall(r"\b\w+\b", text.lower())
+    return " ".join([w for w in tokens if w not in stop_words])
+
+
+def bench(name: str, func, texts: list[str], repeat: int) -> float:  # noqa: ANN001
+    total_chars = sum(len(text) for text in texts)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(texts)
+        best = min(best, time.perf_counter() - start)
+
+    print(
+        f"{name:<24} {best * 1000:9.2f} ms  "
+        f"{len(texts) / best:12.0f} texts/s  {total_chars / best / 1e6:8.2f} MB/s"
+    )
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--stopwords-vi")
+    parser.add_argument("--stopwords-en")
+    args = parser.parse_args()
+
+    stopwords = load_stopwords(args.stopwords_vi) | load_stopwords(args.stopwords_en)
+    stopwords = stopwords or SAMPLE_STOPWORDS
+    texts = load_corpus()
+    print(
+        f"corpus: {len(texts)} texts, {sum(len(t) for t in texts) / 1e6:.2f} MB, "
+        f"{len(stopwords)} stopwords"
+    )
+
+    normalizer = TextNormalizer(stopwords)
+    legacy = bench(
+        "legacy clean_text",
+        lambda batch: [legacy_clean_text(text, stopwords) for text in batch],
+        texts,
+        args.repeat,
+    )
+    new = bench("TextNormalizer.clean_many", normalizer.clean_many, texts, args.repeat)
+    print(f"speedup: {legacy / new:.2f}x")
+
+    # Cụm stopword mà bản cũ bỏ sót
+    sample = "Tuy nhiên, cảm ơn bạn đã gửi CV"
+    print(f"legacy: {legacy_clean_text(sample, stopwords)!r}")
+    print(f"new:    {normalizer.clean(sample)!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,537 @@
+"""Benchmark toàn bộ luồng ingest mail: fetch_mails_in_date với Gmail/embedding/OpenSearch giả.
+
+Không cần Gmail, OpenAI hay OpenSearch thật:
+- Gmail: phát lại các hội thoại đã crawl trong `output/*.json` (hoặc file fixture
+  ghi sẵn qua `--fixtures`), tệp đính kèm lấy từ `output/` và `test/data`.
+- Embedding: server HTTP cục bộ tương thích OpenAI `/v1/embeddings` (đi qua đúng
+  `EmbeddingModel` và connection pool thật), độ trễ cấu hình được.
+- Vector DB: backend local (`vector_backend=local`, lưu trong cache_dir tạm), cùng
+  bộ hàm với `os_service` nên đi qua đủ các bước setup index/nạp gần trùng/index;
+  `--index-latency-ms` thêm độ trễ mạng của OpenSearch cho mỗi lần ghi.
+
+Kết quả (throughput, p50/p95 theo từng bước) được in ra và ghi thành JSON để so
+sánh giữa các phiên bản:
+    python test/benchmark/bench_ingestion.py --scale 20 --output bench.json
+    python test/benchmark/bench_ingestion.py --scale 20 --compare bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import base64
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, os.path.join(ROOT_DIR, "packages"))
+sys.path.insert(0, os.path.join(ROOT_DIR, "libs"))
+sys.path.insert(0, os.path.join(ROOT_DIR))
+
+ATTACHMENT_DIRS = [ROOT_DIR / "output", ROOT_DIR / "test" / "data"]
+ATTACHMENT_SUFFIXES = {".pdf", ".png", ".xlsx", ".docx", ".md", ".txt"}
+
+# Các bước được đo (tên hàm trong workflows.converter.gmail_utils)
+STAGES = {
+    "fetch_attachments": "fetch",
+    "extract_content_with_docling": "docling",
+    "extract_attachments": "extract",
+    "build_mail_document": "embed",
+    "upload_mail_document": "index",
+}
+
+
+# ----------------- Đo thời gian -----------------
+@dataclass
+class StageStats:
+    durations: list[float] = field(default_factory=list)
+    items: int = 0
+    bytes: int = 0
+
+
+class StageRecorder:
+    def __init__(self) -> None:
+        self.stages: dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, duration: float, items: int = 1, size: int = 0) -> None:
+        with self._lock:
+            stats = self.stages.setdefault(name, StageStats())
+            stats.durations.append(duration)
+            stats.items += items
+            stats.bytes += size
+
+    def wrap(self, name: str, func: Any) -> Any:
+        def _timed(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - start)
+
+        return _timed
+
+    def report(self, wall_time: float) -> dict[str, Any]:
+        report = {}
+        for name, stats in self.stages.items():
+            durations = np.asarray(stats.durations)
+            total = float(durations.sum())
+            report[name] = {
+                "calls": len(durations),
+                "items": stats.items,
+                "bytes": stats.bytes,
+                "busy_s": round(total, 4),
+                # Số lần gọi / giây tính trên tổng thời gian chạy (các bước chạy chồng nhau)
+                "throughput_per_s": round(len(durations) / wall_time, 3)
+                if wall_time
+                else None,
+                "p50_ms": round(float(np.percentile(durations, 50)) * 1000, 3),
+                "p95_ms": round(float(np.percentile(durations, 95)) * 1000, 3),
+                "max_ms": round(float(durations.max()) * 1000, 3),
+            }
+        return report
+
+
+# ----------------- Gmail giả -----------------
+@dataclass
+class FakeLabel:
+    name: str
+
+
+@dataclass
+class FakeMessage:
+    """Các thuộc tính của simplegmail Message mà fetch_mails_in_date sử dụng."""
+
+    id: str
+    thread_id: str
+    sender: str
+    recipient: str
+    subject: str
+    date: str
+    plain: str
+    label_ids: list[FakeLabel]
+    attachments: list[dict[str, Any]]
+
+
+class _Request:
+    def __init__(self, func: Any, latency: float) -> None:
+        self.func = func
+        self.latency = latency
+
+    def execute(self) -> Any:
+        time.sleep(self.latency)
+        return self.func()
+
+
+class FakeGmail:
+    """Phát lại message/attachment đã ghi, giả lập độ trễ mạng của Gmail API."""
+
+    def __init__(
+        self, messages: list[FakeMessage], latency: float, recorder: StageRecorder
+    ) -> None:
+        self._messages = messages
+        self.latency = latency
+        self.recorder = recorder
+        self.service = self
+        self._by_id = {message.id: message for message in messages}
+
+    def get_messages(self, query: str) -> list[FakeMessage]:
+        time.sleep(self.latency)
+        return list(self._messages)
+
+    # users().messages().get(...) / users().messages().attachments().get(...)
+    def users(self) -> FakeGmail:
+        return self
+
+    def messages(self) -> FakeGmail:
+        return self
+
+    def attachments(self) -> _Attachments:
+        return _Attachments(self)
+
+    def get(self, userId: str, id: str) -> _Request:  # noqa: A002, N803
+        message = self._by_id[id]
+        parts = [
+            {"filename": attachment["filename"], "body": {"attachmentId": str(i)}}
+            for i, attachment in enumerate(message.attachments)
+        ]
+        return _Request(lambda: {"payload": {"parts": parts}}, self.latency)
+
+
+class _Attachments:
+    def __init__(self, gmail: FakeGmail) -> None:
+        self.gmail = gmail
+
+    def get(self, userId: str, messageId: str, id: str) -> _Request:  # noqa: A002, N803
+        attachment = self.gmail._by_id[messageId].attachments[int(id)]
+
+        def _load() -> dict[str, str]:
+            data = attachment["path"].read_bytes()
+            self.gmail.recorder.record("gmail_bytes", 0, size=len(data))
+            return {"data": base64.urlsafe_b64encode(data).decode("ascii")}
+
+        return _Request(_load, self.gmail.latency)
+
+
+def _find_attachment(filename: str) -> Path | None:
+    for directory in ATTACHMENT_DIRS:
+        path = directory / filename
+        if path.is_file():
+            return path
+    return None
+
+
+def load_recorded_threads(fixtures: Path | None) -> list[list[dict[str, Any]]]:
+    """Các thread đã ghi: file `--fixtures` hoặc các hội thoại trong `output/*.json`."""
+    paths = [fixtures] if fixtures else sorted((ROOT_DIR / "output").glob("*.json"))
+    threads = []
+    for path in paths:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        for thread in data if isinstance(data, list) else [data]:
+            threads.append(thread["messages"])
+    if not threads:
+        msg = "Không có fixture nào (output/*.json trống)"
+        raise SystemExit(msg)
+    return threads
+
+
+def build_messages(
+    threads: list[list[dict[str, Any]]], scale: int, *, unique_text: bool = False
+) -> list[FakeMessage]:
+    """Nhân bản các thread `scale` lần (id khác nhau) để có đủ dữ liệu đo.
+
+    Các bản sao giống hệt nhau nên bị coi là gần trùng (dùng lại embedding);
+    `unique_text` thêm một đoạn ngẫu nhiên vào mỗi mail để đo đủ số lần embed.
+    """
+    rng = np.random.default_rng(0)
+    spare_files = sorted(
+        path
+        for directory in ATTACHMENT_DIRS
+        for path in directory.iterdir()
+        if path.suffix.lower() in ATTACHMENT_SUFFIXES
+    )
+
+    messages = []
+    for copy in range(scale):
+        for thread_index, thread in enumerate(threads):
+            thread_id = f"bench-{copy}-{thread_index}"
+            for message in thread:
+                attachments = message.get("attachments") or []
+                if isinstance(attachments, str):
+                    attachments = ast.literal_eval(attachments)
+                files = []
+                for attachment in attachments:
+                    path = _find_attachment(attachment["filename"])
+                    if path is None and spare_files:
+                        # Tệp gốc không còn: dùng một tệp mẫu cùng thư mục dữ liệu
+                        path = spare_files[len(files) % len(spare_files)]
+                    if path is not None:
+                        files.append({"filename": path.name, "path": path})
+
+                labels = message.get("labels_ids") or []
+                if isinstance(labels, str):
+                    labels = ast.literal_eval(labels)
+                messages.append(
+                    FakeMessage(
+                        id=f"{message['id']}-{copy}",
+                        thread_id=thread_id,
+                        sender=message.get("from") or "",
+                        recipient=message.get("to") or "",
+                        subject=message.get("subject") or "",
+                        date=message.get("date") or "",
+                        plain=(message.get("plain_text") or "")
+                        + (
+                            "\n" + " ".join(f"w{n}" for n in rng.integers(0, 10**6, 200))
+                            if unique_text
+                            else ""
+                        ),
+                        label_ids=[FakeLabel(label) for label in labels],
+                        attachments=files,
+                    )
+                )
+    return messages
+
+
+# ----------------- Embedding server giả -----------------
+def start_embedding_server(dims: int, latency: float) -> ThreadingHTTPServer:
+    rng = np.random.default_rng(0)
+    table = rng.standard_normal((1024, dims)).astype(np.float32)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:  # noqa: N802
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+            time.sleep(latency)
+
+            data = []
+            for i, text in enumerate(inputs):
+                vector = table[hash(text) % len(table)]
+                embedding = (
+                    base64.b64encode(vector.tobytes()).decode("ascii")
+                    if body.get("encoding_format") == "base64"
+                    else vector.tolist()
+                )
+                data.append({"object": "embedding", "index": i, "embedding": embedding})
+            tokens = sum(len(text) // 4 + 1 for text in inputs)
+            payload = json.dumps(
+                {
+                    "object": "list",
+                    "model": body["model"],
+                    "data": data,
+                    "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+                }
+            ).encode("utf-8")
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ----------------- Chạy benchmark -----------------
+def _set_default_env(cache_dir: Path, embedding_url: str) -> None:
+    """Các biến môi trường bắt buộc của WorkflowsBaseConfig (giá trị giả)."""
+    defaults = {
+        "TICKET_API_URL": "http://localhost:8000",
+        "DOTNET_API_URL": "http://localhost:8001",
+        "CACHE_DIR": str(cache_dir),
+        "RABBITMQ_URL": "amqp://localhost:5672",
+        "RABBITMQ_USER": "bench",
+        "RABBITMQ_PASSWORD": "bench-password",
+        "OPEN_URL": "https://localhost:9200",
+        "OPEN_USER": "bench",
+        "OPEN_PASSWORD": "bench-password",
+        "OPENAI_API_URL": embedding_url,
+        "OPENAI_API_KEY": "bench",
+        "MODEL_LLM_ID": "bench-llm",
+        "MODEL_TOKENIZER_ID": "bench-tokenizer",
+        "MODEL_EMBEDDING_ID": "bench-embedding",
+        "MODEL_PDF_ID": "bench-pdf",
+        "MINIO_ENDPOINT": "http://localhost:9000",
+        "MINIO_ACCESS_KEY": "bench",
+        "MINIO_SECRET_KEY": "bench",
+        "MINIO_BUCKET": "bench",
+        "AFTER_MAIL": "2025/01/01",
+        "BEFORE_MAIL": "2026/01/01",
+        "TABLE_MAIL": str(ROOT_DIR / "test" / "data" / "allowed_subjects.xlsx"),
+        "COL_NAME": "subject",
+        "SHEET_NAME": "Sheet1",
+    }
+    for key, value in defaults.items():
+        os.environ.setdefault(f"WORKFLOWS_{key}", value)
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],  # noqa: S607
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    recorder = StageRecorder()
+    server = start_embedding_server(args.dims, args.embedding_latency_ms / 1000)
+    embedding_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    # cache_dir mới cho mỗi lần chạy: không bỏ qua mail đã index ở lần trước
+    cache_dir = Path(tempfile.mkdtemp(prefix="bench_ingestion_"))
+    _set_default_env(cache_dir, embedding_url)
+    os.environ["WORKFLOWS_EMBEDDING_CACHE_ENABLED"] = str(args.embedding_cache)
+    os.environ["WORKFLOWS_VECTOR_BACKEND"] = "local"
+
+    from libs.openai_api_client.src.openai_api_client.embedding import EmbeddingModel
+    from libs.openai_api_client.src.openai_api_client.embedding_cache import (
+        CachedEmbeddingModel,
+        EmbeddingCache,
+    )
+    from libs.vectordb.src.vectordb.local import local_service
+    from workflows.config import get_config
+    from workflows.converter import gmail_utils
+
+    config = get_config()
+    embedding_model = EmbeddingModel(embedding_url, "bench", config.model_embedding_id)
+    if args.embedding_cache:
+        embedding_model = CachedEmbeddingModel(
+            embedding_model, EmbeddingCache(cache_dir / "embedding_cache.sqlite3")
+        )
+
+    threads = load_recorded_threads(args.fixtures)
+    messages = build_messages(threads, args.scale, unique_text=args.unique_text)
+    gmail = FakeGmail(messages, args.gmail_latency_ms / 1000, recorder)
+    os_client = local_service.new_local_client(config.local_vectordb_dir)
+
+    gmail_utils.init_gmail_service = lambda: gmail
+    gmail_utils.construct_query = lambda params: json.dumps(params)
+    if args.fake_docling_ms is not None:
+        # docling thật chậm và nặng: thay bằng độ trễ cố định khi chỉ đo pipeline
+        def _fake_docling(file_data: bytes, filename: str) -> str:
+            time.sleep(args.fake_docling_ms / 1000)
+            return f"{filename}\n" + " ".join(f"tok{b}" for b in file_data[:2000])
+
+        gmail_utils.extract_content_with_docling = _fake_docling
+    if args.index_latency_ms:
+        # Backend local ghi trong process: thêm độ trễ mạng của OpenSearch
+        upload_mail_document = gmail_utils.upload_mail_document
+
+        def _upload_with_latency(client: Any, mail_id: str, doc: dict[str, Any]) -> bool:
+            time.sleep(args.index_latency_ms / 1000)
+            return upload_mail_document(client, mail_id, doc)
+
+        gmail_utils.upload_mail_document = _upload_with_latency
+    for name, stage in STAGES.items():
+        setattr(gmail_utils, name, recorder.wrap(stage, getattr(gmail_utils, name)))
+
+    subjects = sorted({message.subject for message in messages})
+    start = time.perf_counter()
+    gmail_utils.fetch_mails_in_date(
+        subjects, "2025/01/01", "2026/01/01", os_client, embedding_model
+    )
+    wall_time = time.perf_counter() - start
+    server.shutdown()
+    indexed = local_service.count_documents(os_client, gmail_utils.INDEX_NAME)
+    os_client.close()
+
+    mails = len(messages)
+    return {
+        "version": 1,
+        "timestamp": datetime.now().astimezone().isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "params": {
+            "scale": args.scale,
+            "threads": len(threads) * args.scale,
+            "mails": mails,
+            "attachments": sum(len(message.attachments) for message in messages),
+            "gmail_latency_ms": args.gmail_latency_ms,
+            "embedding_latency_ms": args.embedding_latency_ms,
+            "index_latency_ms": args.index_latency_ms,
+            "fake_docling_ms": args.fake_docling_ms,
+            "docling_available": gmail_utils.DOCLING_AVAILABLE,
+            "embedding_cache": args.embedding_cache,
+            "unique_text": args.unique_text,
+            "workers": {
+                "fetch": config.mail_fetch_workers,
+                "extract": config.mail_extract_workers,
+                "embed": config.mail_embed_workers,
+                "index": config.mail_index_workers,
+            },
+        },
+        "end_to_end": {
+            "wall_s": round(wall_time, 4),
+            "mails_per_s": round(mails / wall_time, 3) if wall_time else None,
+            "indexed": indexed,
+        },
+        "stages": recorder.report(wall_time),
+    }
+
+
+def compare(result: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """Các chỉ số chậm hơn baseline quá `tolerance` (tỉ lệ)."""
+    regressions = []
+    old_wall = baseline["end_to_end"]["wall_s"]
+    new_wall = result["end_to_end"]["wall_s"]
+    if new_wall > old_wall * (1 + tolerance):
+        regressions.append(f"end_to_end.wall_s: {old_wall} -> {new_wall}")
+
+    for name, stats in result["stages"].items():
+        old = baseline["stages"].get(name)
+        if old is None or not stats["calls"]:
+            continue
+        for key in ("p50_ms", "p95_ms"):
+            if stats[key] > old[key] * (1 + tolerance) and stats[key] - old[key] > 1:
+                regressions.append(f"{name}.{key}: {old[key]} -> {stats[key]}")
+    return regressions
+
+
+def print_report(result: dict[str, Any]) -> None:
+    end_to_end = result["end_to_end"]
+    print(
+        f"{result['params']['mails']} mails / {result['params']['threads']} threads: "
+        f"{end_to_end['wall_s']:.2f}s, {end_to_end['mails_per_s']} mails/s, "
+        f"{end_to_end['indexed']} indexed"
+    )
+    print(
+        f"{'stage':<12}{'calls':>8}{'per s':>10}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'busy s':>10}"
+    )
+    for name, stats in result["stages"].items():
+        if name.endswith("_bytes"):
+            print(f"{name:<12}{stats['bytes']:>28} bytes")
+            continue
+        print(
+            f"{name:<12}{stats['calls']:>8}{stats['throughput_per_s']:>10}"
+            f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['busy_s']:>10}"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", type=Path, help="File JSON các thread đã ghi")
+    parser.add_argument("--scale", type=int, default=10, help="Số lần nhân bản fixtures")
+    parser.add_argument("--dims", type=int, default=1536)
+    parser.add_argument("--gmail-latency-ms", type=float, default=40)
+    parser.add_argument("--embedding-latency-ms", type=float, default=30)
+    parser.add_argument("--index-latency-ms", type=float, default=10)
+    parser.add_argument(
+        "--fake-docling-ms",
+        type=float,
+        default=None,
+        help="Thay docling bằng độ trễ cố định (ms) cho mỗi tệp",
+    )
+    parser.add_argument("--embedding-cache", action="store_true")
+    parser.add_argument(
+        "--unique-text",
+        action="store_true",
+        help="Làm nội dung các bản sao khác nhau (không bị bỏ qua do gần trùng)",
+    )
+    parser.add_argument("--output", type=Path, help="Ghi kết quả JSON ra file")
+    parser.add_argument("--compare", type=Path, help="File JSON kết quả trước để so sánh")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    result = run(args)
+    print_report(result)
+
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+    else:
+        print(text)
+
+    if args.compare:
+        regressions = compare(
+            result, json.loads(args.compare.read_text(encoding="utf-8")), args.tolerance
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""Benchmark backend vector DB local (`local_service`): tốc độ upload và độ trễ search.
+
+Đo trên vector ngẫu nhiên (chuẩn hóa) trong thư mục tạm, không cần OpenSearch:
+- upload: `bulk_upload_documents` theo lô `--batch`, tính docs/giây
+- search: p50/p95 của `vector_search` không filter và có filter theo
+  `metadata.thread_id` (chọn lọc, dùng tìm kiếm chính xác) và theo khoảng ngày
+  (rộng, dùng HNSW nếu đã cài hnswlib)
+
+    python test/benchmark/bench_local_vectordb.py --docs 50000 --dims 1536
+    python test/benchmark/bench_local_vectordb.py --docs 20000 --output bench_local.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, os.path.join(ROOT_DIR, "libs"))
+
+from libs.vectordb.src.vectordb.local import local_service  # noqa: E402
+from libs.vectordb.src.vectordb.local import store  # noqa: E402
+
+INDEX = "emails"
+N_THREADS = 500
+
+# tên -> filter (None: không filter)
+FILTERS: dict[str, dict[str, Any] | None] = {
+    "no_filter": None,
+    "thread_id": {"term": {"metadata.thread_id": "t7"}},
+    "date_range": {
+        "range": {"metadata.date": {"gte": "2025-01-01", "lt": "2025-07-01"}}
+    },
+}
+
+
+# ----------------- Dữ liệu -----------------
+def random_vectors(n: int, dims: int, rng: np.random.Generator) -> np.ndarray:
+    vectors = rng.standard_normal((n, dims), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_documents(n: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "id": f"mail-{i}",
+            "metadata": {
+                "thread_id": f"t{i % N_THREADS}",
+                "subject": f"Subject {i}",
+                "date": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d} 09:00:00+07:00",
+            },
+        }
+        for i in range(n)
+    ]
+
+
+# ----------------- Đo -----------------
+def bench_upload(
+    client: Any, documents: list[dict[str, Any]], vectors: np.ndarray, batch: int
+) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(documents), batch):
+        local_service.bulk_upload_documents(
+            client, INDEX, documents[i : i + batch], embeddings=vectors[i : i + batch]
+        )
+    local_service.refresh_index(client, INDEX)
+    return len(documents) / (time.perf_counter() - start)
+
+
+def bench_search(
+    client: Any, queries: np.ndarray, size: int, filter: dict[str, Any] | None  # noqa: A002
+) -> dict[str, float]:
+    # lần đầu có thể phải dựng/nạp đồ thị HNSW, không tính
+    local_service.vector_search(client, INDEX, queries[0], size=size, filter=filter)
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        local_service.vector_search(client, INDEX, query, size=size, filter=filter)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=20_000)
+    parser.add_argument("--dims", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--size", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Ghi kết quả JSON ra file")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    vectors = random_vectors(args.docs, args.dims, rng)
+    queries = random_vectors(args.queries, args.dims, rng)
+    documents = make_documents(args.docs)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        client = local_service.new_local_client(tmp)
+        mapping = {"mappings": {"properties": {"embedding": {"dimension": args.dims}}}}
+        local_service.create_index(client, INDEX, mapping)
+
+        results: dict[str, Any] = {
+            "docs": args.docs,
+            "dims": args.dims,
+            "hnswlib": store.hnswlib is not None,
+            "upload_docs_per_s": round(bench_upload(client, documents, vectors, args.batch)),
+        }
+        for name, filter_query in FILTERS.items():
+            results[name] = bench_search(client, queries, args.size, filter_query)
+        client.close()
+
+    print(  # noqa: T201
+        f"{results['docs']} docs, {results['dims']} dims, hnswlib={results['hnswlib']}\n"
+        f"upload: {results['upload_docs_per_s']} docs/s\n"
+        f"{'search':<12} {'p50 ms':>8} {'p95 ms':>8}"
+    )
+    for name in FILTERS:
+        print(f"{name:<12} {results[name]['p50_ms']:>8} {results[name]['p95_ms']:>8}")  # noqa: T201
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
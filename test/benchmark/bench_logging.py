@@ -0,0 +1,149 @@
+"""Benchmark số lần gọi log/giây của cấu hình logger hiện tại và cấu hình production.
+
+Mỗi "request" đi qua middleware logging (bản đầy đủ `logging_middleware` hoặc bản
+lazy `lazy_logging_middleware`) với một Request giả, rồi ghi `--events` dòng log.
+Output được ghi vào /dev/null nên chỉ đo chi phí của logger.
+
+    python test/benchmark/bench_logging.py --requests 20000 --events 5
+    python test/benchmark/bench_logging.py --output bench_logging.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+import structlog
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, os.path.join(ROOT_DIR, "libs"))
+
+from logger.src.logger import (  # noqa: E402
+    get_logger,
+    lazy_logging_middleware,
+    logging_middleware,
+    setup_logger,
+)
+
+# tên cấu hình -> (tham số setup_logger, middleware)
+CONFIGS = {
+    "current": ({}, logging_middleware),
+    "production": ({"production": True}, lazy_logging_middleware),
+    "production_async": (
+        {"production": True, "async_logs": True, "overflow": "block"},
+        lazy_logging_middleware,
+    ),
+}
+
+
+# ----------------- Request giả -----------------
+class FakeURL:
+    path = "/api/v1/tickets/42"
+    scheme = "https"
+
+    def __str__(self) -> str:
+        return f"{self.scheme}://parrot.local{self.path}?page=2&size=50"
+
+
+class FakeClient:
+    host = "10.0.0.12"
+    port = 53122
+
+
+class FakeRequest:
+    def __init__(self) -> None:
+        self.url = FakeURL()
+        self.method = "GET"
+        self.query_params = {"page": "2", "size": "50"}
+        self.path_params = {"ticket_id": "42"}
+        self.scope = {"http_version": "1.1"}
+        self.client = FakeClient()
+        self.cookies = {
+            "session": "c2Vzc2lvbi10b2tlbi0xMjM0NTY3ODkw",
+            "csrftoken": "a1b2c3d4e5f6",
+            "theme": "dark",
+        }
+
+
+class FakeResponse:
+    status_code = 200
+
+
+# ----------------- Đo -----------------
+def run_config(name: str, requests: int, events: int) -> dict[str, Any]:
+    options, middleware = CONFIGS[name]
+    structlog.reset_defaults()
+    setup_logger(json_logs=True, **options)
+    log = get_logger(f"bench.{name}")
+    request = FakeRequest()
+
+    async def call_next(_: Any) -> FakeResponse:
+        for i in range(events):
+            log.info("bench.event", index=i, ticket_id=42, status="open")
+        return FakeResponse()
+
+    async def run() -> None:
+        for _ in range(requests):
+            await middleware(request, call_next)  # type: ignore[arg-type]
+
+    start = time.perf_counter()
+    asyncio.run(run())
+    writer = getattr(structlog.get_config()["logger_factory"], "writer", None)
+    enqueued = time.perf_counter() - start
+    if writer is not None:
+        # Tính cả thời gian ghi hết hàng đợi, để so sánh công bằng với bản đồng bộ
+        writer.close(timeout=60)
+    elapsed = time.perf_counter() - start
+
+    calls = requests * events
+    return {
+        "config": name,
+        "requests": requests,
+        "log_calls": calls,
+        "seconds": round(elapsed, 4),
+        "log_calls_per_sec": round(calls / elapsed),
+        "caller_log_calls_per_sec": round(calls / enqueued),
+        "requests_per_sec": round(requests / elapsed),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--events", type=int, default=5, help="Số dòng log mỗi request")
+    parser.add_argument("--configs", nargs="+", default=list(CONFIGS), choices=list(CONFIGS))
+    parser.add_argument("--output", type=Path, help="Ghi kết quả JSON ra file")
+    args = parser.parse_args(argv)
+
+    stdout = sys.stdout
+    results = []
+    with open(os.devnull, "w") as devnull:
+        sys.stdout = devnull
+        try:
+            for name in args.configs:
+                results.append(run_config(name, args.requests, args.events))
+        finally:
+            sys.stdout = stdout
+
+    baseline = results[0]["log_calls_per_sec"]
+    for result in results:
+        result["speedup"] = round(result["log_calls_per_sec"] / baseline, 2)
+        print(  # noqa: T201
+            f"{result['config']:<18} {result['log_calls_per_sec']:>10} log/s"
+            f"  (caller {result['caller_log_calls_per_sec']:>10} log/s)"
+            f"  {result['requests_per_sec']:>8} req/s  x{result['speedup']}"
+        )
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
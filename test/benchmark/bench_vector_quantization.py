@@ -0,0 +1,243 @@
+"""Benchmark recall@k và dung lượng của các cách lưu vector email trong OpenSearch.
+
+So sánh với tìm kiếm chính xác (cosine, float32, đủ số chiều):
+- float32 / fp16 / int8 (lượng tử hóa như `os_service._encode_vector`) / PQ
+  (m đoạn, 256 centroid mỗi đoạn, như faiss IVF-PQ code_size=8)
+- kết hợp cắt số chiều kiểu Matryoshka (`truncate_embeddings`) và chuẩn hóa lại
+
+Dữ liệu: vector tổng hợp (mặc định; phổ giảm dần theo chiều giống model Matryoshka)
+hoặc vector thật trong cache embedding (`--cache cache/embedding_cache.sqlite3`).
+Dung lượng chỉ tính phần vector (không tính đồ thị HNSW); cột `source_kb` là kích
+thước vector dạng JSON trong `_source` nếu không exclude.
+
+    python test/benchmark/bench_vector_quantization.py --docs 20000 --dims 1536 768 256
+    python test/benchmark/bench_vector_quantization.py --cache cache/embedding_cache.sqlite3
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, os.path.join(ROOT_DIR, "libs"))
+sys.path.insert(0, os.path.join(ROOT_DIR, "libs", "openai_api_client", "src"))
+
+from openai_api_client.matryoshka import truncate_embeddings  # noqa: E402
+
+
+# ----------------- Dữ liệu -----------------
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.maximum(norms, 1e-12)).astype(np.float32)
+
+
+def synthetic_vectors(
+    n_docs: int, n_queries: int, dims: int, seed: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Vector theo cụm, phương sai giảm dần theo chỉ số chiều (các chiều đầu mang
+    nhiều thông tin hơn, như model Matryoshka). Query là document bị nhiễu."""
+    rng = np.random.default_rng(seed)
+    decay = (1.0 / np.sqrt(1.0 + np.arange(dims) / 32.0)).astype(np.float32)
+    n_clusters = max(n_docs // 100, 1)
+    centers = rng.standard_normal((n_clusters, dims), dtype=np.float32) * decay
+    labels = rng.integers(0, n_clusters, n_docs)
+    noise = rng.standard_normal((n_docs, dims), dtype=np.float32) * decay
+    docs = _normalize(centers[labels] + 0.6 * noise)
+
+    picked = rng.choice(n_docs, n_queries, replace=False)
+    query_noise = rng.standard_normal((n_queries, dims), dtype=np.float32) * decay
+    queries = _normalize(docs[picked] + 0.05 * query_noise)
+    return docs, queries
+
+
+def cached_vectors(
+    path: Path, n_docs: int, n_queries: int, seed: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Vector thật trong cache embedding; query là các vector giữ riêng ra."""
+    conn = sqlite3.connect(str(path))
+    try:
+        rows = conn.execute(
+            "SELECT vector FROM embeddings LIMIT ?", (n_docs + n_queries,)
+        ).fetchall()
+    finally:
+        conn.close()
+    if len(rows) <= n_queries:
+        msg = f"Cache chỉ có {len(rows)} vector, cần nhiều hơn {n_queries}"
+        raise SystemExit(msg)
+
+    vectors = np.stack([np.frombuffer(row[0], dtype=np.float32) for row in rows])
+    vectors = _normalize(vectors)
+    order = np.random.default_rng(seed).permutation(len(vectors))
+    return vectors[order[n_queries:]], vectors[order[:n_queries]]
+
+
+# ----------------- Lượng tử hóa -----------------
+def quantize_int8(vectors: np.ndarray) -> np.ndarray:
+    """Như `os_service._encode_vector(..., "byte")`: co giãn từng vector về [-127, 127]."""
+    scale = 127.0 / np.maximum(np.abs(vectors).max(axis=1, keepdims=True), 1e-12)
+    return np.clip(np.round(vectors * scale), -128, 127).astype(np.int8)
+
+
+def train_pq(
+    vectors: np.ndarray, m: int, iterations: int, samples: int, seed: int
+) -> np.ndarray:
+    """Codebook PQ: (m, 256, dims/m), k-means trên từng đoạn."""
+    rng = np.random.default_rng(seed)
+    train = vectors[rng.choice(len(vectors), min(samples, len(vectors)), replace=False)]
+    sub_dims = vectors.shape[1] // m
+    codebooks = np.empty((m, 256, sub_dims), dtype=np.float32)
+    for j in range(m):
+        sub = train[:, j * sub_dims : (j + 1) * sub_dims]
+        centroids = sub[rng.choice(len(sub), 256, replace=len(sub) < 256)].copy()
+        for _ in range(iterations):
+            assign = _nearest(sub, centroids)
+            for c in range(256):
+                members = sub[assign == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+        codebooks[j] = centroids
+    return codebooks
+
+
+def _nearest(points: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    distances = (
+        (points**2).sum(axis=1, keepdims=True)
+        - 2 * points @ centroids.T
+        + (centroids**2).sum(axis=1)
+    )
+    return distances.argmin(axis=1)
+
+
+def pq_encode(vectors: np.ndarray, codebooks: np.ndarray) -> np.ndarray:
+    m, _, sub_dims = codebooks.shape
+    codes = np.empty((len(vectors), m), dtype=np.uint8)
+    for j in range(m):
+        codes[:, j] = _nearest(vectors[:, j * sub_dims : (j + 1) * sub_dims], codebooks[j])
+    return codes
+
+
+def pq_scores(queries: np.ndarray, codes: np.ndarray, codebooks: np.ndarray) -> np.ndarray:
+    """Inner product ước lượng (asymmetric distance: query giữ nguyên float)."""
+    m, _, sub_dims = codebooks.shape
+    scores = np.zeros((len(queries), len(codes)), dtype=np.float32)
+    for j in range(m):
+        table = queries[:, j * sub_dims : (j + 1) * sub_dims] @ codebooks[j].T
+        scores += table[:, codes[:, j]]
+    return scores
+
+
+# ----------------- Đo -----------------
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    return np.argpartition(-scores, k, axis=1)[:, :k]
+
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = [len(set(f) & set(t)) for f, t in zip(found, truth)]
+    return float(np.mean(hits)) / truth.shape[1]
+
+
+def cosine(queries: np.ndarray, docs: np.ndarray) -> np.ndarray:
+    queries = queries.astype(np.float32)
+    docs = docs.astype(np.float32)
+    return _normalize(queries) @ _normalize(docs).T
+
+
+def evaluate(
+    docs: np.ndarray, queries: np.ndarray, dims_list: list[int], args: argparse.Namespace
+) -> list[dict[str, Any]]:
+    truth = top_k(cosine(queries, docs), args.k)
+    json_bytes = np.mean([len(json.dumps(v.tolist())) for v in docs[:200]])
+
+    results = []
+    for dims in dims_list:
+        d_docs = truncate_embeddings(docs, dims)
+        d_queries = truncate_embeddings(queries, dims)
+        methods: dict[str, tuple[int, Any]] = {
+            "float32": (4 * dims, lambda d=d_docs, q=d_queries: q @ d.T),
+            "fp16": (
+                2 * dims,
+                lambda d=d_docs, q=d_queries: cosine(q.astype(np.float16), d.astype(np.float16)),
+            ),
+            "byte": (
+                dims,
+                lambda d=d_docs, q=d_queries: cosine(quantize_int8(q), quantize_int8(d)),
+            ),
+        }
+        m = dims // args.pq_sub_dims
+        if m > 0 and dims % args.pq_sub_dims == 0:
+
+            def _pq(d: np.ndarray = d_docs, q: np.ndarray = d_queries, m: int = m) -> np.ndarray:
+                codebooks = train_pq(d, m, args.pq_iterations, args.pq_samples, args.seed)
+                return pq_scores(q, pq_encode(d, codebooks), codebooks)
+
+            methods[f"pq(m={m})"] = (m, _pq)
+
+        for name, (bytes_per_vector, score) in methods.items():
+            start = time.perf_counter()
+            found = top_k(score(), args.k)
+            elapsed = time.perf_counter() - start
+            results.append(
+                {
+                    "dims": dims,
+                    "method": name,
+                    "bytes_per_vector": bytes_per_vector,
+                    "index_mb": round(bytes_per_vector * args.docs_total / 1024**2, 2),
+                    f"recall@{args.k}": round(recall(found, truth), 4),
+                    "seconds": round(elapsed, 3),
+                    "source_kb": round(json_bytes * dims / docs.shape[1] / 1024, 1),
+                }
+            )
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cache", type=Path, help="Lấy vector từ cache embedding SQLite")
+    parser.add_argument("--docs", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--vector-dims", type=int, default=1536, help="Số chiều dữ liệu tổng hợp")
+    parser.add_argument("--dims", type=int, nargs="+", default=[1536, 1024, 768, 512, 256])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--pq-sub-dims", type=int, default=16, help="Số chiều mỗi đoạn PQ")
+    parser.add_argument("--pq-iterations", type=int, default=8)
+    parser.add_argument("--pq-samples", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Ghi kết quả JSON ra file")
+    args = parser.parse_args(argv)
+
+    if args.cache:
+        docs, queries = cached_vectors(args.cache, args.docs, args.queries, args.seed)
+    else:
+        docs, queries = synthetic_vectors(args.docs, args.queries, args.vector_dims, args.seed)
+    args.docs_total = len(docs)
+    dims_list = [d for d in args.dims if d <= docs.shape[1]]
+
+    results = evaluate(docs, queries, dims_list, args)
+    recall_key = f"recall@{args.k}"
+    print(  # noqa: T201
+        f"{len(docs)} docs, {len(queries)} queries, {docs.shape[1]} dims\n"
+        f"{'dims':>5} {'method':<10} {'B/vec':>6} {'index MB':>9} "
+        f"{recall_key:>10} {'_source KB':>10}"
+    )
+    for r in results:
+        print(  # noqa: T201
+            f"{r['dims']:>5} {r['method']:<10} {r['bytes_per_vector']:>6} "
+            f"{r['index_mb']:>9} {r[recall_key]:>10} {r['source_kb']:>10}"
+        )
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
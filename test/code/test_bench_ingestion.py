@@ -0,0 +1,37 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+BENCH = os.path.join(ROOT_DIR, "test", "benchmark", "bench_ingestion.py")
+
+# Các thư viện gmail_utils import khi nạp module
+for module in ("pandas", "bs4", "googleapiclient", "simplegmail", "docling_core"):
+    pytest.importorskip(module)
+
+
+def test_bench_ingestion_runs_as_shipped(tmp_path):
+    output = tmp_path / "bench.json"
+    env = {key: value for key, value in os.environ.items() if not key.startswith("WORKFLOWS_")}
+    completed = subprocess.run(
+        [sys.executable, BENCH, "--scale", "1", "--fake-docling-ms", "1", "--output", str(output)],
+        cwd=ROOT_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=300,
+        check=False,
+    )
+    assert completed.returncode == 0, completed.stderr
+
+    result = json.loads(output.read_text(encoding="utf-8"))
+    assert result["params"]["mails"] > 0
+    # Mọi mail đi hết pipeline và được ghi vào vector DB local
+    assert result["end_to_end"]["indexed"] == result["params"]["mails"]
+    assert result["stages"]["index"]["calls"] == result["params"]["mails"]
+    # Nạp index gần trùng từ vector DB chạy được (không rơi vào nhánh cảnh báo)
+    assert "Không nạp được index gần trùng" not in completed.stderr
+    assert "Lỗi" not in completed.stderr
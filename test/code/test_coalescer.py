@@ -0,0 +1,130 @@
+import asyncio
+import os
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, os.path.join(ROOT_DIR, "libs", "dotnet-api-client", "src"))
+
+import pytest  # noqa: E402
+
+from dotnet_api_client.batching import Coalescer  # noqa: E402
+
+
+class Recorder:
+    """Hàm `send` giả: ghi lại các batch; batch đầu tiên gửi chậm hơn các batch sau."""
+
+    def __init__(self, first_delay=0.0, fail=False):
+        self.batches = []
+        self.first_delay = first_delay
+        self.fail = fail
+        self.calls = 0
+
+    async def __call__(self, items):
+        self.calls += 1
+        if self.calls == 1 and self.first_delay:
+            await asyncio.sleep(self.first_delay)
+        if self.fail:
+            raise RuntimeError("send failed")
+        self.batches.append(list(items))
+
+
+def test_batches_split_by_max_batch():
+    async def main():
+        send = Recorder()
+        coalescer = Coalescer(send, max_batch=3, max_delay=10)
+        tasks = [asyncio.ensure_future(coalescer.submit(i)) for i in range(7)]
+        await asyncio.sleep(0)
+        # 2 batch đầy được gửi ngay, phần còn lại đợi max_delay hoặc aclose
+        await coalescer.aclose()
+        await asyncio.gather(*tasks)
+        return send.batches
+
+    assert asyncio.run(main()) == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_max_delay_sends_partial_batch():
+    async def main():
+        send = Recorder()
+        coalescer = Coalescer(send, max_batch=50, max_delay=0.01)
+        await asyncio.gather(coalescer.submit("a"), coalescer.submit("b"))
+        return send.batches
+
+    assert asyncio.run(main()) == [["a", "b"]]
+
+
+def test_key_keeps_only_latest_pending_item():
+    async def main():
+        send = Recorder()
+        coalescer = Coalescer(send, max_batch=50, max_delay=0.01, key=lambda item: item[0])
+        await asyncio.gather(
+            coalescer.submit(("f1", "IN_PROGRESS")),
+            coalescer.submit(("f2", "IN_PROGRESS")),
+            coalescer.submit(("f1", "SUCCESSFUL")),
+        )
+        return send.batches
+
+    assert asyncio.run(main()) == [[("f2", "IN_PROGRESS"), ("f1", "SUCCESSFUL")]]
+
+
+def test_keyed_batches_are_sent_in_order():
+    async def main():
+        # Batch đầu gửi chậm: nếu các batch chạy song song, trạng thái cũ sẽ tới sau cùng
+        send = Recorder(first_delay=0.05)
+        coalescer = Coalescer(send, max_batch=1, max_delay=10, key=lambda item: item[0])
+        await asyncio.gather(
+            coalescer.submit(("f1", "IN_PROGRESS")),
+            coalescer.submit(("f1", "SUCCESSFUL")),
+        )
+        return send.batches
+
+    assert asyncio.run(main()) == [[("f1", "IN_PROGRESS")], [("f1", "SUCCESSFUL")]]
+
+
+def test_flush_waits_for_earlier_keyed_batches():
+    async def main():
+        send = Recorder(first_delay=0.05)
+        coalescer = Coalescer(send, max_batch=1, max_delay=10, key=lambda item: item)
+        task = asyncio.ensure_future(coalescer.submit("a"))
+        await asyncio.sleep(0)
+        await coalescer.flush()
+        # flush chỉ trả về khi batch gửi trước đó đã xong
+        assert send.batches == [["a"]]
+        await task
+
+    asyncio.run(main())
+
+
+def test_failed_send_raises_in_submitters():
+    async def main():
+        coalescer = Coalescer(Recorder(fail=True), max_batch=2, max_delay=10)
+        return await asyncio.gather(
+            coalescer.submit(1), coalescer.submit(2), return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_aclose_sends_pending_items():
+    async def main():
+        send = Recorder()
+        coalescer = Coalescer(send, max_batch=50, max_delay=10)
+        task = asyncio.ensure_future(coalescer.submit("x"))
+        await asyncio.sleep(0)
+        assert len(coalescer) == 1
+        await coalescer.aclose()
+        await task
+        return send.batches, len(coalescer)
+
+    assert asyncio.run(main()) == ([["x"]], 0)
+
+
+@pytest.mark.parametrize("max_batch", [1, 4])
+def test_every_submit_resolves(max_batch):
+    async def main():
+        send = Recorder()
+        coalescer = Coalescer(send, max_batch=max_batch, max_delay=0.01)
+        await asyncio.gather(*(coalescer.submit(i) for i in range(10)))
+        return sorted(item for batch in send.batches for item in batch)
+
+    assert asyncio.run(main()) == list(range(10))
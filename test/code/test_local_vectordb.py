@@ -0,0 +1,403 @@
+import multiprocessing
+import os
+import pickle
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, "libs"))
+
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+
+from libs.vectordb.src.vectordb.local import local_service, store  # noqa: E402
+from libs.vectordb.src.vectordb.local.local_service import compile_query  # noqa: E402
+from libs.vectordb.src.vectordb.local.store import MIN_CAPACITY  # noqa: E402
+
+DIMS = 8
+
+
+def _doc(doc_id, thread_id, date="2025-09-01T08:00:00", subject="Báo cáo"):
+    return {
+        "id": doc_id,
+        "metadata": {"thread_id": thread_id, "date": date, "subject": subject},
+    }
+
+
+def _vector(seed):
+    return np.random.default_rng(seed).normal(size=DIMS).astype(np.float32)
+
+
+@pytest.fixture
+def client(tmp_path):
+    client = local_service.new_local_client(tmp_path / "vectordb")
+    yield client
+    client.close()
+
+
+# ----------------- compile_query -----------------
+def test_compile_query_term_terms_match_and_exists():
+    source = {"metadata": {"thread_id": "t1", "subject": "Báo cáo tháng 9", "labels": ["A", "B"]}}
+    assert compile_query({"term": {"metadata.thread_id": "t1"}})(source)
+    assert compile_query({"term": {"metadata.thread_id": {"value": "t1"}}})(source)
+    assert not compile_query({"term": {"metadata.thread_id": "t2"}})(source)
+    assert compile_query({"terms": {"metadata.labels": ["B", "C"]}})(source)
+    assert compile_query({"match": {"metadata.subject": "tháng BÁO"}})(source)
+    assert not compile_query({"match": {"metadata.subject": "tháng 10"}})(source)
+    assert compile_query({"exists": {"field": "metadata.labels"}})(source)
+    assert not compile_query({"exists": {"field": "metadata.to"}})(source)
+    assert compile_query(None)(source)
+    assert compile_query({"match_all": {}})(source)
+
+
+def test_compile_query_bool_and_date_range():
+    query = {
+        "bool": {
+            "filter": [{"range": {"metadata.date": {"gte": "2025-09-01", "lt": "2025-10-01"}}}],
+            "must_not": [{"term": {"metadata.thread_id": "spam"}}],
+        }
+    }
+    check = compile_query(query)
+    assert check({"metadata": {"date": "2025-09-15T10:00:00Z", "thread_id": "t1"}})
+    assert not check({"metadata": {"date": "2025-10-02T10:00:00", "thread_id": "t1"}})
+    assert not check({"metadata": {"date": "2025-09-15T10:00:00", "thread_id": "spam"}})
+
+    should = compile_query({"bool": {"should": [{"term": {"a": 1}}, {"term": {"b": 2}}]}})
+    assert should({"b": 2})
+    assert not should({"c": 3})
+
+
+def test_compile_query_rejects_unsupported_queries():
+    with pytest.raises(ValueError):
+        compile_query({"script": {"source": "true"}})
+
+
+# ----------------- vector_search -----------------
+def test_filtered_vector_search_only_returns_matching_docs(client):
+    docs = [_doc(f"m{i}", f"t{i % 3}") for i in range(30)]
+    vectors = np.stack([_vector(i) for i in range(30)])
+    local_service.create_index(client, "emails")
+    assert local_service.bulk_upload_documents(client, "emails", docs, embeddings=vectors)
+
+    response = local_service.vector_search(
+        client, "emails", vectors[4], size=5, filter={"term": {"metadata.thread_id": "t1"}}
+    )
+    hits = response["hits"]["hits"]
+    assert len(hits) == 5
+    assert all(hit["_source"]["metadata"]["thread_id"] == "t1" for hit in hits)
+    # Chính document có vector truy vấn đứng đầu, score cosinesimil = (1 + 1) / 2
+    assert hits[0]["_id"] == "m4"
+    assert hits[0]["_score"] == pytest.approx(1.0)
+
+    # Không lọc: kết quả khớp với tính chính xác bằng numpy
+    response = local_service.vector_search(client, "emails", vectors[0], size=3)
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(normalized @ normalized[0]))[:3]
+    assert [hit["_id"] for hit in response["hits"]["hits"]] == [f"m{i}" for i in expected]
+
+
+def test_upload_without_vector_only_updates_existing_documents(client):
+    local_service.upload_document(client, "emails", "m1", {"embedding": _vector(1), **_doc("m1", "t1")})
+    # Document mới không có vector: từ chối, không thêm dòng không có vector
+    assert local_service.upload_document(client, "emails", "m2", _doc("m2", "t1")) is None
+    assert not local_service.document_exists(client, "emails", "m2")
+    assert local_service.get_index_info(client, "emails")["emails"]["rows"] == 1
+
+    # Document đã có: chỉ cập nhật metadata, giữ vector cũ
+    assert local_service.upload_document(client, "emails", "m1", _doc("m1", "t9"))
+    hits = local_service.vector_search(client, "emails", _vector(1), size=5)["hits"]["hits"]
+    assert [hit["_id"] for hit in hits] == ["m1"]
+    assert hits[0]["_source"]["metadata"]["thread_id"] == "t9"
+
+    # Document đã xóa cũng cần vector mới
+    local_service.delete_document(client, "emails", "m1")
+    assert local_service.upload_document(client, "emails", "m1", _doc("m1", "t1")) is None
+    assert local_service.count_documents(client, "emails") == 0
+
+
+def test_upsert_replaces_and_delete_hides_documents(client):
+    local_service.bulk_upload_documents(
+        client, "emails", [_doc("m1", "t1"), _doc("m2", "t1")], embeddings=[_vector(1), _vector(2)]
+    )
+    local_service.upload_document(
+        client, "emails", "m1", {"embedding": _vector(3), **_doc("m1", "t9")}
+    )
+    assert local_service.get_document(client, "emails", "m1")["_source"]["metadata"]["thread_id"] == "t9"
+    hits = local_service.vector_search(client, "emails", _vector(3), size=1)["hits"]["hits"]
+    assert hits[0]["_id"] == "m1"
+
+    assert local_service.delete_document(client, "emails", "m2")
+    assert local_service.delete_document(client, "emails", "m2") is None
+    assert not local_service.document_exists(client, "emails", "m2")
+    assert local_service.count_documents(client, "emails") == 1
+    hits = local_service.vector_search(client, "emails", _vector(2), size=5)["hits"]["hits"]
+    assert [hit["_id"] for hit in hits] == ["m1"]
+
+    # Upload lại document đã xóa dùng lại dòng cũ
+    local_service.upload_document(
+        client, "emails", "m2", {"embedding": _vector(2), **_doc("m2", "t1")}
+    )
+    assert local_service.count_documents(client, "emails") == 2
+    assert local_service.get_index_info(client, "emails")["emails"]["rows"] == 2
+
+
+# ----------------- Persistence -----------------
+def test_reopen_keeps_documents_vectors_and_deletes(tmp_path):
+    path = tmp_path / "vectordb"
+    client = local_service.new_local_client(path)
+    count = MIN_CAPACITY + 10  # vượt capacity ban đầu để vectors.npy được nới rộng
+    vectors = np.stack([_vector(i) for i in range(count)])
+    local_service.bulk_upload_documents(
+        client, "emails", [_doc(f"m{i}", "t1") for i in range(count)], embeddings=vectors
+    )
+    local_service.delete_document(client, "emails", "m0")
+    local_service.refresh_index(client, "emails")
+    client.close()
+
+    reopened = local_service.new_local_client(path)
+    assert local_service.count_documents(reopened, "emails") == count - 1
+    assert not local_service.document_exists(reopened, "emails", "m0")
+    hits = local_service.vector_search(reopened, "emails", vectors[count - 1], size=1)
+    assert hits["hits"]["hits"][0]["_id"] == f"m{count - 1}"
+    reopened.close()
+
+
+# ----------------- HNSW -----------------
+class FakeHnswIndex:
+    """Thay `hnswlib.Index`: tìm chính xác trên các vector đã thêm, cùng API store dùng."""
+
+    builds = 0
+    loads = 0
+    queries = 0
+
+    def __init__(self, space, dim):
+        self.dim = dim
+        self.items = {}
+        self.deleted = set()
+        self.max_elements = 0
+
+    def init_index(self, max_elements, M, ef_construction):  # noqa: N803
+        FakeHnswIndex.builds += 1
+        self.max_elements = max_elements
+
+    def get_max_elements(self):
+        return self.max_elements
+
+    def resize_index(self, max_elements):
+        self.max_elements = max_elements
+
+    def add_items(self, data, ids, replace_deleted=False):
+        data = np.asarray(data, dtype=np.float32).reshape(len(ids), -1)
+        for label, vector in zip(ids, data):
+            if label >= self.max_elements:
+                raise RuntimeError("The number of elements exceeds the specified limit")
+            self.items[int(label)] = vector.copy()
+            self.deleted.discard(int(label))
+
+    def mark_deleted(self, label):
+        if label not in self.items or label in self.deleted:
+            raise RuntimeError("Label not found or already deleted")
+        self.deleted.add(label)
+
+    def unmark_deleted(self, label):
+        if label not in self.deleted:
+            raise RuntimeError("Label is not deleted")
+        self.deleted.discard(label)
+
+    def set_ef(self, ef):
+        self.ef = ef
+
+    def knn_query(self, data, k, filter=None):  # noqa: A002
+        FakeHnswIndex.queries += 1
+        labels = [
+            label
+            for label in self.items
+            if label not in self.deleted and (filter is None or filter(label))
+        ]
+        if len(labels) < k:
+            raise RuntimeError("Cannot return the results in a contiguous 2D array")
+        distances = 1.0 - np.stack([self.items[label] for label in labels]) @ data
+        top = np.argsort(distances)[:k]
+        return np.asarray([labels])[:, top], distances[top][None, :]
+
+    def save_index(self, path):
+        with open(path, "wb") as file:
+            pickle.dump((self.items, self.deleted), file)
+
+    def load_index(self, path, max_elements):
+        FakeHnswIndex.loads += 1
+        with open(path, "rb") as file:
+            self.items, self.deleted = pickle.load(file)  # noqa: S301
+        self.max_elements = max_elements
+
+
+class FakeHnswlib:
+    Index = FakeHnswIndex
+
+
+@pytest.fixture
+def fake_hnsw(monkeypatch):
+    """HNSW giả, luôn đi qua nhánh HNSW của search (ngưỡng tìm chính xác = 0)."""
+    monkeypatch.setattr(store, "hnswlib", FakeHnswlib)
+    monkeypatch.setattr(store, "EXACT_SEARCH_MAX_ROWS", 0)
+    monkeypatch.setattr(store, "EXACT_SEARCH_MAX_RATIO", 0)
+    FakeHnswIndex.builds = FakeHnswIndex.loads = FakeHnswIndex.queries = 0
+
+
+def _exact_ids(vectors, query, size, rows=None):
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    rows = np.arange(len(vectors)) if rows is None else np.asarray(rows)
+    return [f"m{i}" for i in rows[np.argsort(-scores[rows])][:size]]
+
+
+def _search_ids(client, query, size, filter=None):  # noqa: A002
+    response = local_service.vector_search(client, "emails", query, size=size, filter=filter)
+    return [hit["_id"] for hit in response["hits"]["hits"]]
+
+
+def test_hnsw_search_with_filter_and_deletes(tmp_path, fake_hnsw):
+    client = local_service.new_local_client(tmp_path / "vectordb")
+    vectors = np.stack([_vector(i) for i in range(40)])
+    local_service.bulk_upload_documents(
+        client, "emails", [_doc(f"m{i}", f"t{i % 2}") for i in range(40)], embeddings=vectors
+    )
+    local_service.delete_document(client, "emails", "m0")
+
+    assert _search_ids(client, vectors[3], 5) == _exact_ids(vectors, vectors[3], 5, range(1, 40))
+    odd = _search_ids(client, vectors[3], 5, filter={"term": {"metadata.thread_id": "t1"}})
+    assert odd == _exact_ids(vectors, vectors[3], 5, range(1, 40, 2))
+    assert FakeHnswIndex.queries == 2
+
+    # Upload lại document đã xóa kèm vector mới: có lại trong đồ thị
+    local_service.upload_document(client, "emails", "m0", {"embedding": vectors[0], **_doc("m0", "t0")})
+    assert _search_ids(client, vectors[0], 1) == ["m0"]
+    client.close()
+
+
+def test_hnsw_falls_back_to_exact_search_when_query_fails(tmp_path, fake_hnsw, monkeypatch):
+    def _failing_query(self, data, k, filter=None):  # noqa: A002
+        raise RuntimeError("Cannot return the results in a contiguous 2D array")
+
+    monkeypatch.setattr(FakeHnswIndex, "knn_query", _failing_query)
+    client = local_service.new_local_client(tmp_path / "vectordb")
+    vectors = np.stack([_vector(i) for i in range(20)])
+    local_service.bulk_upload_documents(
+        client, "emails", [_doc(f"m{i}", "t1") for i in range(20)], embeddings=vectors
+    )
+    assert _search_ids(client, vectors[7], 3) == _exact_ids(vectors, vectors[7], 3)
+    client.close()
+
+
+def test_hnsw_saved_on_refresh_and_rebuilt_when_stale(tmp_path, fake_hnsw):
+    path = tmp_path / "vectordb"
+    client = local_service.new_local_client(path)
+    vectors = np.stack([_vector(i) for i in range(MIN_CAPACITY + 10)])
+    docs = [_doc(f"m{i}", "t1") for i in range(len(vectors))]
+    local_service.bulk_upload_documents(client, "emails", docs[:10], embeddings=vectors[:10])
+    local_service.refresh_index(client, "emails")
+
+    # Mở lại sau refresh: nạp `hnsw.bin`, không build lại
+    reopened = local_service.new_local_client(path)
+    assert _search_ids(reopened, vectors[4], 1) == ["m4"]
+    assert (FakeHnswIndex.builds, FakeHnswIndex.loads) == (1, 1)
+
+    # Client đầu ghi thêm (vượt capacity ban đầu) nhưng chưa refresh: client kia
+    # nới rộng đồ thị và thêm các dòng mới khi đọc
+    local_service.bulk_upload_documents(client, "emails", docs[10:], embeddings=vectors[10:])
+    assert _search_ids(reopened, vectors[-1], 1) == [f"m{len(vectors) - 1}"]
+    assert reopened.get("emails")._hnsw.get_max_elements() >= len(vectors)
+
+    # `hnsw.bin` vẫn là bản lưu lúc refresh, cũ hơn dữ liệu: build lại từ vectors.npy
+    fresh = local_service.new_local_client(path)
+    assert _search_ids(fresh, vectors[-1], 1) == [f"m{len(vectors) - 1}"]
+    assert (FakeHnswIndex.builds, FakeHnswIndex.loads) == (2, 1)
+    for opened in (client, reopened, fresh):
+        opened.close()
+
+
+def test_real_hnswlib_search_and_reopen(tmp_path, monkeypatch):
+    pytest.importorskip("hnswlib")
+    monkeypatch.setattr(store, "EXACT_SEARCH_MAX_ROWS", 0)
+    monkeypatch.setattr(store, "EXACT_SEARCH_MAX_RATIO", 0)
+    path = tmp_path / "vectordb"
+    client = local_service.new_local_client(path)
+    vectors = np.stack([_vector(i) for i in range(200)])
+    local_service.bulk_upload_documents(
+        client, "emails", [_doc(f"m{i}", f"t{i % 4}") for i in range(200)], embeddings=vectors
+    )
+    local_service.delete_document(client, "emails", "m8")
+    assert _search_ids(client, vectors[5], 1) == ["m5"]
+    hits = _search_ids(client, vectors[8], 5, filter={"term": {"metadata.thread_id": "t0"}})
+    assert len(hits) == 5
+    assert "m8" not in hits
+    assert all(int(hit[1:]) % 4 == 0 for hit in hits)
+    client.close()
+
+    reopened = local_service.new_local_client(path)
+    assert _search_ids(reopened, vectors[199], 1) == ["m199"]
+    assert "m8" not in _search_ids(reopened, vectors[8], 10)
+    reopened.close()
+
+
+# ----------------- Nhiều process cùng ghi -----------------
+def test_two_clients_on_same_index_do_not_overwrite_rows(tmp_path):
+    path = tmp_path / "vectordb"
+    first = local_service.new_local_client(path)
+    second = local_service.new_local_client(path)
+
+    local_service.upload_document(first, "emails", "A", {"embedding": _vector(1), **_doc("A", "t1")})
+    local_service.upload_document(second, "emails", "B", {"embedding": _vector(2), **_doc("B", "t1")})
+
+    # Mỗi client thấy document của client kia
+    assert local_service.get_document(first, "emails", "B") is not None
+    hits = local_service.vector_search(second, "emails", _vector(1), size=1)["hits"]["hits"]
+    assert hits[0]["_id"] == "A"
+
+    local_service.delete_document(second, "emails", "A")
+    assert not local_service.document_exists(first, "emails", "A")
+    first.close()
+    second.close()
+
+    reopened = local_service.new_local_client(path)
+    docs = local_service.search_documents(reopened, "emails", {"query": {"match_all": {}}})
+    assert [hit["_id"] for hit in docs["hits"]["hits"]] == ["B"]
+    reopened.close()
+
+
+def _upload_many(path, prefix, count):
+    client = local_service.new_local_client(path)
+    for i in range(count):
+        local_service.upload_document(
+            client, "emails", f"{prefix}{i}", {"embedding": _vector(i), **_doc(f"{prefix}{i}", prefix)}
+        )
+    client.close()
+
+
+def test_processes_writing_concurrently_keep_every_document(tmp_path):
+    path = tmp_path / "vectordb"
+    local_service.create_index(local_service.new_local_client(path), "emails", None)
+    # Đủ nhiều để vectors.npy được nới rộng trong lúc các process khác đang ghi
+    count = MIN_CAPACITY // 2 + 100
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=_upload_many, args=(path, prefix, count)) for prefix in "abc"
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=120)
+        assert process.exitcode == 0
+
+    client = local_service.new_local_client(path)
+    assert local_service.count_documents(client, "emails") == 3 * count
+    for prefix in "abc":
+        hits = local_service.vector_search(
+            client,
+            "emails",
+            _vector(7),
+            size=1,
+            filter={"term": {"metadata.thread_id": prefix}},
+        )["hits"]["hits"]
+        assert hits[0]["_id"] == f"{prefix}7"
+    client.close()
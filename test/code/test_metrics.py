@@ -0,0 +1,50 @@
+import json
+import os
+import re
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, "packages"))
+sys.path.insert(0, os.path.join(ROOT_DIR, "libs"))
+
+import httpx  # noqa: E402
+
+from libs.openai_api_client.src.openai_api_client import embedding  # noqa: E402
+from workflows.utils.metrics import render_metrics  # noqa: E402
+
+
+def _metric(text, name):
+    match = re.search(rf"^{re.escape(name)} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+def _fake_embeddings(request):
+    body = json.loads(request.content)
+    return httpx.Response(
+        200,
+        json={
+            "object": "list",
+            "model": body["model"],
+            "data": [{"object": "embedding", "index": 0, "embedding": [0.1, 0.2, 0.3]}],
+            "usage": {"prompt_tokens": 7, "total_tokens": 7},
+        },
+    )
+
+
+def test_embedding_call_is_counted_in_metrics(monkeypatch):
+    http_client = httpx.Client(transport=httpx.MockTransport(_fake_embeddings))
+    monkeypatch.setattr(embedding, "get_http_client", lambda: http_client)
+    model = embedding.EmbeddingModel(
+        openai_api_url="http://localhost:1/v1",
+        openai_api_key="test",
+        model_id="test-embedding",
+    )
+    before = render_metrics()
+
+    assert model.embed("xin chào") == [0.1, 0.2, 0.3]
+
+    after = render_metrics()
+    assert _metric(after, "openai_requests_total") == _metric(before, "openai_requests_total") + 1
+    tokens = 'openai_tokens_total{endpoint="embeddings"}'
+    assert _metric(after, tokens) == _metric(before, tokens) + 7
@@ -0,0 +1,75 @@
+import hashlib
+import io
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, "packages"))
+sys.path.insert(0, os.path.join(ROOT_DIR, "libs"))
+
+import pytest  # noqa: E402
+
+pytest.importorskip("botocore")
+
+from workflows.utils import minio_sync  # noqa: E402
+
+PREFIX = "models/demo"
+CHUNK_SIZE = 64 * 1024
+DATA = random.Random(0).randbytes(10 * CHUNK_SIZE + 123)
+
+
+class FakeS3:
+    """Client S3 giả: một object, ghi lại mỗi lần GET vào `log_path`."""
+
+    def __init__(self, log_path):
+        self.log_path = log_path
+        self.etag = hashlib.md5(DATA).hexdigest()  # noqa: S324
+
+    def get_paginator(self, name):
+        return self
+
+    def paginate(self, Bucket, Prefix):  # noqa: N803
+        return [{"Contents": [{"Key": f"{PREFIX}/model.bin", "Size": len(DATA), "ETag": f'"{self.etag}"'}]}]
+
+    def get_object(self, Bucket, Key, Range, IfMatch):  # noqa: N803
+        start, end = (int(value) for value in Range.removeprefix("bytes=").split("-"))
+        with open(self.log_path, "a") as log_file:
+            log_file.write(f"{os.getpid()}\n")
+        time.sleep(0.02)
+        return {"Body": io.BytesIO(DATA[start : end + 1])}
+
+
+def _sync(local_path, log_path):
+    minio_sync.sync_from_minio(
+        FakeS3(log_path), "bucket", PREFIX, local_path, workers=2, chunk_size=CHUNK_SIZE
+    )
+
+
+def test_sync_downloads_and_skips_up_to_date(tmp_path):
+    log_path = tmp_path / "gets.log"
+    _sync(tmp_path / "model", log_path)
+    _sync(tmp_path / "model", log_path)
+
+    assert (tmp_path / "model" / "model.bin").read_bytes() == DATA
+    assert len(log_path.read_text().split()) == 11
+
+
+def test_processes_syncing_together_download_once(tmp_path):
+    local_path = tmp_path / "model"
+    log_path = tmp_path / "gets.log"
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=_sync, args=(local_path, log_path)) for _ in range(2)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    assert (local_path / "model.bin").read_bytes() == DATA
+    assert not list(local_path.glob("*.part*"))
+    # Process sau đợi khóa rồi thấy model đã tải xong qua manifest
+    assert len(log_path.read_text().split()) == 11
@@ -0,0 +1,182 @@
+import os
+import sys
+import threading
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, os.path.join(ROOT_DIR, "packages"))
+sys.path.insert(0, os.path.join(ROOT_DIR, "libs"))
+
+import pytest  # noqa: E402
+
+from workflows.utils import model_registry  # noqa: E402
+from workflows.utils.model_registry import ModelRegistry  # noqa: E402
+
+
+class FakeLlama:
+    """Llama giả: lỗi nếu bị gọi đồng thời hoặc sau khi đã close."""
+
+    # Thời gian load giả lập, số lần load và file load lỗi (dùng trong test)
+    load_seconds = 0.0
+    loads = 0
+    failing = None
+
+    def __init__(self, model_path, **kwargs):
+        FakeLlama.loads += 1
+        time.sleep(self.load_seconds)
+        if model_path == FakeLlama.failing:
+            raise RuntimeError("load failed")
+        self.model_path = model_path
+        self.kwargs = kwargs
+        self.closed = False
+        self.active = 0
+
+    def __call__(self):
+        assert not self.closed
+        self.active += 1
+        assert self.active == 1
+        time.sleep(0.005)
+        self.active -= 1
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def model_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_registry, "Llama", FakeLlama)
+    monkeypatch.setattr(FakeLlama, "load_seconds", 0.0)
+    monkeypatch.setattr(FakeLlama, "loads", 0)
+    monkeypatch.setattr(FakeLlama, "failing", None)
+    files = []
+    for name in ("a.bin", "b.bin", "c.bin"):
+        path = tmp_path / name
+        path.write_bytes(b"x" * 100)
+        files.append(path)
+    return files
+
+
+def test_lease_reuses_model_and_serializes_threads(model_files):
+    registry = ModelRegistry()
+    models = []
+
+    def use():
+        with registry.lease(model_files[0], n_ctx=512) as model:
+            model()
+            models.append(model)
+
+    threads = [threading.Thread(target=use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(models) == 8
+    assert all(model is models[0] for model in models)
+    assert models[0].kwargs["use_mmap"] is True
+
+
+def test_budget_evicts_least_recently_used(model_files):
+    registry = ModelRegistry(memory_budget_bytes=250)
+    with registry.lease(model_files[0]) as first:
+        pass
+    with registry.lease(model_files[1]) as second:
+        pass
+    with registry.lease(model_files[2]):
+        pass
+
+    assert first.closed
+    assert not second.closed
+    assert registry.loaded_bytes == 200
+
+
+def test_budget_skips_models_in_use(model_files):
+    registry = ModelRegistry(memory_budget_bytes=150)
+    with registry.lease(model_files[0]) as first:
+        with registry.lease(model_files[1]) as second:
+            # Vượt budget nhưng `first` đang được dùng nên không bị giải phóng
+            assert registry.loaded_bytes == 200
+            assert not first.closed
+
+        with registry.lease(model_files[2]):
+            # `second` không còn ai dùng nên bị giải phóng, `first` vẫn giữ
+            assert second.closed
+            assert not first.closed
+            first()
+
+
+def test_evict_waits_for_last_lease(model_files):
+    registry = ModelRegistry()
+    with registry.lease(model_files[0]) as model:
+        registry.evict(model_files[0])
+        assert not model.closed
+        model()
+    assert model.closed
+    assert registry.loaded_bytes == 0
+
+
+def test_slow_load_does_not_block_other_models(model_files, monkeypatch):
+    registry = ModelRegistry()
+    with registry.lease(model_files[0]):
+        pass
+
+    def load_second():
+        with registry.lease(model_files[1]):
+            pass
+
+    monkeypatch.setattr(FakeLlama, "load_seconds", 0.5)
+    loader = threading.Thread(target=load_second)
+    loader.start()
+    time.sleep(0.05)
+    # model_files[1] đang load: mượn model đã load không phải chờ
+    start = time.perf_counter()
+    with registry.lease(model_files[0]) as model:
+        model()
+    assert time.perf_counter() - start < 0.2
+    loader.join()
+
+
+def test_concurrent_leases_share_one_load(model_files, monkeypatch):
+    monkeypatch.setattr(FakeLlama, "load_seconds", 0.1)
+    registry = ModelRegistry()
+    models = []
+
+    def use():
+        with registry.lease(model_files[0]) as model:
+            models.append(model)
+
+    threads = [threading.Thread(target=use) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert FakeLlama.loads == 1
+    assert all(model is models[0] for model in models)
+
+
+def test_failed_load_raises_in_waiting_threads(model_files, monkeypatch):
+    monkeypatch.setattr(FakeLlama, "load_seconds", 0.1)
+    monkeypatch.setattr(FakeLlama, "failing", str(model_files[0]))
+    registry = ModelRegistry()
+    errors = []
+
+    def use():
+        try:
+            with registry.lease(model_files[0]):
+                pass
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=use) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 3
+    assert FakeLlama.loads == 1
+    # Lần sau load lại
+    monkeypatch.setattr(FakeLlama, "failing", None)
+    with registry.lease(model_files[0]) as model:
+        model()
@@ -0,0 +1,101 @@
+import os
+import sys
+import threading
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, os.path.join(ROOT_DIR, "packages"))
+sys.path.insert(0, os.path.join(ROOT_DIR, "libs"))
+
+from workflows.converter.near_duplicates import NearDuplicateIndex  # noqa: E402
+
+CV = " ".join(
+    f"Kinh nghiệm {i}: phát triển hệ thống xử lý dữ liệu cho khách hàng số {i}."
+    for i in range(30)
+)
+OTHER = " ".join(
+    f"Biên bản họp {i}: thống nhất kế hoạch triển khai giai đoạn {i} của dự án."
+    for i in range(30)
+)
+
+
+def test_near_duplicate_found_above_threshold():
+    index = NearDuplicateIndex(threshold=0.8)
+    assert index.add("cv-1", CV)
+
+    forwarded = CV + " Sent from my iPhone"
+    duplicate = index.query(forwarded)
+    assert duplicate is not None
+    assert duplicate.key == "cv-1"
+    assert duplicate.similarity >= 0.8
+    assert index.query(OTHER) is None
+
+
+def test_short_text_is_not_indexed():
+    index = NearDuplicateIndex()
+    assert not index.add("short", "OK thanks")
+    assert index.query("OK thanks") is None
+    assert index.query_or_add("short", "OK thanks") is None
+    assert len(index) == 0
+
+
+def test_query_or_add_keeps_first_as_canonical():
+    index = NearDuplicateIndex(threshold=0.8)
+    assert index.query_or_add("cv-1", CV) is None
+    duplicate = index.query_or_add("cv-2", CV + " Best regards")
+    assert duplicate is not None
+    assert duplicate.key == "cv-1"
+    # Bản gần trùng không được thêm vào index
+    assert len(index) == 1
+
+
+def test_query_or_add_ignores_entry_with_same_key():
+    # Email đã index (vd. nạp từ vector DB) được xử lý lại: không gần trùng chính nó
+    index = NearDuplicateIndex(threshold=0.8)
+    index.add("m1", CV)
+    assert index.query_or_add("m1", CV) is None
+    assert len(index) == 1
+
+    # Nhưng vẫn là bản gốc của email khác
+    duplicate = index.query_or_add("m2", CV)
+    assert duplicate is not None
+    assert duplicate.key == "m1"
+
+
+def test_query_or_add_is_atomic_across_threads():
+    index = NearDuplicateIndex(threshold=0.8)
+    results = []
+    barrier = threading.Barrier(8)
+
+    def worker(i):
+        barrier.wait()
+        results.append(index.query_or_add(f"mail-{i}", CV))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    originals = [result for result in results if result is None]
+    assert len(originals) == 1
+    assert len(index) == 1
+
+
+def test_max_items_evicts_least_recently_used():
+    texts = {
+        key: " ".join(f"{key} dòng {i} nội dung riêng của văn bản {key}" for i in range(20))
+        for key in ("a", "b", "c")
+    }
+    index = NearDuplicateIndex(threshold=0.8, max_items=2)
+    index.add("a", texts["a"])
+    index.add("b", texts["b"])
+    # Dùng lại "a" để "b" thành phần tử cũ nhất
+    assert index.query(texts["a"]).key == "a"
+    index.add("c", texts["c"])
+
+    assert len(index) == 2
+    assert index.query(texts["b"]) is None
+    assert index.query(texts["a"]).key == "a"
+    assert index.query(texts["c"]).key == "c"
+    # Phần tử bị loại cũng không còn trong các bucket LSH
+    assert all("b" not in keys for bucket in index._buckets for keys in bucket.values())
@@ -0,0 +1,41 @@
+import os
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, "packages"))
+sys.path.insert(0, os.path.join(ROOT_DIR, "libs"))
+
+# Import như workflows (`workflows/flows/dependencies.py`), package không được cài
+from libs.openai_api_client.src.openai_api_client import embedding, http_client  # noqa: E402
+from libs.openai_api_client.src.openai_api_client.chat import (  # noqa: E402
+    AsyncChatModel,
+    ChatModel,
+)
+from libs.openai_api_client.src.openai_api_client.embedding import (  # noqa: E402
+    EmbeddingModel,
+)
+from libs.openai_api_client.src.openai_api_client.rate_limit import (  # noqa: E402
+    get_rate_limiter,
+)
+
+
+def test_embedding_model_imports_through_repo_path():
+    model = EmbeddingModel(
+        openai_api_url="http://localhost:1/v1",
+        openai_api_key="test",
+        model_id="test-embedding",
+        rate_limiter=get_rate_limiter("http://localhost:1/v1"),
+    )
+    assert model.model_id == "test-embedding"
+
+
+def test_clients_share_one_copy_of_the_http_module():
+    # Một module duy nhất: pool HTTP, rate limiter và client_stats dùng chung
+    chat_module = sys.modules[ChatModel.__module__]
+    async_module = sys.modules[AsyncChatModel.__module__]
+    assert embedding.client_stats is http_client.client_stats
+    assert chat_module.client_stats is http_client.client_stats
+    assert async_module.call_with_retry_async is http_client.call_with_retry_async
+    assert embedding.get_http_client() is http_client.get_http_client()
+    assert "openai_api_client.http_client" not in sys.modules
@@ -0,0 +1,112 @@
+import os
+import sys
+import threading
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, os.path.join(ROOT_DIR, "packages"))
+sys.path.insert(0, os.path.join(ROOT_DIR, "libs"))
+
+from workflows.converter.mail_progress import (  # noqa: E402
+    MailProgress,
+    OrderedThreadCommitter,
+)
+from workflows.utils.pipeline import Stage, run_pipeline  # noqa: E402
+
+
+# ----------------- run_pipeline -----------------
+def test_pipeline_runs_every_item_through_every_stage():
+    stages = [
+        Stage("double", lambda x: x * 2, workers=3),
+        Stage("inc", lambda x: x + 1, workers=2),
+    ]
+    results = list(run_pipeline(range(100), stages, queue_size=4))
+
+    assert all(result.error is None for result in results)
+    assert sorted(result.item for result in results) == [x * 2 + 1 for x in range(100)]
+
+
+def test_pipeline_reports_failed_stage_and_skips_later_stages():
+    seen_by_last = []
+
+    def check(x):
+        if x % 10 == 0:
+            raise ValueError(f"bad {x}")
+        return x
+
+    def last(x):
+        seen_by_last.append(x)
+        return x
+
+    stages = [Stage("check", check, workers=2), Stage("last", last)]
+    results = list(run_pipeline(range(30), stages))
+
+    failed = [result for result in results if result.error is not None]
+    assert sorted(result.item for result in failed) == [0, 10, 20]
+    assert all(result.failed_stage == "check" for result in failed)
+    assert all(isinstance(result.error, ValueError) for result in failed)
+    assert sorted(seen_by_last) == [x for x in range(30) if x % 10]
+
+
+def test_pipeline_overlaps_stages():
+    def slow(x):
+        time.sleep(0.02)
+        return x
+
+    stages = [Stage("a", slow, workers=4), Stage("b", slow, workers=4)]
+    start = time.perf_counter()
+    assert len(list(run_pipeline(range(20), stages))) == 20
+    # Chạy tuần tự: 20 * 2 * 0.02 = 0.8s; các stage chồng nhau và song song thì nhanh hơn nhiều
+    assert time.perf_counter() - start < 0.4
+
+
+def test_pipeline_stops_when_consumer_stops_reading():
+    processed = []
+    lock = threading.Lock()
+
+    def record(x):
+        with lock:
+            processed.append(x)
+        return x
+
+    results = run_pipeline(range(10_000), [Stage("record", record, workers=2)], queue_size=2)
+    next(results)
+    results.close()
+    time.sleep(0.3)
+    # Back-pressure: chỉ xử lý vài item vượt quá kích thước các queue
+    assert len(processed) < 50
+
+
+# ----------------- OrderedThreadCommitter -----------------
+def test_committer_commits_threads_in_original_order(tmp_path):
+    progress = MailProgress(tmp_path / "progress.json")
+    committer = OrderedThreadCommitter(progress, {"t1": 2, "t2": 1, "t3": 1})
+
+    # t2 và t3 xong trước t1 nhưng chỉ được ghi khi t1 đã xong
+    assert committer.done("t2", "m3", ok=True) == []
+    assert committer.done("t3", "m4", ok=True) == []
+    assert committer.done("t1", "m1", ok=True) == []
+    assert not progress.is_done("m3")
+    assert committer.done("t1", "m2", ok=True) == ["t1", "t2", "t3"]
+    assert all(progress.is_done(mail_id) for mail_id in ("m1", "m2", "m3", "m4"))
+
+
+def test_committer_does_not_record_failed_mails(tmp_path):
+    path = tmp_path / "progress.json"
+    committer = OrderedThreadCommitter(MailProgress(path), {"t1": 2})
+    committer.done("t1", "m1", ok=True)
+    assert committer.done("t1", "m2", ok=False) == ["t1"]
+
+    reloaded = MailProgress(path)
+    assert reloaded.is_done("m1")
+    assert not reloaded.is_done("m2")
+
+
+def test_progress_reset_forgets_indexed_mails(tmp_path):
+    path = tmp_path / "progress.json"
+    progress = MailProgress(path)
+    progress.commit("t1", ["m1"])
+    progress.reset()
+
+    assert not progress.is_done("m1")
+    assert not MailProgress(path).is_done("m1")
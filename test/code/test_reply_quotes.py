@@ -0,0 +1,51 @@
+import os
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, os.path.join(ROOT_DIR, "packages"))
+sys.path.insert(0, os.path.join(ROOT_DIR, "libs"))
+
+from workflows.converter.reply_quotes import (  # noqa: E402
+    extract_thread_deltas,
+    strip_quoted_reply,
+)
+
+FIRST = "Chào anh,\n\nEm gửi báo cáo tháng 9.\nSố liệu ở file đính kèm.\n\nThanks,\nLan"
+
+
+def test_strip_gmail_attribution_and_quoted_lines():
+    reply = (
+        "Ok em, anh xem rồi.\n\n"
+        "On Mon, Sep 1, 2025 at 9:00 AM Lan <lan@example.com>\nwrote:\n"
+        "> Chào anh,\n> Em gửi báo cáo tháng 9."
+    )
+    assert strip_quoted_reply(reply) == "Ok em, anh xem rồi."
+
+
+def test_strip_vietnamese_and_outlook_markers():
+    vietnamese = "Đã nhận.\nVào Th 2, 1 thg 9, 2025 Lan đã viết:\nnội dung cũ"
+    outlook = "Cảm ơn.\r\n-----Original Message-----\r\nFrom: Lan\r\nSent: Monday"
+    assert strip_quoted_reply(vietnamese) == "Đã nhận."
+    assert strip_quoted_reply(outlook) == "Cảm ơn."
+
+
+def test_thread_deltas_keep_only_new_content():
+    second = "Anh nhận được rồi, cảm ơn em.\n\nOn Mon, Lan wrote:\n" + "\n".join(
+        f"> {line}" for line in FIRST.split("\n")
+    )
+    assert extract_thread_deltas([FIRST, second]) == [
+        FIRST,
+        "Anh nhận được rồi, cảm ơn em.",
+    ]
+
+
+def test_thread_deltas_drop_unmarked_repeated_blocks():
+    # Client quote lại thư trước mà không có dòng giới thiệu hay dấu `>`
+    second = "Em bổ sung thêm file Excel.\n\n" + FIRST
+    assert extract_thread_deltas([FIRST, second])[1] == "Em bổ sung thêm file Excel."
+
+
+def test_thread_deltas_keep_text_of_pure_forward():
+    # Chỉ quote lại toàn bộ: vẫn giữ nội dung để email có gì đó để embed
+    assert extract_thread_deltas([FIRST, FIRST]) == [FIRST, FIRST]
+    assert extract_thread_deltas(["", None]) == ["", ""]